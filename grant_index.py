@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""In-memory indexes over the merged master for fast filtered queries.
+
+``GrantIndex`` is built once per dataset and answers queries without scanning
+every row:
+
+* deadlines (``Deadline``, falling back to ``App deadline``) and award
+  amounts (``Award max``) are kept as sorted arrays, so date and amount
+  ranges are two binary searches;
+* ``Sponsor``/``Sponsor org``, ``Status`` and ``Opp ID`` have hash indexes
+  from the case-folded value to the matching row ids;
+* filters are intersected smallest first and only the survivors are sorted.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from grant_parsing import parse_dates, parse_money
+from wrangle_grants import DEADLINE_COLUMNS, DEFAULT_WEIGHTS, SCORE_INPUTS
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+HASH_COLUMNS = {
+    "sponsor": ("Sponsor", "Sponsor org"),
+    "status": ("Status",),
+    "opp_id": ("Opp ID",),
+}
+CLOSED_STATUSES = ("closed", "archived")
+SORT_KEYS = ("score", "deadline", "award")
+
+
+def _key(value: Any) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+class RangeIndex:
+    """Row ids sorted by a numeric value; rows without a value are left out."""
+
+    def __init__(self, values: np.ndarray) -> None:
+        import numpy as np
+
+        ids = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[ids], kind="stable")
+        self.ids = ids[order]
+        self.values = values[self.ids]
+
+    def between(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Return the sorted row ids with ``low <= value <= high``."""
+        import numpy as np
+
+        start = 0 if low is None else np.searchsorted(self.values, low, side="left")
+        stop = len(self.values) if high is None else np.searchsorted(self.values, high, side="right")
+        return np.sort(self.ids[start:stop])
+
+
+class GrantIndex:
+    """Deadline, award, score and hash indexes over ``rows`` in ``headers`` order."""
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        rows: Sequence[Sequence[Any]],
+        weights: Sequence[float] = DEFAULT_WEIGHTS,
+    ) -> None:
+        import numpy as np
+        import pandas as pd
+
+        self.headers = list(headers)
+        self.rows = rows
+        df = pd.DataFrame.from_records(rows, columns=self.headers) if rows else pd.DataFrame(columns=self.headers)
+        n = len(df)
+
+        deadline = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        for col in DEADLINE_COLUMNS:
+            if col in df.columns:
+                deadline = deadline.fillna(parse_dates(df[col]))
+        days = deadline.to_numpy(dtype="datetime64[D]")
+        self.deadline_days = np.where(np.isnat(days), np.nan, days.astype("int64").astype(float))
+        self.deadlines = RangeIndex(self.deadline_days)
+        self.undated = np.flatnonzero(np.isnan(self.deadline_days))
+
+        award = parse_money(df["Award max"]).to_numpy() if "Award max" in df.columns else np.full(n, np.nan)
+        self.awards_max = award
+        self.awards = RangeIndex(award)
+
+        # Sources that export ``Weighted Score`` keep it; other rows are scored here.
+        features = [
+            pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            if col in df.columns
+            else np.zeros(n)
+            for col in SCORE_INPUTS
+        ]
+        self.scores = np.column_stack(features) @ np.asarray(weights, dtype=float) if n else np.zeros(0)
+        if "Weighted Score" in df.columns:
+            given = pd.to_numeric(df["Weighted Score"], errors="coerce").to_numpy(dtype=float)
+            self.scores = np.where(np.isnan(given), self.scores, given)
+
+        self.hashes: Dict[str, Dict[str, np.ndarray]] = {}
+        for name, columns in HASH_COLUMNS.items():
+            buckets: Dict[str, List[int]] = {}
+            for col in columns:
+                if col not in df.columns:
+                    continue
+                for i, value in enumerate(df[col]):
+                    if value:
+                        buckets.setdefault(_key(value), []).append(i)
+            self.hashes[name] = {k: np.unique(np.asarray(v, dtype=np.int64)) for k, v in buckets.items()}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _lookup(self, name: str, values: Iterable[str]) -> np.ndarray:
+        import numpy as np
+
+        index = self.hashes[name]
+        found = [index[_key(v)] for v in values if _key(v) in index]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query(
+        self,
+        sponsor: Sequence[str] = (),
+        status: Sequence[str] = (),
+        opp_id: Sequence[str] = (),
+        open_only: bool = False,
+        within_days: Optional[int] = None,
+        deadline_after: Optional[dt.date] = None,
+        deadline_before: Optional[dt.date] = None,
+        award_min: Optional[float] = None,
+        award_max: Optional[float] = None,
+        sort: str = "score",
+        descending: Optional[bool] = None,
+        today: Optional[dt.date] = None,
+    ) -> np.ndarray:
+        """Return the ids of matching rows, sorted by ``sort``.
+
+        ``open_only`` keeps grants whose deadline is today or later and whose
+        status is not closed/archived; undated grants are kept only when no
+        deadline range is given. ``within_days``
+        keeps deadlines from today through today + N. Scores sort high to low
+        by default; deadlines and awards low to high.
+        """
+        import numpy as np
+
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        today_days = float((today or dt.date.today()).toordinal() - dt.date(1970, 1, 1).toordinal())
+
+        candidates: List[np.ndarray] = []
+        for name, values in (("sponsor", sponsor), ("status", status), ("opp_id", opp_id)):
+            if values:
+                candidates.append(self._lookup(name, values))
+
+        low = high = None
+        if deadline_after is not None:
+            low = float(np.datetime64(deadline_after, "D").astype("int64"))
+        if deadline_before is not None:
+            high = float(np.datetime64(deadline_before, "D").astype("int64"))
+        if within_days is not None:
+            low = today_days if low is None else max(low, today_days)
+            high = today_days + within_days if high is None else min(high, today_days + within_days)
+        if open_only and (low is not None or high is not None):
+            low = today_days if low is None else max(low, today_days)
+        if low is not None or high is not None:
+            candidates.append(self.deadlines.between(low, high))
+        elif open_only:
+            candidates.append(np.union1d(self.deadlines.between(today_days, None), self.undated))
+        if award_min is not None or award_max is not None:
+            candidates.append(self.awards.between(award_min, award_max))
+
+        if candidates:
+            candidates.sort(key=len)
+            ids = candidates[0]
+            for other in candidates[1:]:
+                if not len(ids):
+                    break
+                ids = np.intersect1d(ids, other, assume_unique=True)
+        else:
+            ids = np.arange(len(self.rows))
+
+        if open_only and len(ids):
+            closed = self._lookup("status", CLOSED_STATUSES)
+            if len(closed):
+                ids = np.setdiff1d(ids, closed, assume_unique=True)
+
+        keys = {"score": self.scores, "deadline": self.deadline_days, "award": self.awards_max}[sort][ids]
+        if descending is None:
+            descending = sort == "score"
+        # Missing deadlines/awards sort last either way; ties keep row order.
+        missing = np.isnan(keys)
+        order = np.lexsort((ids, -keys if descending else keys, missing))
+        return ids[order]
+
+    def records(self, ids: Iterable[int], columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Return rows ``ids`` as dicts (blank cells as ``None``), optionally projected."""
+        columns = list(columns or self.headers)
+        positions = [self.headers.index(c) for c in columns]
+        out = []
+        for i in ids:
+            row = self.rows[int(i)]
+            out.append({c: (row[p] if row[p] != "" else None) for c, p in zip(columns, positions)})
+        return out
+
+
+def parse_query(args: Any) -> Tuple[Dict[str, Any], int, Optional[List[str]]]:
+    """Turn query-string ``args`` (a ``MultiDict``) into ``GrantIndex.query`` keywords.
+
+    Returns ``(keywords, limit, fields)``; raises ``ValueError`` on bad input.
+    """
+    kwargs: Dict[str, Any] = {
+        "sponsor": args.getlist("sponsor"),
+        "status": args.getlist("status"),
+        "opp_id": args.getlist("opp_id"),
+        "open_only": args.get("open", "").lower() in ("1", "true", "yes"),
+    }
+    if args.get("within_days"):
+        kwargs["within_days"] = int(args["within_days"])
+    for name in ("deadline_after", "deadline_before"):
+        if args.get(name):
+            kwargs[name] = dt.date.fromisoformat(args[name])
+    for name in ("award_min", "award_max"):
+        if args.get(name):
+            kwargs[name] = float(args[name])
+    kwargs["sort"] = args.get("sort", "score")
+    if args.get("order"):
+        if args["order"] not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+        kwargs["descending"] = args["order"] == "desc"
+    limit = int(args.get("limit", 50))
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    fields = [f.strip() for f in args["fields"].split(",") if f.strip()] if args.get("fields") else None
+    return kwargs, limit, fields
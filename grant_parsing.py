@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Shared, memoized parsing of deadline and money strings.
+
+Exports repeat the same few hundred deadline and award strings across
+thousands of rows ("2025-03-01", "Quarterly cohorts; rolling intake",
+"Up to $2.5M"). ``parse_dates(series)`` and ``parse_money(series)`` parse
+each distinct string once: values already in the process-wide memo table
+are looked up, and only new ones go through the column parsers below. The
+tables keep the most recently used ``MEMO_SIZE`` strings.
+
+Dates try the common export formats (``%m/%d/%Y``, ``%Y-%m-%d``) with one
+vectorized call each before falling back to pandas' mixed-format parser.
+Dates a nanosecond timestamp cannot hold (typos such as year 2925) come
+back blank. Money understands ``$1,500``, ``250k``, ``2.5 million`` and
+similar; text without an amount is ``NaN``.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+MEMO_SIZE = 65536
+
+_MONEY_PATTERN = r"(\d[\d,]*(?:\.\d+)?)\s*(thousand|million|billion|bn|mm|[kmb])?\b"
+_MONEY_UNITS = {"t": 1e3, "k": 1e3, "m": 1e6, "b": 1e9}
+_DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d")
+
+
+class ParseMemo:
+    """Parsed values keyed on the raw string, least recently used dropped first."""
+
+    def __init__(self, maxsize: int = MEMO_SIZE) -> None:
+        self.maxsize = maxsize
+        self._values: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self.hits = self.misses = 0
+
+    def lookup(self, keys: List[str]) -> Tuple[List[Any], List[int]]:
+        """Return the memoized value per key (``None`` if absent) and the positions to parse."""
+        found: List[Any] = [None] * len(keys)
+        missing: List[int] = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._values:
+                    self._values.move_to_end(key)
+                    found[i] = self._values[key]
+                else:
+                    missing.append(i)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, items: Dict[str, Any]) -> None:
+        with self._lock:
+            self._values.update(items)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+
+DATE_MEMO = ParseMemo()
+MONEY_MEMO = ParseMemo()
+
+
+def _parse_unique(values: pd.Series, memo: ParseMemo, parse: Callable[[pd.Series], pd.Series], dtype: str) -> pd.Series:
+    """Map ``values`` through ``parse``, parsing only distinct strings not in ``memo``."""
+    import numpy as np
+    import pandas as pd
+
+    text = values.astype("string")
+    codes, uniques = pd.factorize(text)
+    keys = [str(k) for k in uniques]
+    found, missing = memo.lookup(keys)
+    if missing:
+        parsed = parse(pd.Series([keys[i] for i in missing], dtype="string")).to_numpy()
+        for i, value in zip(missing, parsed):
+            found[i] = value
+        memo.store({keys[i]: value for i, value in zip(missing, parsed)})
+    blank = np.datetime64("NaT", "ns") if dtype.startswith("datetime") else np.nan
+    table = np.asarray(found + [blank], dtype=dtype)  # codes of -1 (missing cells) pick the blank
+    return pd.Series(table[codes], index=values.index, dtype=dtype)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Parse a column of date strings to ``datetime64[ns]`` (``NaT`` where unparseable)."""
+    return _parse_unique(values, DATE_MEMO, _parse_date_strings, "datetime64[ns]")
+
+
+def parse_money(values: pd.Series) -> pd.Series:
+    """Parse money strings such as ``"$1,500"`` or ``"Up to $2.5M"`` to float dollars (``NaN`` if none)."""
+    return _parse_unique(values, MONEY_MEMO, _parse_money_strings, "float64")
+
+
+def _parse_date_strings(values: pd.Series) -> pd.Series:
+    import pandas as pd
+
+    text = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    todo = text.notna() & (text != "")
+    for fmt in _DATE_FORMATS:
+        if not todo.any():
+            break
+        parsed[todo] = _in_ns_range(pd.to_datetime(text[todo], format=fmt, errors="coerce"))
+        todo &= parsed.isna()
+    if todo.any():
+        parsed[todo] = _in_ns_range(pd.to_datetime(text[todo], format="mixed", errors="coerce"))
+    return parsed
+
+
+def _in_ns_range(values: pd.Series) -> pd.Series:
+    """Blank out dates (typos such as year 2925) that nanosecond timestamps cannot hold."""
+    import pandas as pd
+
+    return values.where(values.between(pd.Timestamp.min, pd.Timestamp.max)).astype("datetime64[ns]")
+
+
+def _parse_money_strings(values: pd.Series) -> pd.Series:
+    import pandas as pd
+
+    parts = values.astype("string").str.extract(_MONEY_PATTERN, flags=re.IGNORECASE)
+    amount = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    scale = parts[1].str.lower().str[0].map(_MONEY_UNITS).astype("Float64").fillna(1.0)
+    return (amount.astype("Float64") * scale).astype(float)
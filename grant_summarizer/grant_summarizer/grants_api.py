@@ -1,37 +1,34 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 import logging
-import ssl
-import certifi
-from urllib.request import urlopen, Request
-from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+try:  # pooled keep-alive client shared with search_grants.py (http_client.py at the repo root)
+    from http_client import default_client
+except ImportError:  # package installed on its own
+    default_client = None
 
 API_URL = "https://www.grants.gov/grantsws/rest/opportunities/search"
 
 
+def _get(url: str, timeout: float) -> Optional[str]:
+    """Return the body of a ``GET`` to ``url``, or ``None`` (logged) on a non-200 reply."""
+    if default_client is None:
+        with urlopen(url, timeout=timeout) as resp:
+            return resp.read().decode("utf-8")
+    resp = default_client().request("GET", url, headers={"Accept": "application/json"}, timeout=timeout)
+    if resp.status != 200:
+        logging.error("Search API returned %s: %s", resp.status, resp.text()[:200])
+        return None
+    return resp.text()
+
+
 def search_grants(keyword: str, limit: int = 10) -> List[Dict]:
     """Search the grants.gov API for opportunities matching ``keyword``."""
     # The API uses the singular "keyword" query parameter.
     params = urlencode({"keyword": keyword, "limit": limit})
-    with urlopen(f"{API_URL}?{params}", timeout=10) as resp:
-        data = json.load(resp)
-    return data.get("opportunities", [])
-    payload = {"keywords": keyword, "limit": limit}
-    data = json.dumps(payload).encode("utf-8")
-    req = Request(API_URL, data=data, headers={"Content-Type": "application/json"}, method="POST")
-    context = ssl.create_default_context(cafile=certifi.where())
-    try:
-        with urlopen(req, timeout=10, context=context) as resp:
-            text = resp.read().decode("utf-8")
-            status = getattr(resp, "status", 200)
-            if status != 200:
-                logging.error("Search API returned %s: %s", status, text[:200])
-                return []
-    except HTTPError as err:
-        body = err.read().decode("utf-8", errors="replace")
-        logging.error("Search API request failed with %s: %s", err.code, body[:200])
-        return []
-    except URLError as err:
-        logging.error("Search API request failed: %s", err)
+    text = _get(f"{API_URL}?{params}", timeout=10)
+    if text is None:
         return []
     return json.loads(text).get("opportunities", [])
@@ -1,5 +1,77 @@
 import sys
 import pathlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
 
 # Add package root to sys.path for tests
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Hands every request to ``server.route`` and sends back what it returns."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        req = SimpleNamespace(
+            method=self.command,
+            path=self.path,
+            headers=self.headers,
+            body=self.rfile.read(length) if length else b"",
+            peer=self.client_address,
+            handler=self,
+        )
+        with server.lock:
+            server.requests.append(req)
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            status, body, headers = server.route(req)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Start local HTTP servers: ``stub_server(route)`` returns one, with its base ``url``.
+
+    ``route(req)`` gets the request (``method``, ``path``, ``headers``,
+    ``body``, ``peer`` and the ``handler``) and returns ``(status, body,
+    headers)``. Each server records its ``requests`` and the
+    ``peak_in_flight`` number of requests handled at once.
+    """
+    servers = []
+
+    def start(route):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        httpd.daemon_threads = True
+        httpd.route = route
+        httpd.requests = []
+        httpd.in_flight = httpd.peak_in_flight = 0
+        httpd.lock = threading.Lock()
+        httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+        threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(httpd)
+        return httpd
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,56 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure scripts/ is on the import path to load bench_wrangle.py
+sys.path.append(str(Path(__file__).resolve().parents[2] / "scripts"))
+
+from bench_wrangle import compare, generate_corpus, main, run_benchmark
+
+
+def test_generate_corpus_is_heterogeneous_and_reproducible(tmp_path):
+    paths = generate_corpus(tmp_path / "a", files=12, rows=20, tsv_ratio=0.5, seed=1)
+    again = generate_corpus(tmp_path / "b", files=12, rows=20, tsv_ratio=0.5, seed=1)
+    assert [p.read_bytes() for p in paths] == [p.read_bytes() for p in again]
+
+    assert {p.suffix for p in paths} == {".csv", ".tsv"}
+    header_lines = {p.read_text().splitlines()[0] for p in paths}
+    assert any("\t" in h for h in header_lines) and any("," in h for h in header_lines)
+    assert len({h.replace("\t", ",") for h in header_lines}) > 1
+
+
+def test_run_benchmark_and_compare(tmp_path):
+    generate_corpus(tmp_path, files=3, rows=50)
+    result = run_benchmark(tmp_path, pipelines=["tuples"], repeat=1)
+    stages = [s["stage"] for s in result["pipelines"]["tuples"]]
+    assert stages == ["read_table", "union_headers", "project_rows", "dedup", "write"]
+    assert result["pipelines"]["tuples"][0]["rows"] == 150
+
+    result["corpus"] = {"files": 3}
+    slower = {"corpus": {"files": 3}, "pipelines": {"tuples": [dict(s) for s in result["pipelines"]["tuples"]]}}
+    for s in slower["pipelines"]["tuples"]:
+        s["seconds"] *= 2
+    assert compare(result, result) == []
+    assert any("seconds" in line for line in compare(slower, result))
+
+
+def test_regressed_run_does_not_replace_the_baseline(tmp_path, capsys):
+    base = tmp_path / "wrangle.json"
+    argv = ["--files", "2", "--rows", "20", "--pipelines", "tuples", "--repeat", "1", "--save", str(base)]
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 0
+    saved = json.loads(base.read_text())
+    assert all(s["rss_growth_mb"] is not None and s["rss_growth_mb"] >= 0 for s in saved["pipelines"]["tuples"])
+
+    # A baseline no run can match: every stage took no time at all.
+    for s in saved["pipelines"]["tuples"]:
+        s["seconds"] = 1e-9
+    base.write_text(json.dumps(saved))
+    with pytest.raises(SystemExit) as exc:
+        main([*argv, "--baseline", str(base)])
+    assert exc.value.code == 1
+    assert "Not saving" in capsys.readouterr().out
+    assert json.loads(base.read_text()) == saved
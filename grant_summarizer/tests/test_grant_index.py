@@ -0,0 +1,79 @@
+import datetime as dt
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path to load grant_index.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from grant_index import GrantIndex
+
+HEADERS = ["Grant Name", "Sponsor", "Status", "Deadline", "Award max", "Relevance", "EQORE Fit", "Ease of Use"]
+ROWS = [
+    ("Solar", "Department of Energy", "posted", "08/20/2025", "$2M", "5", "4", "3"),
+    ("Wind", "department of energy ", "posted", "2025-08-05", "500k", "2", "2", "2"),
+    ("Grid", "Department of Energy", "closed", "08/10/2025", "$1,000,000", "5", "5", "5"),
+    ("Rolling", "Department of Energy", "forecasted", "", "", "4", "4", "4"),
+    ("Later", "Department of Energy", "posted", "12/31/2025", "$750,000", "5", "5", "5"),
+    ("Arts", "National Endowment for the Arts", "posted", "08/15/2025", "$20,000", "5", "5", "5"),
+    ("Past", "Department of Energy", "posted", "01/01/2025", "$3M", "5", "5", "5"),
+]
+TODAY = dt.date(2025, 8, 1)
+
+
+def _names(index, ids):
+    return [index.rows[i][0] for i in ids]
+
+
+def test_query_combines_hash_range_and_sort():
+    index = GrantIndex(HEADERS, ROWS)
+    ids = index.query(sponsor=["Department of Energy"], open_only=True, within_days=30, today=TODAY)
+    assert _names(index, ids) == ["Solar", "Wind"]
+
+    assert _names(index, index.query(sponsor=["department of energy"], open_only=True, today=TODAY)) == [
+        "Later",
+        "Solar",
+        "Rolling",
+        "Wind",
+    ]
+    assert _names(index, index.query(sort="deadline", status=["posted"], today=TODAY)) == [
+        "Past",
+        "Wind",
+        "Arts",
+        "Solar",
+        "Later",
+    ]
+    assert _names(index, index.query(award_min=700_000, award_max=2_000_000, sort="award")) == [
+        "Later",
+        "Grid",
+        "Solar",
+    ]
+    assert _names(index, index.query(deadline_after=dt.date(2025, 8, 10), deadline_before=dt.date(2025, 8, 15))) == [
+        "Grid",
+        "Arts",
+    ]
+    assert len(index.query(sponsor=["DOE"])) == 0
+    with pytest.raises(ValueError):
+        index.query(sort="name")
+
+
+def test_records_project_and_blank_to_none():
+    index = GrantIndex(HEADERS, ROWS)
+    assert index.records([3], ["Grant Name", "Deadline"]) == [{"Grant Name": "Rolling", "Deadline": None}]
+
+
+def test_open_only_still_drops_past_deadlines_inside_a_range():
+    index = GrantIndex(HEADERS, ROWS)
+    ids = index.query(open_only=True, deadline_before=dt.date(2099, 1, 1), sort="deadline", today=TODAY)
+    assert _names(index, ids) == ["Wind", "Arts", "Solar", "Later"]
+    ids = index.query(open_only=True, deadline_after=dt.date(2024, 1, 1), sort="deadline", today=TODAY)
+    assert "Past" not in _names(index, ids) and "Rolling" not in _names(index, ids)
+
+
+def test_weighted_score_is_used_only_where_given():
+    headers = HEADERS + ["Weighted Score"]
+    rows = [ROWS[0] + ("9.5",), ROWS[1] + ("",), ROWS[4] + ("",)]
+    index = GrantIndex(headers, rows, weights=(1, 1, 1))
+    assert index.scores.tolist() == [9.5, 6.0, 15.0]
+    assert _names(index, index.query()) == ["Later", "Solar", "Wind"]
@@ -0,0 +1,43 @@
+import math
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure repository root is on the import path to load grant_parsing.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import grant_parsing
+from grant_parsing import ParseMemo, parse_dates, parse_money
+
+
+def test_parse_dates_parses_each_distinct_string_once(monkeypatch):
+    monkeypatch.setattr(grant_parsing, "DATE_MEMO", ParseMemo())
+    values = pd.Series(
+        ["2025-03-01", "03/04/2026", None, "Mar 5, 2026", "rolling", "2925-01-01", "2025-03-01"], index=range(10, 17)
+    )
+
+    parsed = parse_dates(values)
+    assert parsed.dtype == "datetime64[ns]" and list(parsed.index) == list(range(10, 17))
+    assert [d.strftime("%Y-%m-%d") if not pd.isna(d) else None for d in parsed] == [
+        "2025-03-01", "2026-03-04", None, "2026-03-05", None, None, "2025-03-01",
+    ]
+    assert (grant_parsing.DATE_MEMO.hits, grant_parsing.DATE_MEMO.misses) == (0, 5)
+
+    assert parse_dates(values.iloc[::-1]).equals(parsed.iloc[::-1])
+    assert (grant_parsing.DATE_MEMO.hits, grant_parsing.DATE_MEMO.misses) == (5, 5)
+
+
+def test_parse_money_understands_units(monkeypatch):
+    monkeypatch.setattr(grant_parsing, "MONEY_MEMO", ParseMemo())
+    amounts = parse_money(pd.Series(["$1,500", "250k", "Up to $2.5M", "1 billion", "TBD", None, 300])).tolist()
+    assert amounts[:4] == [1500.0, 250000.0, 2500000.0, 1e9]
+    assert math.isnan(amounts[4]) and math.isnan(amounts[5]) and amounts[6] == 300.0
+
+
+def test_memo_drops_least_recently_used():
+    memo = ParseMemo(maxsize=2)
+    memo.store({"a": 1, "b": 2})
+    assert memo.lookup(["a"]) == ([1], [])
+    memo.store({"c": 3})
+    assert memo.lookup(["a", "b", "c"]) == ([1, None, 3], [1])
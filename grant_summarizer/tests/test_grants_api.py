@@ -8,10 +8,31 @@ from grant_summarizer.grants_api import search_grants
 def test_search_grants():
     fake_json = {"opportunities": [{"id": 1, "title": "Test"}]}
     fake_bytes = json.dumps(fake_json).encode("utf-8")
-    with patch("grant_summarizer.grants_api.urlopen", return_value=BytesIO(fake_bytes)) as mock_urlopen:
+    with patch("grant_summarizer.grants_api.default_client", None), patch(
+        "grant_summarizer.grants_api.urlopen", return_value=BytesIO(fake_bytes)
+    ) as mock_urlopen:
         results = search_grants("water", limit=1)
         mock_urlopen.assert_called_once_with(
             "https://www.grants.gov/grantsws/rest/opportunities/search?keyword=water&limit=1",
             timeout=10,
         )
     assert results == fake_json["opportunities"]
+
+
+def test_search_grants_uses_shared_client():
+    calls = []
+
+    class FakeResponse:
+        status = 200
+
+        def text(self):
+            return json.dumps({"opportunities": [{"id": 2}]})
+
+    class FakeClient:
+        def request(self, method, url, headers=None, timeout=None):
+            calls.append((method, url, timeout))
+            return FakeResponse()
+
+    with patch("grant_summarizer.grants_api.default_client", FakeClient):
+        assert search_grants("solar", limit=3) == [{"id": 2}]
+    assert calls == [("GET", "https://www.grants.gov/grantsws/rest/opportunities/search?keyword=solar&limit=3", 10)]
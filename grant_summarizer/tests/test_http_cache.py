@@ -0,0 +1,108 @@
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path to load http_cache.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import search_grants
+from http_cache import CachedClient, CacheMiss, HTTPCache
+from http_client import HTTPClient
+
+
+def _route(req):
+    """Answer with an ETag; a matching ``If-None-Match`` gets ``304``."""
+    if req.headers.get("If-None-Match") == '"v1"':
+        return 304, b"", []
+    body = req.body if req.method == "POST" else json.dumps({"path": req.path, "pad": "x" * 100}).encode()
+    headers = [("Content-Type", "application/json"), ("ETag", '"v1"')]
+    if req.path == "/packed":
+        return 200, gzip.compress(body), headers + [("Content-Encoding", "gzip")]
+    return 200, body, headers
+
+
+@pytest.fixture
+def server(stub_server):
+    return stub_server(_route)
+
+
+def _hits(server):
+    return [(req.method, req.path, req.headers.get("If-None-Match")) for req in server.requests]
+
+
+def test_repeat_requests_come_from_disk(server, tmp_path):
+    path = tmp_path / "http.sqlite"
+    first = CachedClient(HTTPCache(path), HTTPClient())
+    assert first.request("POST", f"{server.url}/search", json_body={"keywords": "water"}).json() == {"keywords": "water"}
+    first.request("POST", f"{server.url}/search", json_body={"keywords": "soil"})
+    first.cache.close()
+
+    again = CachedClient(HTTPCache(path), HTTPClient())  # a new run reading the same file
+    resp = again.request("POST", f"{server.url}/search", json_body={"keywords": "water"})
+    assert resp.status == 200 and resp.json() == {"keywords": "water"}
+    assert resp.headers["ETag"] == '"v1"'
+    assert len(server.requests) == 2 and (again.hits, again.fetched) == (1, 0)
+
+
+def test_stale_entries_are_revalidated(server, tmp_path):
+    cache = HTTPCache(tmp_path / "http.sqlite", ttls=[(f"{server.url}/short", 0.0)], default_ttl=3600)
+    client = CachedClient(cache, HTTPClient())
+    body = client.request("GET", f"{server.url}/short/1").body
+    client.request("GET", f"{server.url}/long/1")
+    assert client.request("GET", f"{server.url}/short/1").body == body
+    client.request("GET", f"{server.url}/long/1")
+    assert _hits(server)[-1] == ("GET", "/short/1", '"v1"')
+    assert (client.fetched, client.revalidated, client.hits) == (2, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    probe = CachedClient(HTTPCache(tmp_path / "probe.sqlite"), HTTPClient())
+    probe.request("GET", f"{server.url}/a")
+    entry_size = probe.cache.stats()["bytes"]
+
+    client = CachedClient(HTTPCache(tmp_path / "http.sqlite", max_bytes=2 * entry_size), HTTPClient())
+    client.request("GET", f"{server.url}/a")
+    time.sleep(0.01)
+    client.request("GET", f"{server.url}/b")
+    time.sleep(0.01)
+    client.request("GET", f"{server.url}/a")  # /b is now the least recently used
+    time.sleep(0.01)
+    client.request("GET", f"{server.url}/c")
+    assert client.cache.stats()["entries"] == 2
+    seen = len(server.requests)
+    client.request("GET", f"{server.url}/a")
+    client.request("GET", f"{server.url}/b")
+    assert [path for _, path, _ in _hits(server)[seen:]] == ["/b"]
+
+
+def test_offline_serves_stale_entries_and_refuses_misses(server, tmp_path):
+    path = tmp_path / "http.sqlite"
+    CachedClient(HTTPCache(path, default_ttl=0.0), HTTPClient()).request("GET", f"{server.url}/a")
+    offline = CachedClient(HTTPCache(path, default_ttl=0.0), HTTPClient(), offline=True)
+    assert offline.request("GET", f"{server.url}/a").json()["path"] == "/a"
+    with pytest.raises(CacheMiss):
+        offline.request("GET", f"{server.url}/b")
+    assert len(server.requests) == 1
+
+
+def test_stored_headers_describe_the_decoded_body(server, tmp_path):
+    path = tmp_path / "http.sqlite"
+    CachedClient(HTTPCache(path), HTTPClient()).request("GET", f"{server.url}/packed")
+    cached = CachedClient(HTTPCache(path), HTTPClient(), offline=True).request("GET", f"{server.url}/packed")
+    assert cached.json()["path"] == "/packed"
+    assert "Content-Encoding" not in cached.headers and "Connection" not in cached.headers
+    assert cached.headers["Content-Length"] == str(len(cached.body))
+
+
+def test_search_grants_offline_reports_misses(tmp_path, caplog):
+    search_grants.use_cache(str(tmp_path / "http.sqlite"), offline=True)
+    try:
+        assert search_grants.search_grants("water", {}) == []
+        assert search_grants.fetch_detail("1") == {}
+    finally:
+        search_grants.use_cache(None)
+    assert "offline mode" in caplog.text
@@ -0,0 +1,83 @@
+import gzip
+import http.client
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path to load http_client.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import http_client
+from http_client import HTTPClient, ssl_context
+
+
+def _route(req):
+    if req.path == "/moved":
+        return 302, b"", [("Location", "/echo?via=redirect")]
+    if req.path == "/packed":
+        return 200, gzip.compress(b'{"packed": true}'), [("Content-Encoding", "gzip")]
+    if req.path == "/drop":
+        # Reply, then close without announcing it: the client's pooled connection goes stale.
+        req.handler.close_connection = True
+        return 200, b"dropped", []
+    if req.method == "POST":
+        return 200, json.dumps({"got": json.loads(req.body), "type": req.headers["Content-Type"]}).encode(), []
+    return 200, json.dumps({"path": req.path, "ua": req.headers["User-Agent"]}).encode(), []
+
+
+@pytest.fixture
+def server(stub_server):
+    return stub_server(_route)
+
+
+def test_reuses_one_keep_alive_connection(server):
+    client = HTTPClient()
+    for i in range(5):
+        resp = client.request("GET", f"{server.url}/echo", params={"i": i})
+        assert resp.status == 200 and resp.json()["path"] == f"/echo?i={i}"
+    assert client.connections_opened == 1
+    assert len({req.peer for req in server.requests}) == 1
+    client.close()
+
+
+def test_posts_json_follows_redirects_and_decompresses(server):
+    client = HTTPClient()
+    assert client.request("POST", f"{server.url}/search", json_body={"q": 1}).json() == {
+        "got": {"q": 1},
+        "type": "application/json",
+    }
+    assert client.request("GET", f"{server.url}/moved").json()["path"] == "/echo?via=redirect"
+    packed = client.request("GET", f"{server.url}/packed")
+    assert packed.json() == {"packed": True}
+    assert "Content-Encoding" not in packed.headers
+    assert packed.headers["Content-Length"] == str(len(packed.body))
+
+
+def test_retries_when_the_server_dropped_an_idle_connection(server):
+    client = HTTPClient()
+    assert client.request("GET", f"{server.url}/drop").text() == "dropped"
+    assert client.request("GET", f"{server.url}/echo").status == 200
+    assert client.connections_opened == 2
+
+
+def test_stale_connection_is_retried_only_for_idempotent_methods(server, monkeypatch):
+    # Pretend the drop goes unnoticed until the request is sent on the dead socket.
+    monkeypatch.setattr(http_client, "_dropped", lambda conn: False)
+    client = HTTPClient()
+    client.request("GET", f"{server.url}/drop")
+    time.sleep(0.1)
+    assert client.request("GET", f"{server.url}/echo").status == 200
+    assert client.connections_opened == 2
+
+    client.request("GET", f"{server.url}/drop")
+    time.sleep(0.1)
+    with pytest.raises((http.client.HTTPException, OSError)):
+        client.request("POST", f"{server.url}/search", json_body={"q": 1})
+    assert client.connections_opened == 2  # no fresh connection: the POST was not sent again
+
+
+def test_ssl_context_is_built_once():
+    assert ssl_context() is ssl_context()
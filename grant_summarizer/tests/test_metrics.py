@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+# Ensure repository root is on the import path to load metrics.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from metrics import Histogram, Registry, instrument, stage
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.observe(value, stage="read")
+    lines = hist.render()
+    assert 't_seconds_bucket{stage="read",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="read",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="read",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="read"} 4' in lines
+    assert 't_seconds_sum{stage="read"} 4.05' in lines
+
+
+def test_instrument_adds_server_timing_and_metrics():
+    app = Flask("timed")
+    instrument(app)
+
+    @app.route("/work")
+    def work():
+        with stage("render"):
+            pass
+        return "done"
+
+    client = app.test_client()
+    resp = client.get("/work")
+    timing = resp.headers["Server-Timing"]
+    assert timing.startswith("render;dur=") and "total;dur=" in timing
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'grants_http_requests_total{app="timed",endpoint="work",method="GET",status="200"} 1' in body
+    assert 'grants_stage_seconds_bucket{stage="render",le="+Inf"}' in body
+
+
+def test_registry_appends_collector_lines():
+    registry = Registry()
+    registry.counter("hits_total", "test").inc(3)
+    registry.collector(lambda: ["extra_gauge 7"])
+    assert registry.render().splitlines()[-2:] == ["hits_total 3", "extra_gauge 7"]
@@ -0,0 +1,150 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure the repository root and scripts/ are on the import path
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from bench_program_scoring import add_program_scores_rowwise, generate_programs, run_benchmark
+from grant_parsing import parse_dates
+from program_scoring import (
+    PROGRAM_INPUTS,
+    PROGRAM_WEIGHTS,
+    FeatureStore,
+    add_program_scores,
+    load_profiles,
+    main,
+    rank_programs,
+    top_programs,
+)
+
+
+def test_scores_match_the_row_by_row_version():
+    df = generate_programs(300, seed=2)
+    assert add_program_scores(df.copy()).equals(add_program_scores_rowwise(df.copy()))
+
+
+def test_scores_known_rows():
+    soon = (pd.Timestamp.today().normalize() + pd.Timedelta(days=73)).strftime("%m/%d/%Y")
+    df = pd.DataFrame(
+        {
+            "Stack Required?": ["Yes", "no", None],
+            "Cadence": ["", "Rolling", ""],
+            "Deadline / Next Cohort": [soon, "", "2001-01-01"],
+            "Relevance": ["5", "4", "n/a"],
+            "Fit": [4, 3, None],
+            "Ease": [3, 2, 1],
+        }
+    )
+    out = add_program_scores(df)
+    assert out["StackAlignment"].tolist() == [1.0, 0.2, 0.2]
+    assert out["CadenceRecency"].tolist() == [0.8, 1.0, 0.0]
+    assert out["Weighted Score"].tolist() == [3.48, 2.62, 0.22]
+
+
+def test_run_benchmark_reports_identical_output():
+    result = run_benchmark(200, repeat=1)
+    assert result["rows"] == 200 and result["identical"]
+
+
+def test_profiles_score_in_one_pass(tmp_path):
+    (tmp_path / "profiles.toml").write_text(
+        "[default]\n"
+        + "".join(f"{f} = {w}\n" for f, w in zip(PROGRAM_INPUTS, PROGRAM_WEIGHTS))
+        + "[easy]\nEase = 1\n"
+    )
+    profiles = load_profiles(tmp_path / "profiles.toml")
+    df = generate_programs(50, seed=4)
+    out = add_program_scores(df, profiles)
+
+    assert (out["Score (default)"] - out["Weighted Score"]).abs().max() <= 0.001
+    ease = pd.to_numeric(out["Ease"], errors="coerce").fillna(0).round(3)
+    assert out["Score (easy)"].tolist() == ease.tolist()
+
+    best = top_programs(out, ["easy"], 3)["easy"]
+    assert out["Score (easy)"].iloc[best].tolist() == sorted(ease, reverse=True)[:3]
+
+
+def test_profiles_reject_unknown_features(tmp_path):
+    (tmp_path / "profiles.json").write_text('{"alice": {"Revelance": 1}}')
+    with pytest.raises(ValueError, match="unknown feature 'Revelance'"):
+        add_program_scores(generate_programs(5), load_profiles(tmp_path / "profiles.json"))
+
+
+def test_feature_store_reparses_only_changed_rows(tmp_path, monkeypatch):
+    df = generate_programs(40, seed=5)
+    store = FeatureStore(tmp_path / "features.npz")
+    expected = add_program_scores(df.copy())
+
+    assert add_program_scores(df.copy(), store=store).equals(expected)
+    assert (store.reused, store.parsed) == (0, 40)
+
+    # A new run (fresh store object, same file) parses nothing.
+    store = FeatureStore(tmp_path / "features.npz")
+    assert add_program_scores(df.copy(), store=store).equals(expected)
+    assert (store.reused, store.parsed) == (40, 0)
+
+    changed = df.copy()
+    changed.loc[3, "Deadline / Next Cohort"] = "Rolling"
+    assert add_program_scores(changed.copy(), store=store).equals(add_program_scores(changed.copy()))
+    assert (store.reused, store.parsed) == (39, 1)
+
+    # Tomorrow only shifts the cadence; no row is parsed again.
+    tomorrow = pd.Timestamp.today() + pd.Timedelta(days=1)
+    scored = add_program_scores(changed.copy(), today=tomorrow, store=store)
+    assert scored.equals(add_program_scores(changed.copy(), today=tomorrow))
+    assert (store.reused, store.parsed) == (40, 0)
+
+
+def test_rank_programs_streams_the_best_rows(tmp_path):
+    df = generate_programs(500, seed=6)
+    df["Stage"] = ["Seed" if i % 3 else "Series A" for i in range(len(df))]
+    df["NonDilutive"] = ["Yes" if i % 2 else "No" for i in range(len(df))]
+    df.to_csv(tmp_path / "programs.csv", index=False)
+    scored = add_program_scores(pd.read_csv(tmp_path / "programs.csv", dtype=str))
+
+    best = rank_programs(tmp_path / "programs.csv", 10, chunksize=64)
+    expected = scored.sort_values("Weighted Score", ascending=False, kind="stable").head(10)
+    assert [r["Row"] - 1 for r in best] == expected.index.tolist()
+    assert [r["Weighted Score"] for r in best] == expected["Weighted Score"].tolist()
+
+    best = rank_programs(tmp_path / "programs.csv", 5, open_only=True, non_dilutive=True, stages=["seed"], chunksize=64)
+    assert len(best) == 5
+    assert all(r["Stage"] == "Seed" and r["NonDilutive"] == "Yes" for r in best)
+    deadlines = parse_dates(pd.Series([r["Deadline / Next Cohort"] for r in best]))
+    today = pd.Timestamp.today().normalize()
+    assert all(
+        pd.isna(d) or d >= today or "rolling" in str(r["Deadline / Next Cohort"]).lower() or r["Cadence"] == "Rolling"
+        for d, r in zip(deadlines, best)
+    )
+
+
+def test_rank_programs_non_dilutive_reads_the_data_csv_answers(tmp_path):
+    header = (Path(__file__).resolve().parents[2] / "data" / "programs.csv").read_text().splitlines()[0]
+    columns = header.split(",")
+    answers = ["No (VC intros; not a grant)", "Yes (cash grant)", "yes", "", "Not yet; yes if funded"]
+    df = pd.DataFrame({c: [""] * len(answers) for c in columns})
+    df["Name"] = [f"P{i}" for i in range(len(answers))]
+    df["Non-dilutive?"] = answers
+    df["Deadline / Next Cohort"] = "Rolling"
+    df.to_csv(tmp_path / "programs.csv", index=False)
+
+    best = rank_programs(tmp_path / "programs.csv", 10, non_dilutive=True)
+    assert [r["Name"] for r in best] == ["P1", "P2"]
+
+
+@pytest.mark.parametrize("flags", [["--rank", "-5"], ["--rank", "0"], ["--rank", "3", "--chunksize", "0"]])
+def test_main_rejects_non_positive_rank_and_chunksize(tmp_path, flags, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([str(tmp_path / "programs.csv"), *flags])
+    assert exc.value.code == 2 and "must be at least 1" in capsys.readouterr().err
+
+
+def test_rank_programs_stage_filter_skips_blank_stages(tmp_path):
+    pd.DataFrame({"Name": ["P0", "P1"], "Stage": ["", "Nano-seed"]}).to_csv(tmp_path / "programs.csv", index=False)
+    # A missing cell must not read as the text "nan".
+    assert [r["Name"] for r in rank_programs(tmp_path / "programs.csv", 5, stages=["nan"])] == ["P1"]
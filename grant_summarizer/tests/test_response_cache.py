@@ -0,0 +1,56 @@
+import gzip
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+# Ensure repository root is on the import path to load response_cache.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from response_cache import ResponseCache
+
+
+def _app(cache, calls):
+    app = Flask(__name__)
+
+    @app.route("/<name>")
+    def page(name):
+        def build():
+            calls.append(name)
+            return name * 2000
+
+        return cache.respond(("page", name), build, mimetype="text/html")
+
+    return app.test_client()
+
+
+def test_serves_gzip_when_accepted_and_renders_once():
+    calls = []
+    client = _app(ResponseCache(), calls)
+
+    packed = client.get("/a", headers={"Accept-Encoding": "gzip, deflate"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert gzip.decompress(packed.data) == b"a" * 2000
+    assert len(packed.data) < 100
+
+    plain = client.get("/a")
+    assert "Content-Encoding" not in plain.headers and plain.data == b"a" * 2000
+    assert client.get("/a", headers={"If-None-Match": plain.headers["ETag"]}).status_code == 304
+    assert calls == ["a"]
+
+
+def test_evicts_least_recently_used_under_byte_budget():
+    calls = []
+    cache = ResponseCache(max_bytes=1000, min_size=10**6)  # bodies stay uncompressed
+    client = _app(cache, calls)
+    assert client.get("/a").data == b"a" * 2000
+    assert len(cache) == 0  # larger than the whole budget: served, never stored
+
+    cache = ResponseCache(max_bytes=2 * 35)  # two compressed bodies
+    client = _app(cache, calls)
+    calls.clear()
+    for name in ["a", "b", "a", "c", "a", "b"]:
+        client.get(f"/{name}", headers={"Accept-Encoding": "gzip"})
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.evictions == 2 and cache.bytes <= cache.max_bytes
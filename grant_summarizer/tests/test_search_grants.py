@@ -1,12 +1,16 @@
+import json
 import logging
 import sys
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 
 # Ensure repository root is on the import path to load search_grants.py
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from search_grants import _get_json, search_grants as do_search, fetch_detail, SEARCH_URL
+import search_grants
+from search_grants import _get_json, build_summary, search_grants as do_search, fetch_detail, SEARCH_URL
 
 
 def test_get_json_adds_params_and_headers():
@@ -16,25 +20,21 @@ def test_get_json_adds_params_and_headers():
     class FakeResponse:
         status = 200
 
-        def read(self):
-            return b"{}"
+        def text(self):
+            return "{}"
 
-        def __enter__(self):
-            return self
+    class FakeClient:
+        def request(self, method, url, headers=None, timeout=None, **kwargs):
+            captured.update(method=method, url=url, headers=headers, timeout=timeout)
+            return FakeResponse()
 
-        def __exit__(self, *args):
-            pass
-
-    def fake_urlopen(req, context=None):
-        captured["req"] = req
-        return FakeResponse()
-
-    with patch("urllib.request.urlopen", fake_urlopen):
+    with patch("search_grants.default_client", FakeClient):
         _get_json(SEARCH_URL, params)
 
-    req = captured["req"]
-    assert req.headers["Accept"] == "application/json"
-    assert req.full_url.endswith("?a=1")
+    assert captured["method"] == "GET"
+    assert captured["headers"]["Accept"] == "application/json"
+    assert captured["url"].endswith("?a=1")
+    assert captured["timeout"] == 30.0
 
 
 def test_search_grants_success():
@@ -61,3 +61,39 @@ def test_fetch_detail_failure(caplog):
             result = fetch_detail("123")
     assert result == {}
     assert "Detail request for 123 failed" in caplog.text
+
+
+def _synopsis_server(stub_server, monkeypatch, wait):
+    """Stub synopsis endpoint at ``/<id>/synopsis``; ``wait(opp_id)`` runs before each reply."""
+
+    def route(req):
+        opp_id = req.path.split("/")[1]
+        wait(opp_id)
+        body = json.dumps({"opportunity": {"awardCeiling": f"{opp_id}000"}}).encode()
+        return 200, body, [("Content-Type", "application/json")]
+
+    server = stub_server(route)
+    monkeypatch.setattr(search_grants, "DETAIL_URL", f"{server.url}/{{id}}/synopsis")
+    return server
+
+
+def test_build_summary_fetches_details_concurrently_in_order(stub_server, monkeypatch):
+    # Every request waits until all 8 are in flight, so a serial fetch would fail rather than run slowly.
+    all_in_flight = threading.Barrier(8, timeout=5)
+    server = _synopsis_server(stub_server, monkeypatch, lambda opp_id: all_in_flight.wait())
+    opps = [{"id": i, "title": f"Grant {i}", "openDate": "01/01/2025", "closeDate": "02/01/2025"} for i in range(1, 9)]
+    opps.append({"id": 3, "title": "Grant 3 again"})
+    summary = build_summary(opps, concurrency=8)
+
+    assert summary["Grant name"].tolist() == [f"Grant {i}" for i in range(1, 9)] + ["Grant 3 again"]
+    assert summary["Award max"].tolist() == [f"{i}000" for i in range(1, 9)] + ["3000"]
+    assert sorted(req.path.split("/")[1] for req in server.requests) == [str(i) for i in range(1, 9)]  # fetched once
+    assert server.peak_in_flight == 8
+
+
+def test_build_summary_times_out_slow_details(stub_server, monkeypatch, caplog):
+    _synopsis_server(stub_server, monkeypatch, lambda opp_id: time.sleep(2 if opp_id.startswith("slow") else 0))
+    with caplog.at_level(logging.ERROR):
+        summary = build_summary([{"id": "slow1"}, {"id": "7"}], concurrency=2, timeout=0.5)
+    assert summary["Award max"].isna().tolist() == [True, False] and summary["Award max"][1] == "7000"
+    assert "Detail request for slow1 failed" in caplog.text
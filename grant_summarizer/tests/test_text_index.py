@@ -0,0 +1,73 @@
+import os
+import sys
+from pathlib import Path
+
+# Ensure repository root is on the import path to load text_index.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import text_index
+from text_index import TextIndex, tokenize
+from wrangle_grants import read_table
+
+
+def _sources(folder):
+    return [(str(p), read_table(str(p))) for p in sorted(folder.glob("*.csv"))]
+
+
+def test_search_ranks_with_bm25_and_updates_incrementally(tmp_path):
+    data = tmp_path / "csvs"
+    data.mkdir()
+    (data / "a.csv").write_text(
+        "Grant Name,Sponsor,Link,Extra notes\n"
+        "Solar Workforce Training,Department of Energy,https://g/1,\n"
+        "Rural Water Systems,Rural Utilities Service,https://g/2,solar pumps\n"
+        "Arts Projects,National Endowment for the Arts,https://g/3,\n"
+    )
+    (data / "b.csv").write_text("Grant name,Sponsor org,Link\nSolar Workforce Training,DOE,https://g/1\n")
+    (data / "empty.csv").write_text("Link,Deadline\nhttps://g/9,01/01/2030\n")
+
+    index = TextIndex(tmp_path / "idx")
+    assert index.update(_sources(data)) == (0, 3)
+    hits = index.search("solar training")
+    assert [h["name"] for h in hits] == ["Solar Workforce Training", "Rural Water Systems"]
+    assert hits[0]["link"] == "https://g/1" and hits[0]["score"] > hits[1]["score"]
+    assert index.search("the grant") == []
+
+    (data / "c.csv").write_text("Grant Name,Sponsor,Link\nHumanities Fellowships,NEH,https://g/4\n")
+    os.remove(data / "b.csv")
+    reloaded = TextIndex(tmp_path / "idx")
+    assert reloaded.docs == 5
+    assert reloaded.update(_sources(data)) == (2, 1)
+    assert [h["name"] for h in reloaded.search("humanities")] == ["Humanities Fellowships"]
+    assert len(list((tmp_path / "idx").glob("seg-*"))) == 3
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize("The Solar Grants Program for K-12 (DE-FOA-0003164)") == ["solar", "12", "de", "foa", "0003164"]
+
+
+def test_build_reads_only_changed_files(tmp_path, monkeypatch):
+    data = tmp_path / "csvs"
+    data.mkdir()
+    (data / "a.csv").write_text("Grant Name,Link\nSolar Training,https://g/1\n")
+    (data / "b.csv").write_text("Grant Name,Link\nWater Systems,https://g/2\n")
+    paths = [str(p) for p in sorted(data.glob("*.csv"))]
+    assert TextIndex(tmp_path / "idx").update_files(paths) == (0, 2)
+
+    read = []
+    monkeypatch.setattr(text_index, "read_table", lambda path, **kw: read.append(path) or read_table(path, **kw))
+    (data / "b.csv").write_text("Grant Name,Link\nWater Systems,https://g/2\nSolar Pumps,https://g/5\n")
+    assert TextIndex(tmp_path / "idx").update_files(paths) == (1, 1)
+    assert read == [str(data / "b.csv")]
+
+
+def test_search_fills_top_past_duplicate_rows(tmp_path):
+    data = tmp_path / "csvs"
+    data.mkdir()
+    # The export repeats one grant more than top * 4 times; the distinct matches rank below it.
+    rows = ["Solar,https://g/1"] * 20 + [f"Solar Energy Fund Round {i},https://g/{i + 10}" for i in range(5)]
+    (data / "a.csv").write_text("Grant Name,Link\n" + "\n".join(rows) + "\n")
+    index = TextIndex(tmp_path / "idx")
+    index.update(_sources(data))
+    hits = index.search("solar", top=3)
+    assert [h["link"] for h in hits] == ["https://g/1", "https://g/10", "https://g/11"]
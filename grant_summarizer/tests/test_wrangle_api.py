@@ -0,0 +1,261 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+# Ensure repository root is on the import path to load wrangle_api.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import wrangle_api
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "data" / "csvs").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wrangle_api, "_cache", {"etag": None, "headers": [], "rows": [], "types": {}, "text": None})
+    monkeypatch.setattr(wrangle_api, "responses", wrangle_api.ResponseCache())
+    monkeypatch.setattr(wrangle_api, "_jobs", OrderedDict())
+    monkeypatch.setattr(wrangle_api, "_inflight", {})
+    monkeypatch.setattr(wrangle_api, "_failed", {})
+    monkeypatch.setattr(wrangle_api, "_index", {"etag": None, "index": None})
+    return wrangle_api.app.test_client()
+
+
+def _settle():
+    """Wait until every queued or running merge has finished."""
+    for job in list(wrangle_api._jobs.values()):
+        job.future.exception(5)
+
+
+def _merged(client, url="/api/wrangle", **kwargs):
+    """GET ``url`` after the merge it triggers has finished."""
+    client.get(url, **kwargs)
+    _settle()
+    return client.get(url, **kwargs)
+
+
+def test_api_wrangle_returns_records(client, tmp_path):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text("Grant name,Link\nAlpha,\n")
+
+    pending = client.get("/api/wrangle")
+    assert pending.status_code == 202 and pending.headers["Location"].startswith("/api/wrangle/jobs/")
+    _settle()
+    resp = client.get("/api/wrangle")
+    assert resp.status_code == 200
+    assert resp.get_json() == [{"Grant name": "Alpha", "Link": None}]
+    assert (tmp_path / "out" / "master.csv").read_text() == "Grant name,Link\nAlpha,\n"
+
+
+def test_api_wrangle_keeps_numeric_columns_numeric(client, tmp_path):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text(
+        "Grant name,Relevance,Award max,Weighted Score,Opp ID\n"
+        "Alpha,5,1500,2.6,DE-FOA-1\n"
+        "Beta,3,,4,17\n"
+    )
+    records = _merged(client).get_json()
+    assert records == [
+        {"Grant name": "Alpha", "Relevance": 5, "Award max": 1500.0, "Weighted Score": 2.6, "Opp ID": "DE-FOA-1"},
+        {"Grant name": "Beta", "Relevance": 3, "Award max": None, "Weighted Score": 4.0, "Opp ID": "17"},
+    ]
+    assert isinstance(records[0]["Relevance"], int) and isinstance(records[1]["Weighted Score"], float)
+    streamed = client.get("/api/wrangle?fields=Relevance,Award max&format=ndjson")
+    assert [json.loads(line) for line in streamed.data.decode().splitlines()] == [
+        {"Relevance": 5, "Award max": 1500.0},
+        {"Relevance": 3, "Award max": None},
+    ]
+
+
+def test_api_wrangle_reports_missing_inputs(client):
+    resp = _merged(client)
+    assert resp.status_code == 400
+    assert "No CSV files found" in resp.get_json()["error"]
+
+
+def test_api_wrangle_caches_by_input_fingerprint(client, tmp_path, monkeypatch):
+    src = tmp_path / "data" / "csvs" / "a.csv"
+    src.write_text("Grant name\nAlpha\n")
+    calls = []
+    real_wrangle = wrangle_api.wrangle
+    monkeypatch.setattr(wrangle_api, "wrangle", lambda *a: calls.append(a) or real_wrangle(*a))
+
+    first = _merged(client)
+    etag = first.headers["ETag"]
+    assert client.get("/api/wrangle").data == first.data
+    revalidated = client.get("/api/wrangle", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+    assert len(calls) == 1
+
+    src.write_text("Grant name\nAlpha\nBeta\n")
+    os.utime(src, ns=(0, 0))
+    # The previous dataset is still current for this client until the new merge is done.
+    stale = client.get("/api/wrangle", headers={"If-None-Match": etag})
+    assert stale.status_code == 304 and stale.headers["X-Wrangle-Job"].startswith("/api/wrangle/jobs/")
+    _settle()
+    changed = client.get("/api/wrangle", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert "X-Wrangle-Job" not in changed.headers
+    assert [r["Grant name"] for r in changed.get_json()] == ["Alpha", "Beta"]
+    assert len(calls) == 2
+
+
+def test_api_wrangle_pages_projects_and_streams(client, tmp_path):
+    rows = "".join(f"G{i},Org {i % 2},\n" for i in range(5))
+    (tmp_path / "data" / "csvs" / "a.csv").write_text("Grant name,Sponsor,Link\n" + rows)
+
+    first = _merged(client, "/api/wrangle?fields=Grant name,Link&limit=2")
+    assert first.get_json() == [{"Grant name": "G0", "Link": None}, {"Grant name": "G1", "Link": None}]
+    cursor = first.headers["X-Next-Cursor"]
+    assert 'rel="next"' in first.headers["Link"]
+
+    second = client.get("/api/wrangle", query_string={"fields": "Grant name", "limit": 2, "cursor": cursor})
+    assert [r["Grant name"] for r in second.get_json()] == ["G2", "G3"]
+    last = client.get("/api/wrangle", query_string={"limit": 2, "cursor": second.headers["X-Next-Cursor"]})
+    assert last.get_json() == [{"Grant name": "G4", "Sponsor": "Org 0", "Link": None}]
+    assert "X-Next-Cursor" not in last.headers
+    assert first.headers["ETag"] != second.headers["ETag"]
+
+    streamed = client.get("/api/wrangle?fields=Sponsor", headers={"Accept": "application/x-ndjson"})
+    assert streamed.mimetype == "application/x-ndjson"
+    assert streamed.data.decode().splitlines() == [f'{{"Sponsor": "Org {i % 2}"}}' for i in range(5)]
+
+    assert client.get("/api/wrangle?fields=Nope").status_code == 400
+    assert client.get("/api/wrangle?limit=0").status_code == 400
+    (tmp_path / "data" / "csvs" / "b.csv").write_text("Grant name\nNew\n")
+    assert _merged(client, "/api/wrangle", query_string={"cursor": cursor}).status_code == 409
+
+
+def test_jobs_coalesce_concurrent_triggers(client, tmp_path, monkeypatch):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text("Grant name\nAlpha\n")
+    release = threading.Event()
+    calls = []
+    real_wrangle = wrangle_api.wrangle
+
+    def slow_wrangle(*args):
+        calls.append(args)
+        release.wait(5)
+        return real_wrangle(*args)
+
+    monkeypatch.setattr(wrangle_api, "wrangle", slow_wrangle)
+
+    first = client.post("/api/wrangle/jobs")
+    second = client.post("/api/wrangle/jobs")
+    assert first.status_code == second.status_code == 202
+    job_id = first.get_json()["id"]
+    assert second.get_json()["id"] == job_id and second.get_json()["coalesced"]
+    assert client.get(f"/api/wrangle/jobs/{job_id}").get_json()["status"] in ("queued", "running")
+    assert client.get(f"/api/wrangle/jobs/{job_id}/result").status_code == 409
+
+    release.set()
+    wrangle_api._jobs[job_id].future.result(5)
+    status = client.get(f"/api/wrangle/jobs/{job_id}").get_json()
+    assert status["status"] == "done" and status["rows"] == 1
+    assert client.get(status["result"]).get_json() == [{"Grant name": "Alpha"}]
+    assert client.post("/api/wrangle/jobs").get_json()["id"] == job_id
+    assert client.get("/api/wrangle").get_json() == [{"Grant name": "Alpha"}]
+    assert len(calls) == 1
+
+
+def test_get_serves_previous_dataset_while_merging(client, tmp_path, monkeypatch):
+    src = tmp_path / "data" / "csvs" / "a.csv"
+    src.write_text("Grant name\nAlpha\n")
+    assert _merged(client).get_json() == [{"Grant name": "Alpha"}]
+
+    release = threading.Event()
+    real_wrangle = wrangle_api.wrangle
+    monkeypatch.setattr(wrangle_api, "wrangle", lambda *a: release.wait(5) and real_wrangle(*a))
+    src.write_text("Grant name\nAlpha\nBeta\n")
+    os.utime(src, ns=(0, 0))
+
+    # The merge is blocked, so these would hang if a request waited for it.
+    stale = client.get("/api/wrangle")
+    assert stale.status_code == 200 and stale.get_json() == [{"Grant name": "Alpha"}]
+    job_url = stale.headers["X-Wrangle-Job"]
+    assert client.get("/api/search?q=alpha").headers["X-Wrangle-Job"] == job_url
+    assert client.get("/api/grants").get_json()["total"] == 1
+    assert client.get(job_url).get_json()["status"] in ("queued", "running")
+
+    release.set()
+    _settle()
+    assert client.get("/api/wrangle").get_json() == [{"Grant name": "Alpha"}, {"Grant name": "Beta"}]
+
+
+def test_current_dataset_is_not_merged_again_after_job_eviction(client, tmp_path, monkeypatch):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text("Grant name\nAlpha\n")
+    job_id = client.post("/api/wrangle/jobs").get_json()["id"]
+    _settle()
+    wrangle_api._jobs.clear()  # as if MAX_JOBS newer jobs had pushed it out
+
+    again = client.post("/api/wrangle/jobs")
+    assert again.status_code == 200 and again.get_json()["id"] == job_id
+    assert client.get(again.headers["Location"]).get_json()["status"] == "done"
+
+
+def test_superseded_job_releases_its_dataset(client, tmp_path):
+    src = tmp_path / "data" / "csvs" / "a.csv"
+    src.write_text("Grant name\nAlpha\n")
+    first = client.post("/api/wrangle/jobs").get_json()["id"]
+    _settle()
+    assert client.get(f"/api/wrangle/jobs/{first}/result").get_json() == [{"Grant name": "Alpha"}]
+
+    src.write_text("Grant name\nAlpha\nBeta\n")
+    os.utime(src, ns=(0, 0))
+    second = client.post("/api/wrangle/jobs").get_json()["id"]
+    _settle()
+    assert wrangle_api._jobs[first].data is None
+    status = client.get(f"/api/wrangle/jobs/{first}").get_json()
+    assert status["superseded"] and "result" not in status and status["rows"] == 1
+    assert client.get(f"/api/wrangle/jobs/{first}/result").status_code == 410
+    assert len(client.get(f"/api/wrangle/jobs/{second}/result").get_json()) == 2
+
+
+def test_failed_job_reports_error(client):
+    job_id = client.post("/api/wrangle/jobs").get_json()["id"]
+    wrangle_api._jobs[job_id].future.exception(5)
+    status = client.get(f"/api/wrangle/jobs/{job_id}").get_json()
+    assert status["status"] == "failed" and "No CSV files found" in status["error"]
+    assert client.get("/api/wrangle/jobs/nope").status_code == 404
+
+
+def test_api_grants_queries_the_index(client, tmp_path):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text(
+        "Grant Name,Sponsor,Status,Deadline,Relevance\n"
+        "Low,DOE,posted,2199-01-01,1\n"
+        "High,DOE,posted,2199-01-02,5\n"
+        "Other,NSF,posted,2199-01-03,5\n"
+        "Closed,DOE,closed,2199-01-04,5\n"
+    )
+    resp = _merged(client, "/api/grants?sponsor=doe&open=1&fields=Grant Name")
+    assert resp.get_json() == {"total": 2, "items": [{"Grant Name": "High"}, {"Grant Name": "Low"}]}
+    resp = client.get("/api/grants?sort=deadline&order=desc&limit=1&fields=Grant Name")
+    assert resp.get_json() == {"total": 4, "items": [{"Grant Name": "Closed"}]}
+    assert client.get("/api/grants?sort=name").status_code == 400
+    assert client.get("/api/grants?within_days=soon").status_code == 400
+
+
+def test_api_search_ranks_matches(client, tmp_path):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text(
+        "Grant Name,Sponsor,Link\nSolar Workforce,DOE,https://g/1\nArts Projects,NEA,https://g/2\n"
+    )
+    resp = _merged(client, "/api/search?q=solar")
+    assert [r["name"] for r in resp.get_json()["results"]] == ["Solar Workforce"]
+    assert (tmp_path / "out" / ".text_index" / "manifest.json").exists()
+    assert client.get("/api/search").status_code == 400
+
+
+def test_metrics_report_pipeline_stages(client, tmp_path):
+    (tmp_path / "data" / "csvs" / "a.csv").write_text("Grant name\nAlpha\n")
+
+    resp = _merged(client)
+    assert "fingerprint;dur=" in resp.headers["Server-Timing"]
+
+    body = client.get("/metrics").get_data(as_text=True)
+    for stage in ("read", "union", "write", "text_index", "render", "gzip"):
+        assert f'grants_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'grants_dataset_cache_total{result="miss"}' in body
+    assert 'grants_response_cache{field="misses"} 1' in body
+    assert 'grants_wrangle_jobs{status="done"} 1' in body
@@ -0,0 +1,280 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure repository root is on the import path to load wrangle_grants.py
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from wrangle_grants import (
+    DedupKey,
+    WrangleError,
+    WrangleOptions,
+    canonical_url,
+    iter_deduped,
+    main as wrangle_main,
+    normalize_rows,
+    project_rows,
+    read_csv,
+    read_dataframe,
+    read_table,
+    score_frame,
+    wrangle,
+)
+
+
+def _write_inputs(folder: Path) -> None:
+    folder.mkdir()
+    (folder / "a.csv").write_text(
+        "Grant name,Link\nAlpha,https://a.example\nBeta,https://b.example\n"
+    )
+    (folder / "b.csv").write_text(
+        "Grant name,Sponsor org,Link\nAlpha again,Org A,https://a.example\nGamma,Org G,https://g.example\n"
+    )
+
+
+def _run(argv):
+    with pytest.raises(SystemExit) as exc:
+        wrangle_main(argv)
+    return exc.value.code
+
+
+@pytest.mark.parametrize("dedup", [[], ["--dedup-key", "Link"]])
+def test_stream_matches_buffered_output(tmp_path, dedup):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    buffered = tmp_path / "buffered.csv"
+    streamed = tmp_path / "streamed.csv"
+
+    assert _run(["--input", str(in_dir), "--out", str(buffered), *dedup]) == 0
+    assert _run(["--input", str(in_dir), "--out", str(streamed), "--stream", *dedup]) == 0
+
+    assert streamed.read_bytes() == buffered.read_bytes()
+    assert streamed.read_text().splitlines()[0] == "Grant name,Link,Sponsor org"
+    assert not (tmp_path / "streamed.csv.tmp").exists()
+
+
+def test_cache_dir_reparses_only_changed_files(tmp_path, capsys):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    cache_dir = tmp_path / "cache"
+    out = tmp_path / "master.csv"
+    argv = ["--input", str(in_dir), "--out", str(out), "--cache-dir", str(cache_dir)]
+
+    assert _run(argv) == 0
+    first = out.read_bytes()
+    assert "0 reused, 2 parsed" in capsys.readouterr().out
+
+    assert _run(argv) == 0
+    assert out.read_bytes() == first
+    assert "2 reused, 0 parsed" in capsys.readouterr().out
+
+    (in_dir / "c.csv").write_text("Grant name,Link\nDelta,https://d.example\n")
+    assert _run(argv) == 0
+    assert "2 reused, 1 parsed" in capsys.readouterr().out
+    assert out.read_text().splitlines()[-1] == "Delta,https://d.example,"
+
+
+@pytest.mark.parametrize("mode", [[], ["--stream"]])
+def test_jobs_output_is_identical_to_serial(tmp_path, mode):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    (in_dir / "c.csv").write_text("Link,Notes\nhttps://g.example,dup\nhttps://n.example,new\n")
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+    common = ["--input", str(in_dir), "--dedup-key", "Link", *mode]
+
+    assert _run([*common, "--out", str(serial)]) == 0
+    assert _run([*common, "--out", str(parallel), "--jobs", "2"]) == 0
+
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_skip_duplicates_reports_exact_and_derived_copies(tmp_path, capsys):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    (in_dir / "a_copy.csv").write_bytes((in_dir / "a.csv").read_bytes())
+    # Same records as b.csv with reordered columns and header casing.
+    (in_dir / "master_b.csv").write_text(
+        "link,GRANT NAME,Sponsor org\nhttps://g.example,Gamma,Org G\n"
+    )
+    out = tmp_path / "master.csv"
+
+    assert _run(["--input", str(in_dir), "--out", str(out), "--skip-duplicates"]) == 0
+    stdout = capsys.readouterr().out
+    assert f"Skipping {in_dir / 'a_copy.csv'}: identical bytes to {in_dir / 'a.csv'}" in stdout
+    assert f"Skipping {in_dir / 'master_b.csv'}: all 1 rows already present" in stdout
+    assert "Skipped 2 duplicate file(s)" in stdout
+    assert len(out.read_text().splitlines()) == 5
+
+
+def test_skip_duplicates_keeps_cache_entries_of_skipped_files(tmp_path, capsys):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    # b.csv re-exported with another column order: same row set, different bytes.
+    (in_dir / "b2.csv").write_text(
+        "link,GRANT NAME,Sponsor org\nhttps://a.example,Alpha again,Org A\nhttps://g.example,Gamma,Org G\n"
+    )
+    cache_dir = tmp_path / "cache"
+    argv = ["--input", str(in_dir), "--out", str(tmp_path / "master.csv"), "--cache-dir", str(cache_dir), "--skip-duplicates"]
+
+    manifests, logs = [], []
+    for _ in range(3):
+        assert _run(argv) == 0
+        logs.append(capsys.readouterr().out)
+        manifests.append(sorted(Path(p).name for p in json.loads((cache_dir / "manifest.json").read_text())["files"]))
+
+    assert manifests == [["a.csv", "b.csv", "b2.csv"]] * 3
+    assert "0 reused, 3 parsed" in logs[0]
+    # Later runs skip b2.csv by its remembered row-set hash, before parsing it.
+    assert all("2 reused, 0 parsed" in log and "Skipping" in log for log in logs[1:])
+
+
+def test_skip_duplicates_reuses_cached_row_fingerprints(tmp_path, monkeypatch):
+    import wrangle_grants
+
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    fingerprinted = []
+    real = wrangle_grants.row_fingerprints
+    monkeypatch.setattr(wrangle_grants, "row_fingerprints", lambda rows: fingerprinted.append(1) or real(rows))
+    options = WrangleOptions(cache_dir=str(tmp_path / "cache"), skip_duplicates=True)
+
+    first = wrangle(in_dir, options)
+    assert len(fingerprinted) == 2
+    again = wrangle(in_dir, options)
+    assert len(fingerprinted) == 2 and again.rows == first.rows
+
+    (in_dir / "a.csv").write_text("Grant name,Link\nAlpha,https://a.example\nDelta,https://d.example\n")
+    assert "Delta" in [row[0] for row in wrangle(in_dir, options).rows]
+    assert len(fingerprinted) == 3
+
+
+def test_columnar_copy_is_preferred_only_while_fresh(tmp_path):
+    pytest.importorskip("pyarrow")
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+    out = tmp_path / "master.csv"
+
+    assert _run(["--input", str(in_dir), "--out", str(out), "--columnar", "feather"]) == 0
+    feather = tmp_path / "master.feather"
+    assert feather.exists()
+    assert list(read_dataframe(out)["Grant name"]) == ["Alpha", "Beta", "Alpha again", "Gamma"]
+
+    # A CSV edited after the columnar copy was written wins.
+    out.write_text("Grant name,Link\nEdited,https://e.example\n")
+    os.utime(feather, ns=(0, 0))
+    assert list(read_dataframe(out)["Grant name"]) == ["Edited"]
+
+
+def test_canonical_url():
+    assert canonical_url(" HTTP://WWW.Grants.gov:443/detail/1/?b=2&a=1#top ") == (
+        "https://www.grants.gov/detail/1?a=1&b=2"
+    )
+    assert canonical_url("") == ""
+
+
+def test_composite_normalized_dedup_key():
+    rows = [
+        {"Opp ID": " DE-FOA-0003164 ", "Opportunity Number": "350952", "Link": "https://a.example/x"},
+        {"Opp ID": "de-foa-0003164", "Opportunity Number": "#350952", "Link": "http://A.example/x/"},
+        {"Opp ID": "de-foa-0003164", "Opportunity Number": "350953", "Link": "https://a.example/y"},
+    ]
+    key = DedupKey("Opp ID:strip+casefold,Opportunity Number:digits")
+    assert key.columns == ["Opp ID", "Opportunity Number"]
+    assert [r["Link"] for r in iter_deduped(rows, key)] == ["https://a.example/x", "https://a.example/y"]
+    assert len(list(iter_deduped(rows, DedupKey("Link", ["url"])))) == 2
+    # Raw keys compare exact strings, as before.
+    assert len(list(iter_deduped(rows, "Opp ID"))) == 2
+    assert DedupKey("Opp ID,Missing").missing(rows[0]) == ["Missing"]
+
+
+def test_sparse_rows_project_like_dict_rows(tmp_path):
+    path = tmp_path / "ragged.csv"
+    # Duplicate header, a short row, a long row and a blank line.
+    path.write_text("A,B,A\n1,2,3\n4\n\n5,6,7,8\n")
+    table = read_table(str(path))
+    assert table.headers == ["A", "B", "A"]
+    assert table.rows == [("1", "2", "3"), ("4",), ("5", "6", "7", "8")]
+
+    headers, dict_rows = read_csv(str(path))
+    union = ["A", "B", "C"]
+    expected = [tuple(r.values()) for r in normalize_rows(dict_rows, union)]
+    assert list(project_rows([table], union)) == expected
+    assert expected == [("3", "2", ""), (None, None, ""), ("7", "6", "")]
+
+
+def test_score_frame_normalizes_and_scores_by_column():
+    df = pd.DataFrame(
+        {
+            "Grant name": ["Late", "Rolling", "Early", "Past"],
+            "Award max": ["$1,500", "Up to $2.5M", "", "250k"],
+            "Deadline": ["12/31/2030", "", "2030-01-15", "01/01/2020"],
+            "App deadline": ["", "", "", ""],
+            "Relevance": ["1", "2", "1", "5"],
+            "EQORE Fit": ["1", "", "1", "5"],
+            "Ease of Use": ["1", "1", "1", "5"],
+        }
+    )
+    today = pd.Timestamp("2030-01-01")
+    out = score_frame(df, (0.5, 0.3, 0.2), cutoff=today, today=today)
+
+    assert list(out["Grant name"]) == ["Rolling", "Early", "Late"]
+    assert list(out["Weighted Score"]) == [1.2, 1.0, 1.0]
+    assert list(out["Deadline"]) == ["", "2030-01-15", "2030-12-31"]
+    assert list(out["_award_max_num"].fillna(-1)) == [2_500_000.0, -1, 1500.0]
+    assert list(out["Days to Deadline"].astype("object").fillna("")) == ["", 14, 364]
+    assert list(out["Expired"].astype("object").fillna("")) == ["", False, False]
+
+
+def test_weights_and_xlsx_outputs(tmp_path, capsys):
+    pytest.importorskip("openpyxl")
+    demo = Path(__file__).resolve().parents[2] / "examples" / "grants_demo"
+    out = tmp_path / "demo.csv"
+    xlsx = tmp_path / "demo.xlsx"
+
+    assert _run(
+        ["--input", str(demo), "--out", str(out), "--xlsx", str(xlsx), "--weights", "0.4", "0.4", "0.2", "--print-summary"]
+    ) == 0
+
+    scored = pd.read_csv(out)
+    assert list(scored["Grant name"]) == ["Alpha Research Grant", "Beta Community Grant"]
+    assert list(scored["Weighted Score"]) == [0.82, 0.62]
+    assert pd.read_excel(xlsx).shape == scored.shape
+    assert "SUMMARY: 2 grant(s)" in capsys.readouterr().out
+
+
+def test_wrangle_returns_merged_table_without_writing(tmp_path, capsys):
+    in_dir = tmp_path / "in"
+    _write_inputs(in_dir)
+
+    result = wrangle(in_dir, WrangleOptions(dedup_key="Link"))
+    assert result.headers == ["Grant name", "Link", "Sponsor org"]
+    assert result.rows == [
+        ("Alpha", "https://a.example", ""),
+        ("Beta", "https://b.example", ""),
+        ("Gamma", "https://g.example", "Org G"),
+    ]
+    assert result.stats["rows_read"] == 4 and len(result) == 3
+    assert result.records()[0]["Sponsor org"] is None
+    assert list(result.to_frame()["Grant name"]) == ["Alpha", "Beta", "Gamma"]
+    assert capsys.readouterr().out == ""
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in"]
+
+    out = tmp_path / "master.csv"
+    assert result.write_csv(out) == 3
+    assert _run(["--input", str(in_dir), "--out", str(tmp_path / "cli.csv"), "--dedup-key", "Link"]) == 0
+    assert out.read_bytes() == (tmp_path / "cli.csv").read_bytes()
+
+
+def test_wrangle_raises_instead_of_exiting(tmp_path):
+    with pytest.raises(WrangleError) as exc:
+        wrangle(tmp_path)
+    assert exc.value.exit_code == 2
+
+    (tmp_path / "empty.csv").write_text("")
+    with pytest.raises(WrangleError, match="headerless"):
+        wrangle(tmp_path, WrangleOptions(strict=True))
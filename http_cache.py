@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Persistent HTTP response cache in SQLite, in front of ``http_client.HTTPClient``.
+
+``CachedClient(cache).request(...)`` has the same signature as
+``HTTPClient.request``. Successful (``200``) replies are stored under a hash
+of the method, URL and body, and served from disk until their TTL runs out.
+The TTL comes from the first ``(url prefix, seconds)`` rule that matches. A
+stale entry with an ``ETag`` or ``Last-Modified`` is revalidated with
+``If-None-Match``/``If-Modified-Since``. A ``304`` renews it without
+downloading the body again. Once the stored bodies exceed ``max_bytes``, the
+least recently used entries are deleted.
+
+With ``offline=True`` nothing goes to the network. Stored entries are served
+even when stale, and a URL that was never cached raises ``CacheMiss``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import io
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from http_client import HTTPClient, Response, default_client
+
+DEFAULT_MAX_BYTES = 256 << 20
+DEFAULT_TTL = 3600.0
+# Headers about the connection or the transfer, not the stored body.
+HOP_BY_HOP = frozenset(
+    ("connection", "keep-alive", "transfer-encoding", "content-encoding", "te", "trailer", "upgrade", "proxy-connection")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers BLOB NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires REAL NOT NULL,
+    used REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+"""
+
+
+class CacheMiss(OSError):
+    """Raised in offline mode for a request that has no stored response."""
+
+
+def cache_key(method: str, url: str, body: Optional[bytes]) -> str:
+    digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+    digest.update(body or b"")
+    return digest.hexdigest()
+
+
+def _parse_headers(raw: bytes) -> http.client.HTTPMessage:
+    return http.client.parse_headers(io.BytesIO(raw + b"\r\n"))
+
+
+class HTTPCache:
+    """Stored responses in the SQLite file at ``path``, at most ``max_bytes`` of bodies."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Sequence[Tuple[str, float]] = (),
+        default_ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = list(ttls)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def ttl(self, url: str) -> float:
+        """Seconds a reply from ``url`` stays fresh."""
+        return next((seconds for prefix, seconds in self.ttls if url.startswith(prefix)), self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body, etag, last_modified, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+        names = ("url", "status", "headers", "body", "etag", "last_modified", "expires")
+        return dict(zip(names, row))
+
+    def put(self, key: str, url: str, resp: Response) -> None:
+        """Store ``resp`` to the request for ``url`` (fresh for ``ttl(url)``) and evict down to ``max_bytes``."""
+        raw_headers = "".join(
+            f"{k}: {v}\r\n" for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP
+        ).encode("latin-1", "replace")
+        size = len(resp.body) + len(raw_headers)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    resp.status,
+                    raw_headers,
+                    resp.body,
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                    now + self.ttl(url),
+                    now,
+                    size,
+                ),
+            )
+            self._evict()
+
+    def renew(self, key: str, url: str) -> None:
+        """Mark a revalidated (``304``) entry fresh again."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET expires = ?, used = ? WHERE key = ?", (now + self.ttl(url), now, key))
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachedClient:
+    """``HTTPClient.request`` answered from ``cache`` when possible.
+
+    ``hits`` counts replies served from disk without a request, ``revalidated``
+    the ``304`` renewals, and ``fetched`` full downloads.
+    """
+
+    def __init__(self, cache: HTTPCache, client: Optional[HTTPClient] = None, offline: bool = False) -> None:
+        self.cache = cache
+        self.client = client
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        data: Optional[bytes] = None,
+        json_body: Any = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Response:
+        """Return the stored reply for this request if fresh, else fetch (or revalidate) and store it."""
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urllib.parse.urlencode(params)}"
+        sent = dict(headers or {})
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            sent.setdefault("Content-Type", "application/json")
+        key = cache_key(method, url, data)
+
+        entry = self.cache.get(key)
+        if entry is not None and (self.offline or entry["expires"] > time.time()):
+            self._count("hits")
+            return Response(entry["url"], entry["status"], _parse_headers(entry["headers"]), entry["body"])
+        if self.offline:
+            raise CacheMiss(f"{method} {url} is not in the cache (offline mode)")
+
+        if entry is not None:
+            if entry["etag"]:
+                sent["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                sent["If-Modified-Since"] = entry["last_modified"]
+        resp = (self.client or default_client()).request(method, url, data=data, headers=sent, timeout=timeout)
+        if resp.status == 304 and entry is not None:
+            self._count("revalidated")
+            self.cache.renew(key, url)
+            return Response(entry["url"], entry["status"], _parse_headers(entry["headers"]), entry["body"])
+        self._count("fetched")
+        if resp.status == 200 and "no-store" not in resp.headers.get("Cache-Control", ""):
+            self.cache.put(key, url, resp)
+        return resp
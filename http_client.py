@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Shared HTTP client with keep-alive connection pools and one cached SSL context.
+
+``urllib.request.urlopen`` opens a new TCP connection, performs a TLS
+handshake and (with ``certifi``) re-reads the CA bundle on every call.
+``HTTPClient`` keeps idle connections per ``(scheme, host, port)`` and reuses
+them, and every HTTPS connection shares the context from ``ssl_context()``,
+which is built once per process. The client is thread-safe: a connection is
+used by one request at a time and returned to its pool afterwards. Idle
+connections the server has closed are discarded before use, and a request
+that still hits a stale connection is retried once only if its method is
+idempotent.
+
+``default_client()`` returns the process-wide instance used by
+``search_grants.py`` and ``grant_summarizer.grants_api``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import http.client
+import json
+import select
+import ssl
+import threading
+import urllib.parse
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+DEFAULT_TIMEOUT = 30.0
+MAX_REDIRECTS = 5
+USER_AGENT = "grant-manager-tool/0.1"
+
+# Errors after which a reused keep-alive connection is retried once on a fresh one.
+_STALE = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.CannotSendRequest)
+# Only these are safe to send twice: the server may have acted on the first attempt.
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+PoolKey = Tuple[str, str, int]
+
+
+@lru_cache(maxsize=1)
+def ssl_context() -> ssl.SSLContext:
+    """The verified client context, using certifi's CA bundle when it is installed."""
+    try:
+        import certifi
+    except ImportError:  # pragma: no cover - certifi is in requirements.txt
+        return ssl.create_default_context()
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class Response:
+    """A fully read response."""
+
+    def __init__(self, url: str, status: int, headers: http.client.HTTPMessage, body: bytes) -> None:
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self) -> str:
+        charset = self.headers.get_content_charset() or "utf-8"
+        return self.body.decode(charset, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.text())
+
+
+def _exchange(
+    conn: http.client.HTTPConnection, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]
+) -> Tuple[http.client.HTTPResponse, bytes]:
+    conn.request(method, target, body=body, headers=headers)
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def _dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle connection was closed by the server (its socket reads as EOF)."""
+    if conn.sock is None:
+        return True
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class HTTPClient:
+    """Keep-alive connection pools, at most ``pool_size`` idle connections per host."""
+
+    def __init__(self, pool_size: int = 16, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: Dict[PoolKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _connect(
+        self, key: PoolKey, timeout: float, fresh: bool = False
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection for ``key`` (reused=True), or a new one if none or ``fresh``."""
+        with self._lock:
+            idle = self._idle.get(key) if not fresh else None
+            while idle:
+                conn = idle.pop()
+                if _dropped(conn):
+                    conn.close()
+                    continue
+                conn.sock.settimeout(timeout)
+                return conn, True
+            self.connections_opened += 1
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl_context()), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key: PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float
+    ) -> Response:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme}")
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        conn, reused = self._connect(key, timeout)
+        try:
+            resp, data = _exchange(conn, method, target, body, headers)
+        except _STALE:
+            conn.close()
+            if not reused or method not in IDEMPOTENT:
+                raise
+            # The server dropped the idle connection; retry once on a new one.
+            conn, _ = self._connect(key, timeout, fresh=True)
+            try:
+                resp, data = _exchange(conn, method, target, body, headers)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        headers = resp.msg
+        if headers.get("Content-Encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+            # Describe the body actually returned, not the bytes on the wire.
+            del headers["Content-Encoding"]
+            del headers["Content-Length"]
+            headers["Content-Length"] = str(len(data))
+        return Response(url, resp.status, headers, data)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        data: Optional[bytes] = None,
+        json_body: Any = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Response:
+        """Send a request and return the (decompressed) response; redirects are followed.
+
+        Raises ``OSError`` (including ``socket.timeout`` and ``ssl.SSLError``)
+        or ``http.client.HTTPException`` when the request cannot be completed;
+        HTTP error statuses are returned, not raised.
+        """
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urllib.parse.urlencode(params)}"
+        sent = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **(headers or {})}
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            sent.setdefault("Content-Type", "application/json")
+        timeout = self.timeout if timeout is None else timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self._send(method, url, data, sent, timeout)
+            location = resp.headers.get("Location")
+            if resp.status not in (301, 302, 303, 307, 308) or not location:
+                return resp
+            url = urllib.parse.urljoin(url, location)
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, data = "GET", None
+                sent.pop("Content-Type", None)
+        return resp
+
+
+_default: Optional[HTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HTTPClient:
+    """The shared process-wide client."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HTTPClient()
+        return _default
@@ -0,0 +1,185 @@
+"""Request and pipeline-stage metrics for the Flask apps, in Prometheus text format.
+
+``instrument(app)`` counts requests and their latency by endpoint and
+status, adds a ``Server-Timing`` header to every response and serves
+``/metrics``. ``stage(name)`` times a block: the duration goes into the
+``grants_stage_seconds`` histogram and, inside a request, into that
+request's ``Server-Timing`` header. Apps can expose their own gauges (cache
+sizes, hit counts) by registering a collector on ``REGISTRY``.
+
+There is no dependency on ``prometheus_client``; only counters and
+histograms are needed.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    """Observed values bucketed per label set (cumulative buckets, sum and count)."""
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            counts[i] += 1
+            counts[-1] += value
+
+    def count(self, **labels: str) -> int:
+        counts = self._values.get(tuple(str(labels[n]) for n in self.labelnames))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts in sorted(self._values.items()):
+            running = 0.0
+            bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+            for bound, n in zip(bounds, counts):
+                running += n
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_num(running)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {counts[-1]:.6g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_num(running)}")
+        return lines
+
+
+class Registry:
+    """Metrics plus collector callbacks that return extra exposition lines."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labelnames))  # type: ignore[return-value]
+
+    def collector(self, fn: Callable[[], List[str]]) -> Callable[[], List[str]]:
+        self.collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        for fn in self.collectors:
+            lines.extend(fn())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("grants_stage_seconds", "Time spent in each pipeline or request stage", ["stage"])
+ROWS = REGISTRY.counter("grants_rows_total", "Rows processed, by stage", ["stage"])
+REQUESTS = REGISTRY.counter("grants_http_requests_total", "HTTP requests", ["app", "endpoint", "method", "status"])
+REQUEST_SECONDS = REGISTRY.histogram("grants_http_request_seconds", "HTTP request latency", ["app", "endpoint"])
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Record ``seconds`` for stage ``name`` (and add it to Server-Timing inside a request)."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    if has_request_context():
+        g.setdefault("server_timing", []).append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def gauge_lines(name: str, help: str, values: Dict[str, float], label: str = "") -> List[str]:
+    """Format ``values`` as a gauge; keys become ``label`` values (or the bare name if no label)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        lines.append(f"{name}{_labels([label], [key]) if label else ''} {_num(value)}")
+    return lines
+
+
+def instrument(app: Flask) -> None:
+    """Add request metrics, ``Server-Timing`` headers and a ``/metrics`` endpoint to ``app``."""
+
+    @app.before_request
+    def _start_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record(resp: Response) -> Response:
+        started = g.pop("request_started", None)
+        if started is None:
+            return resp
+        total = time.perf_counter() - started
+        endpoint = request.endpoint or "unmatched"
+        REQUESTS.inc(app=app.name, endpoint=endpoint, method=request.method, status=str(resp.status_code))
+        REQUEST_SECONDS.observe(total, app=app.name, endpoint=endpoint)
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in g.get("server_timing", [])]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        resp.headers["Server-Timing"] = ", ".join(parts)
+        return resp
+
+    @app.route("/metrics")
+    def metrics() -> Response:
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -8,73 +8,398 @@ Weighted Score using:
 CadenceRecency is 1.0 for rolling opportunities, otherwise
 normalized by days until the next cohort (within a year).
 StackAlignment is 1.0 when the required stack is used, else 0.2.
+
+With ``--profiles FILE`` the same five features are also scored against
+every weight profile in a JSON or TOML file, one ``Score (<profile>)``
+column per profile. Each profile maps feature names to weights, like the
+per-user profiles in ``USER_PROFILES``; features a profile leaves out get
+weight 0:
+
+  {"alice": {"Relevance": 0.5, "Fit": 0.5}, "bob": {"Ease": 1}}
+
+``--features FILE`` keeps each row's parsed inputs (scores, stack flag,
+deadline day, rolling flag) keyed by a hash of its raw cells. Rescoring the
+next day is then a subtraction over the stored deadline days, and only rows
+that were added or edited are parsed again.
+
+``--rank K`` streams a large file in chunks and keeps only a heap of the K
+best rows, with optional --open/--non-dilutive/--stage filters.
 """
 
 from __future__ import annotations
 
 import argparse
-from datetime import datetime
+import hashlib
+import heapq
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
 
+from grant_parsing import parse_dates
+from wrangle_grants import read_dataframe
+
+
+# Score inputs and their weights, in the order they are summed.
+PROGRAM_INPUTS = ("Relevance", "Fit", "Ease", "StackAlignment", "CadenceRecency")
+PROGRAM_WEIGHTS = (0.3, 0.3, 0.2, 0.1, 0.1)
+# What row_features() keeps per row, and the columns it reads.
+ROW_FEATURES = ("Relevance", "Fit", "Ease", "StackAlignment", "DeadlineDay", "Rolling")
+RAW_COLUMNS = ("Relevance", "Fit", "Ease", "Stack Required?", "Cadence", "Deadline / Next Cohort")
+# data/programs.csv spells it "Non-dilutive?"; the flat examples/programs.csv export uses "NonDilutive".
+NON_DILUTIVE_COLUMNS = ("Non-dilutive?", "NonDilutive")
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    """``column`` as strings, blank where the cell or the whole column is missing."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].fillna("").astype(str)
+
+
+def _round3(values: np.ndarray) -> np.ndarray:
+    # Python's round() is correctly rounded (np.round can differ on halves); scores
+    # repeat a lot, so only the distinct values go through it.
+    distinct, inverse = np.unique(values, return_inverse=True)
+    return np.array([round(v, 3) for v in distinct.tolist()], dtype=float)[inverse.reshape(-1)]
+
+
+def row_features(df: pd.DataFrame) -> np.ndarray:
+    """Return the date-independent ``ROW_FEATURES`` of each row as a ``len(df)`` × 6 matrix.
+
+    Deadlines are stored as days since 1970-01-01 (``NaN`` when they do not
+    parse) so that a new day only needs a subtraction.
+    """
+    # Stack alignment: assume "yes" means we already use the required stack
+    stack_required = _text(df, "Stack Required?").str.lower()
+    stack_alignment = np.where(stack_required.str.contains("yes", regex=False), 1.0, 0.2)
+
+    # Cadence / recency
+    deadline_str = _text(df, "Deadline / Next Cohort")
+    cadence_str = _text(df, "Cadence").str.lower()
+    rolling = deadline_str.str.lower().str.contains("rolling", regex=False) | cadence_str.str.contains(
+        "rolling", regex=False
+    )
+    days = parse_dates(deadline_str).to_numpy(dtype="datetime64[D]")
+    deadline_day = np.where(np.isnat(days), np.nan, days.astype("int64").astype(float))
+
+    features = [
+        pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+        if col in df.columns
+        else np.zeros(len(df))
+        for col in PROGRAM_INPUTS[:3]
+    ]
+    return np.column_stack(features + [stack_alignment, deadline_day, rolling.to_numpy(dtype=float)])
+
+
+def program_features(
+    df: pd.DataFrame, today: Optional[pd.Timestamp] = None, store: Optional[FeatureStore] = None
+) -> np.ndarray:
+    """Return the ``len(df)`` × 5 matrix of ``PROGRAM_INPUTS`` (missing scores count as 0).
+
+    With a ``store``, per-row features are reused for rows it has seen before.
+    """
+    rows = store.features(df) if store is not None else row_features(df)
+    return _with_cadence(rows, _day(today))
+
+
+def _day(today: Optional[pd.Timestamp] = None) -> int:
+    """``today`` (default: the current date) as days since 1970-01-01."""
+    return ((today or pd.Timestamp.today()).normalize() - pd.Timestamp(0)).days
+
+
+def _with_cadence(rows: np.ndarray, today: int) -> np.ndarray:
+    """Turn ``row_features`` into ``PROGRAM_INPUTS``, scoring cadence against day number ``today``."""
+    days = rows[:, 4] - today
+    with np.errstate(invalid="ignore"):
+        upcoming = days >= 0
+    cad_rec = np.where(rows[:, 5] > 0, 1.0, np.where(upcoming, 1 - np.minimum(days, 365) / 365, 0.0))
+    return np.column_stack([rows[:, :4], cad_rec])
+
+
+class FeatureStore:
+    """Per-row features persisted in an ``.npz`` file, keyed by a hash of each row's inputs.
+
+    ``features(df)`` only parses rows whose ``RAW_COLUMNS`` changed since the
+    last call (or run); when the whole input hashes the same, nothing is
+    parsed. ``reused`` and ``parsed`` count rows from the last call.
+    """
+
+    VERSION = 1
 
-def add_program_scores(df: pd.DataFrame) -> pd.DataFrame:
-    """Compute stack/cadence scores and Weighted Score for program rows."""
-    today = pd.Timestamp.today().normalize()
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.reused = 0
+        self.parsed = 0
 
-    stack_align = []
-    cadence_recency = []
-    scores = []
+    def _load(self) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(self.path) as data:
+                if int(data["version"]) != self.VERSION:
+                    return None
+                return {key: data[key] for key in ("input_hash", "hashes", "features")}
+        except (OSError, KeyError, ValueError):
+            return None
 
-    for _, row in df.iterrows():
-        # Stack alignment: assume "yes" means we already use the required stack
-        stack_required = str(row.get("Stack Required?", "")).lower()
-        stack_alignment = 1.0 if "yes" in stack_required else 0.2
+    def _save(self, input_hash: str, hashes: np.ndarray, features: np.ndarray) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, version=self.VERSION, input_hash=input_hash, hashes=hashes, features=features)
+        os.replace(tmp, self.path)
 
-        # Cadence / recency
-        deadline_str = str(row.get("Deadline / Next Cohort", ""))
-        cadence_str = str(row.get("Cadence", "")).lower()
-        if "rolling" in deadline_str.lower() or "rolling" in cadence_str:
-            cad_rec = 1.0
+    def features(self, df: pd.DataFrame) -> np.ndarray:
+        """Return ``row_features(df)``, re-parsing only rows not seen before."""
+        raw = df.reindex(columns=list(RAW_COLUMNS)).astype("string")
+        hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+        input_hash = hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+        old = self._load()
+        if old is not None and str(old["input_hash"]) == input_hash:
+            self.reused, self.parsed = len(df), 0
+            return old["features"]
+
+        out = np.empty((len(df), len(ROW_FEATURES)))
+        todo = np.ones(len(df), dtype=bool)
+        if old is not None and len(old["hashes"]):
+            order = np.argsort(old["hashes"], kind="stable")
+            known = old["hashes"][order]
+            pos = np.minimum(np.searchsorted(known, hashes), len(known) - 1)
+            match = known[pos] == hashes
+            out[match] = old["features"][order[pos[match]]]
+            todo = ~match
+        if todo.any():
+            out[todo] = row_features(df.iloc[np.flatnonzero(todo)])
+        self.reused, self.parsed = int(len(df) - todo.sum()), int(todo.sum())
+        self._save(input_hash, hashes, out)
+        return out
+
+
+def load_profiles(path: str | Path) -> Dict[str, Dict[str, float]]:
+    """Read weight profiles from a ``.json`` or ``.toml`` file: ``{name: {feature: weight}}``."""
+    path = Path(path)
+    if path.suffix.lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+        raise ValueError(f"{path}: expected a table of profiles, each mapping features to weights")
+    return data
+
+
+def profile_matrix(profiles: Mapping[str, Mapping[str, float]]) -> Tuple[List[str], np.ndarray]:
+    """Return profile names and their K × 5 weight matrix in ``PROGRAM_INPUTS`` order."""
+    names = list(profiles)
+    matrix = np.zeros((len(names), len(PROGRAM_INPUTS)))
+    for k, name in enumerate(names):
+        for feature, weight in profiles[name].items():
+            if feature not in PROGRAM_INPUTS:
+                raise ValueError(f"Profile '{name}': unknown feature '{feature}' (use {', '.join(PROGRAM_INPUTS)})")
+            matrix[k, PROGRAM_INPUTS.index(feature)] = float(weight)
+    return names, matrix
+
+
+def add_program_scores(
+    df: pd.DataFrame,
+    profiles: Optional[Mapping[str, Mapping[str, float]]] = None,
+    today: Optional[pd.Timestamp] = None,
+    store: Optional[FeatureStore] = None,
+) -> pd.DataFrame:
+    """Compute stack/cadence scores and Weighted Score for program rows.
+
+    ``profiles`` adds a ``Score (<name>)`` column per profile; all of them
+    come from a single product of the feature matrix with the weight matrix.
+    ``store`` keeps per-row features between runs (see ``FeatureStore``).
+    """
+    features = program_features(df, today=today, store=store)
+    # Summed term by term, in the original order, so scores do not shift in the last bit.
+    score = sum(w * features[:, i] for i, w in enumerate(PROGRAM_WEIGHTS))
+
+    df["StackAlignment"] = _round3(features[:, 3])
+    df["CadenceRecency"] = _round3(features[:, 4])
+    df["Weighted Score"] = _round3(np.asarray(score, dtype=float))
+    if profiles:
+        names, matrix = profile_matrix(profiles)
+        scores = features @ matrix.T
+        for k, name in enumerate(names):
+            df[f"Score ({name})"] = _round3(scores[:, k])
+    return df
+
+
+def top_programs(df: pd.DataFrame, names: Sequence[str], n: int) -> Dict[str, List[int]]:
+    """Return, per profile, the row positions of its ``n`` best-scoring programs."""
+    scores = df[[f"Score ({name})" for name in names]].to_numpy(dtype=float)
+    # Stable sort on the negated scores: ties keep row order.
+    order = np.argsort(-scores, axis=0, kind="stable")[:n]
+    return {name: order[:, k].tolist() for k, name in enumerate(names)}
+
+
+def _is_yes(values: pd.Series) -> np.ndarray:
+    """Answers such as "Yes (cash grant)", "yes", "true" or "1"; "No (VC intros; not a grant)" is not yes."""
+    text = values.fillna("").astype(str).str.strip().str.lower()
+    return (text.str.startswith("yes") | text.isin(("y", "true", "1"))).to_numpy(dtype=bool)
+
+
+def rank_programs(
+    path: str | Path,
+    k: int,
+    weights: Optional[Sequence[float]] = None,
+    score_column: str = "Weighted Score",
+    open_only: bool = False,
+    non_dilutive: bool = False,
+    stages: Sequence[str] = (),
+    chunksize: int = 50_000,
+    today: Optional[pd.Timestamp] = None,
+) -> List[Dict[str, Any]]:
+    """Return the ``k`` best programs in the CSV at ``path``, best first, in one streaming pass.
+
+    The file is read ``chunksize`` rows at a time and only a heap of the
+    ``k`` best rows seen so far is kept, so memory does not grow with the
+    file. Rows are scored with ``weights`` over ``PROGRAM_INPUTS`` (default
+    ``PROGRAM_WEIGHTS``) and returned as dicts of their cells plus
+    ``score_column`` and ``Row`` (1-based). Ties keep file order. Filters:
+
+    * ``open_only``: rolling, undated, or the deadline is today or later;
+    * ``non_dilutive``: ``Non-dilutive?`` (or ``NonDilutive``) starts with yes, or is true/1;
+    * ``stages``: ``Stage`` contains any of these (ignoring case).
+    """
+    today_day = _day(today)
+    heap: List[Tuple[float, int, Dict[str, Any]]] = []
+    offset = 0
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        rows = row_features(chunk)
+        features = _with_cadence(rows, today_day)
+        if weights is None:
+            score = _round3(sum(w * features[:, i] for i, w in enumerate(PROGRAM_WEIGHTS)))
         else:
-            deadline = pd.to_datetime(deadline_str, errors="coerce")
-            if pd.isna(deadline):
-                cad_rec = 0.0
+            score = _round3(features @ np.asarray(weights, dtype=float))
+
+        keep = np.ones(len(chunk), dtype=bool)
+        if open_only:
+            with np.errstate(invalid="ignore"):
+                keep &= (rows[:, 5] > 0) | np.isnan(rows[:, 4]) | (rows[:, 4] >= today_day)
+        if non_dilutive:
+            column = next((c for c in NON_DILUTIVE_COLUMNS if c in chunk.columns), None)
+            keep &= _is_yes(chunk[column]) if column is not None else False
+        if stages:
+            stage = _text(chunk, "Stage").str.lower()
+            keep &= np.logical_or.reduce([stage.str.contains(s.lower(), regex=False).to_numpy() for s in stages])
+
+        # Only this chunk's own top k can make it into the heap.
+        ids = np.flatnonzero(keep)
+        ids = ids[np.lexsort((ids, -score[ids]))[:k]]
+        for i in ids.tolist():
+            key = (float(score[i]), -(offset + i + 1))
+            if len(heap) == k and key <= heap[0][:2]:
+                continue
+            record = {**chunk.iloc[i].to_dict(), score_column: key[0], "Row": offset + i + 1}
+            if len(heap) < k:
+                heapq.heappush(heap, (*key, record))
             else:
-                days = (deadline - today).days
-                if days < 0:
-                    cad_rec = 0.0
-                else:
-                    cad_rec = max(0.0, 1 - min(days, 365) / 365)
-
-        r = pd.to_numeric(row.get("Relevance", 0), errors="coerce") or 0
-        f = pd.to_numeric(row.get("Fit", 0), errors="coerce") or 0
-        e = pd.to_numeric(row.get("Ease", 0), errors="coerce") or 0
-        score = 0.3 * r + 0.3 * f + 0.2 * e + 0.1 * stack_alignment + 0.1 * cad_rec
-
-        stack_align.append(round(stack_alignment, 3))
-        cadence_recency.append(round(cad_rec, 3))
-        scores.append(round(score, 3))
-
-    df["StackAlignment"] = stack_align
-    df["CadenceRecency"] = cadence_recency
-    df["Weighted Score"] = scores
-    return df
+                heapq.heapreplace(heap, (*key, record))
+        offset += len(chunk)
+    return [record for _, _, record in sorted(heap, key=lambda item: item[:2], reverse=True)]
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Score program opportunities")
     parser.add_argument("csv", help="Path to programs.csv")
     parser.add_argument("--out", help="Optional output CSV path")
-    args = parser.parse_args()
+    parser.add_argument("--profiles", help="JSON or TOML file of weight profiles; adds a score column per profile")
+    parser.add_argument("--top", type=int, default=0, help="With --profiles, print each profile's N best programs")
+    parser.add_argument(
+        "--features", help="Keep per-row features in this .npz file and only re-parse rows that changed"
+    )
+    rank = parser.add_argument_group("streaming top-K (one pass, memory bounded by K)")
+    rank.add_argument("--rank", type=int, metavar="K", help="Print (or --out) only the K best programs")
+    rank.add_argument("--profile", help="Rank by this profile from --profiles instead of the default weights")
+    rank.add_argument("--open", action="store_true", help="Only rolling, undated or not-yet-passed deadlines")
+    rank.add_argument("--non-dilutive", action="store_true", help="Only programs whose Non-dilutive? answer is yes")
+    rank.add_argument("--stage", action="append", default=[], help="Only programs whose Stage contains this (repeatable)")
+    rank.add_argument("--chunksize", type=int, default=50_000, help="Rows read at a time (default: 50000)")
+    args = parser.parse_args(argv)
+    if args.top and not args.profiles:
+        parser.error("--top requires --profiles")
+    if args.profile and not args.profiles:
+        parser.error("--profile requires --profiles")
+    if (args.open or args.non_dilutive or args.stage or args.profile) and not args.rank:
+        parser.error("--profile, --open, --non-dilutive and --stage only apply with --rank")
+    if args.rank and (args.top or args.features):
+        parser.error("--rank cannot be combined with --top or --features")
+    if args.rank is not None and args.rank < 1:
+        parser.error("--rank must be at least 1")
+    if args.chunksize < 1:
+        parser.error("--chunksize must be at least 1")
+
+    profiles = None
+    if args.profiles:
+        try:
+            profiles = load_profiles(args.profiles)
+            profile_matrix(profiles)
+        except ImportError as e:
+            print(f"ERROR: Reading TOML profiles on Python < 3.11 requires tomli ({e})")
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not load profiles: {e}")
+            sys.exit(1)
+
+    if args.rank:
+        weights, column = None, "Weighted Score"
+        if args.profile:
+            if args.profile not in profiles:
+                print(f"ERROR: No profile '{args.profile}' in {args.profiles}")
+                sys.exit(1)
+            names, matrix = profile_matrix(profiles)
+            weights, column = matrix[names.index(args.profile)], f"Score ({args.profile})"
+        best = rank_programs(
+            args.csv,
+            args.rank,
+            weights=weights,
+            score_column=column,
+            open_only=args.open,
+            non_dilutive=args.non_dilutive,
+            stages=args.stage,
+            chunksize=args.chunksize,
+        )
+        if args.out:
+            pd.DataFrame.from_records(best).to_csv(args.out, index=False)
+            print(f"OK: Wrote {len(best)} program(s) → {args.out}")
+        else:
+            for n, record in enumerate(best, 1):
+                title = record.get("Program") or record.get("Name") or f"row {record['Row']}"
+                print(f"{n:3d}. {record[column]:.3f}  {title}")
+            if not best:
+                print("No matching programs.")
+        sys.exit(0)
 
-    df = pd.read_csv(args.csv)
-    df_scored = add_program_scores(df)
+    df = read_dataframe(args.csv)
+    store = FeatureStore(args.features) if args.features else None
+    df_scored = add_program_scores(df, profiles, store=store)
+    if store is not None:
+        print(f"INFO: Features {args.features}: {store.reused} reused, {store.parsed} parsed")
 
     if args.out:
         df_scored.to_csv(args.out, index=False)
-    else:
+    elif not args.top:
         print(df_scored)
 
+    if args.top:
+        label = next((c for c in ("Program", "Name") if c in df_scored.columns), None)
+        for name, rows in top_programs(df_scored, list(profiles), args.top).items():
+            print(f"{name}:")
+            for rank, i in enumerate(rows, 1):
+                title = df_scored[label].iat[i] if label else f"row {i + 1}"
+                print(f"  {rank:2d}. {df_scored[f'Score ({name})'].iat[i]:.3f}  {title}")
+    sys.exit(0)
+
 
 if __name__ == "__main__":
     main()
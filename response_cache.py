@@ -0,0 +1,122 @@
+"""Pre-serialized, gzip-compressed response cache shared by the Flask apps.
+
+Views hand ``ResponseCache.respond`` a key that includes the dataset version
+and the query, plus a callable that renders the body. The first request
+renders and compresses once; later requests with the same key are served
+from memory. Bodies are kept gzip-compressed (``compresslevel`` 6, fixed
+mtime) and sent as-is to clients that accept gzip; other clients get them
+decompressed on the fly. Least-recently-used entries are evicted once the
+stored bytes exceed ``max_bytes``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from flask import Response, request
+
+from metrics import stage
+
+Body = Union[str, bytes]
+
+
+class ResponseCache:
+    """An LRU cache of encoded response bodies under a byte budget."""
+
+    def __init__(self, max_bytes: int = 64 << 20, min_size: int = 1024, compresslevel: int = 6) -> None:
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.compresslevel = compresslevel
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, bool, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _store(self, key: Hashable, entry: Tuple[bytes, bool, str, str]) -> None:
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted[0])
+                self.evictions += 1
+
+    def _encode(self, body: Body) -> Tuple[bytes, bool]:
+        raw = body.encode("utf-8") if isinstance(body, str) else body
+        if len(raw) < self.min_size:
+            return raw, False
+        packed = gzip.compress(raw, compresslevel=self.compresslevel, mtime=0)
+        if len(packed) >= len(raw):
+            return raw, False
+        return packed, True
+
+    def respond(
+        self,
+        key: Hashable,
+        build: Callable[[], Body],
+        mimetype: str = "application/json",
+        etag: Optional[str] = None,
+    ) -> Response:
+        """Return a response for ``key``, rendering it with ``build`` on a miss.
+
+        ``key`` must change whenever the rendered body would (dataset version,
+        path, query). The ``ETag`` defaults to a hash of ``key``; a matching
+        ``If-None-Match`` gets an empty ``304``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            with stage("render"):
+                body = build()
+            with stage("gzip"):
+                data, compressed = self._encode(body)
+            tag = etag or hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+            entry = (data, compressed, mimetype, tag)
+            self._store(key, entry)
+        data, compressed, mimetype, tag = entry
+
+        if request.if_none_match.contains(tag):
+            resp = Response(status=304)
+        elif compressed and request.accept_encodings.quality("gzip") > 0:
+            resp = Response(data, mimetype=mimetype)
+            resp.headers["Content-Encoding"] = "gzip"
+        else:
+            resp = Response(gzip.decompress(data) if compressed else data, mimetype=mimetype)
+        resp.set_etag(tag)
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+bench_program_scoring.py — Time program_scoring.add_program_scores against the old row loop.
+
+Usage:
+  python scripts/bench_program_scoring.py --rows 100000
+  python scripts/bench_program_scoring.py --rows 20000 --repeat 5 --json
+
+The synthetic programs table mixes "yes"/"no"/blank stack answers, rolling
+and dated cohorts in several date formats, past deadlines, unparseable text
+and non-numeric scores. Both implementations score a copy of the same frame
+and the script exits 1 if their output differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from program_scoring import add_program_scores  # noqa: E402
+
+STACK_ANSWERS = ["Yes", "yes - Python", "No", "", "Maybe", "YES"]
+CADENCES = ["Rolling", "Annual", "Quarterly", "", "Twice a year"]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%B %d, %Y", "%b %d %Y"]
+
+
+def generate_programs(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Return a programs table with ``rows`` rows, shaped like programs.csv."""
+    rng = random.Random(seed)
+    today = pd.Timestamp.today().normalize()
+    data: Dict[str, List[Any]] = {c: [] for c in ("Program", "Stack Required?", "Cadence", "Deadline / Next Cohort")}
+    for c in ("Relevance", "Fit", "Ease"):
+        data[c] = []
+    for i in range(rows):
+        data["Program"].append(f"Accelerator {i}")
+        data["Stack Required?"].append(rng.choice(STACK_ANSWERS))
+        data["Cadence"].append(rng.choice(CADENCES))
+        kind = rng.random()
+        if kind < 0.15:
+            deadline = "Rolling admissions"
+        elif kind < 0.2:
+            deadline = rng.choice(["", "TBD", "Spring cohort"])
+        else:
+            day = today + pd.Timedelta(days=rng.randint(-200, 500))
+            deadline = day.strftime(rng.choice(DATE_FORMATS))
+        data["Deadline / Next Cohort"].append(deadline)
+        for c in ("Relevance", "Fit", "Ease"):
+            data[c].append(rng.choice(["1", "2", "3", "4", "5", "4.5", "", "n/a"]))
+    return pd.DataFrame(data)
+
+
+def add_program_scores_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """The original ``iterrows`` implementation, kept as the reference."""
+    today = pd.Timestamp.today().normalize()
+    stack_align, cadence_recency, scores = [], [], []
+    for _, row in df.iterrows():
+        stack_required = str(row.get("Stack Required?", "")).lower()
+        stack_alignment = 1.0 if "yes" in stack_required else 0.2
+        deadline_str = str(row.get("Deadline / Next Cohort", ""))
+        cadence_str = str(row.get("Cadence", "")).lower()
+        if "rolling" in deadline_str.lower() or "rolling" in cadence_str:
+            cad_rec = 1.0
+        else:
+            deadline = pd.to_datetime(deadline_str, errors="coerce")
+            if pd.isna(deadline):
+                cad_rec = 0.0
+            else:
+                days = (deadline - today).days
+                cad_rec = 0.0 if days < 0 else max(0.0, 1 - min(days, 365) / 365)
+        # The old loop let NaN through (``nan or 0`` is nan); 0 is what it meant.
+        r, f, e = (pd.to_numeric(row.get(c, 0), errors="coerce") for c in ("Relevance", "Fit", "Ease"))
+        r, f, e = (0 if pd.isna(v) else v for v in (r, f, e))
+        score = 0.3 * r + 0.3 * f + 0.2 * e + 0.1 * stack_alignment + 0.1 * cad_rec
+        stack_align.append(round(stack_alignment, 3))
+        cadence_recency.append(round(cad_rec, 3))
+        scores.append(round(score, 3))
+    df["StackAlignment"] = stack_align
+    df["CadenceRecency"] = cadence_recency
+    df["Weighted Score"] = scores
+    return df
+
+
+def _best(fn, df: pd.DataFrame, repeat: int) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        out = fn(frame)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def run_benchmark(rows: int, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Time both implementations on ``rows`` synthetic programs."""
+    df = generate_programs(rows, seed)
+    rowwise, expected = _best(add_program_scores_rowwise, df, 1)
+    vectorized, actual = _best(add_program_scores, df, repeat)
+    return {
+        "rows": rows,
+        "rowwise_seconds": round(rowwise, 4),
+        "vectorized_seconds": round(vectorized, 4),
+        "speedup": round(rowwise / vectorized, 1) if vectorized else None,
+        "identical": bool(actual.equals(expected)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark add_program_scores against the row-by-row version")
+    ap.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic table (default: 100000)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs of the vectorized version; the best is kept")
+    ap.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    ap.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = ap.parse_args(argv)
+
+    result = run_benchmark(args.rows, repeat=args.repeat, seed=args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"INFO: {result['rows']} rows")
+        print(f"INFO: row-by-row  {result['rowwise_seconds']:.3f}s")
+        print(f"INFO: vectorized  {result['vectorized_seconds']:.3f}s ({result['speedup']}x)")
+    if not result["identical"]:
+        print("ERROR: vectorized scores differ from the row-by-row scores")
+        sys.exit(1)
+    print("OK: Outputs are identical")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
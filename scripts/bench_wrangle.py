@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+bench_wrangle.py — Benchmark the wrangle_grants merge pipeline on a synthetic corpus.
+
+Usage:
+  python scripts/bench_wrangle.py --files 50 --rows 2000
+  python scripts/bench_wrangle.py --files 200 --rows 500 --tsv 0.4 --save out/bench/wrangle.json
+  python scripts/bench_wrangle.py --baseline out/bench/wrangle.json --threshold 1.25
+  python scripts/bench_wrangle.py --generate-only --corpus /tmp/corpus --files 20 --rows 100
+
+The corpus mimics data/csvs: several header layouts with mixed casing
+("Grant name"/"Grant Name"), comma and tab separated files (including tab
+content saved as .csv), blank lines, short rows and links shared between
+exports. Each pipeline runs in a fresh interpreter so its peak RSS is not
+inflated by earlier runs; stages within a pipeline are timed separately.
+
+The process peak RSS only ever grows, so ``peak_rss_mb`` is the peak so far
+(cumulative over the pipeline) and ``rss_growth_mb`` is how much a stage
+raised it; regressions in memory are judged on the growth. With both
+``--baseline`` and ``--save``, results are only saved when nothing regressed,
+so a slow run never becomes the next baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Header layouts seen in data/csvs, from search exports to hand-scored sheets.
+HEADER_LAYOUTS = [
+    ["Grant Name", "Sponsor", "Link", "Open Date", "Deadline", "Status"],
+    ["Grant Name", "Sponsor", "Link", "Opp ID", "Opportunity Number", "Open Date", "Deadline", "Status"],
+    [
+        "Grant Name", "Sponsor", "Link", "Opp ID", "Opportunity Number", "Open Date", "Deadline", "Status",
+        "Award max", "Award min", "Match %", "Funding Instrument", "Categories", "Eligibility", "Synopsis snippet",
+    ],
+    [
+        "Grant name", "Sponsor org", "Link", "Award max", "RFP", "Innovation/execution",
+        "Latest preparation start date", "App deadline", "Partners notes", "Match req %",
+        "Timeline summary", "App process", "App package", "Extra notes",
+    ],
+    [
+        "Grant Name", "Sponsor", "Link", "Deadline", "Relevance", "EQORE Fit", "Ease of Use", "Match %",
+        "Award max", "RFP", "Innovation/execution", "Latest preparation start date", "Partners notes",
+        "Timeline summary", "App process", "App package", "Extra notes", "Award min", "Funding Instrument",
+    ],
+]
+
+WORDS = (
+    "Community Energy Research Rural Water Clean Innovation Health Workforce Training Arts "
+    "Humanities Climate Resilience Small Business Infrastructure Digital Equity Youth Housing"
+).split()
+SPONSORS = [
+    "National Endowment for the Humanities",
+    "Department of Energy",
+    "Rural Utilities Service",
+    "National Science Foundation",
+    "Economic Development Administration",
+    "Environmental Protection Agency",
+]
+
+
+def _cell(column: str, rng: random.Random, opp: int) -> str:
+    if column.startswith("Grant"):
+        return " ".join(rng.sample(WORDS, 3)) + " Grants"
+    if column.startswith("Sponsor"):
+        return rng.choice(SPONSORS)
+    if column == "Link":
+        return f"https://www.grants.gov/search-results-detail/{opp}"
+    if column == "Opp ID":
+        return f"DE-FOA-{opp % 10_000_000:07d}"
+    if column == "Opportunity Number":
+        return str(opp)
+    if "date" in column.lower() or "deadline" in column.lower():
+        if rng.random() < 0.15:
+            return ""
+        return f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2023, 2027)}"
+    if column == "Status":
+        return rng.choice(["posted", "forecasted", "closed"])
+    if column.startswith("Award"):
+        return rng.choice(["", f"${rng.randint(1, 500) * 5000:,}", f"{rng.randint(1, 9)}M", "Up to $250k"])
+    if column in ("Relevance", "EQORE Fit", "Ease of Use"):
+        return str(rng.randint(1, 5))
+    if "%" in column:
+        return f"{rng.choice([0, 10, 20, 25, 50])}%"
+    return rng.choice(["", "See NOFO", "Letters of support required", " ".join(rng.sample(WORDS, 6))])
+
+
+def generate_corpus(
+    folder: str | Path,
+    files: int,
+    rows: int,
+    tsv_ratio: float = 0.25,
+    overlap: float = 0.3,
+    seed: int = 0,
+) -> List[Path]:
+    """Write ``files`` synthetic grant exports of ``rows`` rows each into ``folder``.
+
+    About ``tsv_ratio`` of the files are tab separated (half named ``.tsv``,
+    half tab content in a ``.csv`` as in data/csvs) and about ``overlap`` of
+    the rows reuse an opportunity from an earlier file, so de-duplication on
+    ``Link`` has real work to do.
+    """
+    rng = random.Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    seen: List[int] = []
+    paths: List[Path] = []
+    for i in range(files):
+        headers = list(rng.choice(HEADER_LAYOUTS))
+        tab = rng.random() < tsv_ratio
+        suffix = ".tsv" if tab and i % 2 else ".csv"
+        path = folder / f"grants_raw_{i:04d}{suffix}"
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter="\t" if tab else ",")
+            w.writerow(headers)
+            for _ in range(rows):
+                if seen and rng.random() < overlap:
+                    opp = rng.choice(seen)
+                else:
+                    opp = rng.randint(300_000, 9_999_999)
+                    seen.append(opp)
+                row = [_cell(c, rng, opp) for c in headers]
+                if rng.random() < 0.01:
+                    row = row[: rng.randint(1, len(row))]
+                w.writerow(row)
+                if rng.random() < 0.005:
+                    f.write("\r\n")
+        paths.append(path)
+    return paths
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+MIN_RSS_GROWTH_MB = 2.0  # smaller changes in a stage's RSS growth are noise
+
+
+def _run_pipeline(name: str, corpus: str, out_dir: str) -> List[Dict[str, Any]]:
+    """Run one pipeline in this process; return per-stage timings."""
+    import glob
+
+    import wrangle_grants as wg
+
+    # Every export is read with the default comma delimiter, as the wrangler
+    # does, so tab separated files arrive as one wide column.
+    files = sorted(glob.glob(os.path.join(corpus, "*.csv")) + glob.glob(os.path.join(corpus, "*.tsv")))
+    stages: List[Dict[str, Any]] = []
+    state: Dict[str, Any] = {}
+
+    def stage(label: str, fn: Callable[[], Any], rows: Callable[[], int]) -> None:
+        before = _peak_rss_mb()
+        start = time.perf_counter()
+        state[label] = fn()
+        seconds = time.perf_counter() - start
+        peak = _peak_rss_mb()
+        n = rows()
+        stages.append(
+            {
+                "stage": label,
+                "seconds": round(seconds, 4),
+                "rows": n,
+                "rows_per_sec": round(n / seconds) if seconds else None,
+                "peak_rss_mb": peak,
+                "rss_growth_mb": round(peak - before, 1) if peak is not None and before is not None else None,
+            }
+        )
+
+    out_file = os.path.join(out_dir, f"{name}.csv")
+    if name == "dicts":
+        # The original row-dict path: read_csv, normalize_rows, dedup on dicts.
+        stage("read_csv", lambda: [wg.read_csv(fp) for fp in files], lambda: sum(len(r) for _, r in state["read_csv"]))
+        total = stages[-1]["rows"]
+        stage("union_headers", lambda: wg.union_headers([h for h, _ in state["read_csv"]]), lambda: total)
+        stage(
+            "normalize_rows",
+            lambda: wg.normalize_rows([r for _, rows in state["read_csv"] for r in rows], state["union_headers"]),
+            lambda: total,
+        )
+        stage("dedup", lambda: list(wg.iter_deduped(state["normalize_rows"], "Link")), lambda: total)
+        union = state["union_headers"]
+        stage(
+            "write",
+            lambda: wg.write_master(out_file, union, ([r[c] for c in union] for r in state["dedup"])),
+            lambda: state["write"],
+        )
+    elif name == "tuples":
+        # The current path: tuple rows projected by itemgetter, hashed dedup keys.
+        stage("read_table", lambda: [wg.read_table(fp) for fp in files], lambda: sum(map(len, state["read_table"])))
+        total = stages[-1]["rows"]
+        stage("union_headers", lambda: wg.union_headers([t.headers for t in state["read_table"]]), lambda: total)
+        union = state["union_headers"]
+        stage("project_rows", lambda: list(wg.project_rows(state["read_table"], union)), lambda: total)
+        stage("dedup", lambda: list(wg.iter_deduped(state["project_rows"], "Link", union)), lambda: total)
+        stage("write", lambda: wg.write_master(out_file, union, state["dedup"]), lambda: state["write"])
+    elif name == "wrangle":
+        # End to end through the library API, as wrangle_api.py uses it.
+        options = wg.WrangleOptions(dedup_key="Link")
+        stage("wrangle", lambda: wg.wrangle(files, options), lambda: state["wrangle"].stats["rows_read"])
+        stage("write", lambda: state["wrangle"].write_csv(out_file), lambda: state["write"])
+    else:
+        raise ValueError(f"Unknown pipeline '{name}'")
+    return stages
+
+
+PIPELINES = ("dicts", "tuples", "wrangle")
+
+
+def run_benchmark(corpus: str | Path, pipelines=PIPELINES, repeat: int = 3) -> Dict[str, Any]:
+    """Run each pipeline ``repeat`` times, each in a fresh interpreter.
+
+    Keeps the fastest time and the lowest peak RSS (and RSS growth) seen for every stage.
+    """
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    ctx = get_context("spawn")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name in pipelines:
+            best: Dict[str, Dict[str, Any]] = {}
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    stages = pool.submit(_run_pipeline, name, str(corpus), out_dir).result()
+                for s in stages:
+                    prev = best.get(s["stage"])
+                    if prev is None:
+                        best[s["stage"]] = s
+                        continue
+                    if s["seconds"] < prev["seconds"]:
+                        prev.update(seconds=s["seconds"], rows_per_sec=s["rows_per_sec"])
+                    for metric in ("peak_rss_mb", "rss_growth_mb"):
+                        if s[metric] is not None and (prev[metric] is None or s[metric] < prev[metric]):
+                            prev[metric] = s[metric]
+            results[name] = list(best.values())
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "pipelines": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 1.2) -> List[str]:
+    """Return one line per stage that got slower, or grew RSS more, than ``threshold`` × baseline."""
+    if current.get("corpus") != baseline.get("corpus"):
+        return [f"corpus differs from baseline ({baseline.get('corpus')}); not comparable"]
+    regressions: List[str] = []
+    for name, stages in current["pipelines"].items():
+        before = {s["stage"]: s for s in baseline.get("pipelines", {}).get(name, [])}
+        for s in stages:
+            b = before.get(s["stage"])
+            if b is None:
+                continue
+            old, new = b.get("seconds"), s.get("seconds")
+            if old and new and new > old * threshold:
+                regressions.append(f"{name}/{s['stage']}: seconds {old} → {new} (×{new / old:.2f})")
+            old, new = b.get("rss_growth_mb"), s.get("rss_growth_mb")
+            if old is not None and new is not None and new > old * threshold and new - old > MIN_RSS_GROWTH_MB:
+                regressions.append(f"{name}/{s['stage']}: rss_growth_mb {old} → {new}")
+    return regressions
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    before: Dict[tuple, Dict[str, Any]] = {}
+    for name, stages in (baseline or {}).get("pipelines", {}).items():
+        before.update({(name, s["stage"]): s for s in stages})
+    print(f"{'pipeline':<9} {'stage':<15} {'seconds':>9} {'rows/sec':>11} {'+MB':>7} {'peak MB':>8} {'vs base':>8}")
+    for name, stages in result["pipelines"].items():
+        for s in stages:
+            b = before.get((name, s["stage"]))
+            ratio = f"×{s['seconds'] / b['seconds']:.2f}" if b and b["seconds"] else ""
+            print(
+                f"{name:<9} {s['stage']:<15} {s['seconds']:>9.4f} {s['rows_per_sec'] or 0:>11,} "
+                f"{_mb(s.get('rss_growth_mb')):>7} {_mb(s['peak_rss_mb']):>8} {ratio:>8}"
+            )
+    print("(+MB: how much the stage raised peak RSS; peak MB: the pipeline's peak so far)")
+
+
+def _mb(value: Optional[float]) -> str:
+    return "-" if value is None else str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark the wrangle_grants pipeline on a synthetic corpus")
+    ap.add_argument("--files", type=int, default=50, help="Number of synthetic exports (default: 50)")
+    ap.add_argument("--rows", type=int, default=2000, help="Rows per export (default: 2000)")
+    ap.add_argument("--tsv", type=float, default=0.25, help="Share of tab separated files (default: 0.25)")
+    ap.add_argument("--overlap", type=float, default=0.3, help="Share of rows repeating an earlier grant (default: 0.3)")
+    ap.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    ap.add_argument("--corpus", default="", help="Folder for the corpus (default: a temporary folder)")
+    ap.add_argument("--generate-only", action="store_true", help="Only write the corpus, do not benchmark")
+    ap.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES), help="Pipelines to run")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per pipeline; the best is kept (default: 3)")
+    ap.add_argument("--save", default="", help="Write results to this JSON file")
+    ap.add_argument("--baseline", default="", help="Compare against results saved earlier with --save")
+    ap.add_argument("--threshold", type=float, default=1.2, help="Flag stages slower/bigger than this × baseline")
+    args = ap.parse_args(argv)
+    if args.generate_only and not args.corpus:
+        ap.error("--generate-only needs --corpus")
+
+    corpus_info = {"files": args.files, "rows": args.rows, "tsv": args.tsv, "overlap": args.overlap, "seed": args.seed}
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus or os.path.join(tmp, "corpus")
+        start = time.perf_counter()
+        generate_corpus(corpus, args.files, args.rows, args.tsv, args.overlap, args.seed)
+        print(f"INFO: Generated {args.files} file(s) × {args.rows} rows in {corpus} ({time.perf_counter() - start:.1f}s)")
+        if args.generate_only:
+            sys.exit(0)
+        result = run_benchmark(corpus, args.pipelines, args.repeat)
+    result["corpus"] = corpus_info
+
+    baseline = None
+    if args.baseline:
+        if Path(args.baseline).exists():
+            baseline = json.loads(Path(args.baseline).read_text())
+        else:
+            print(f"WARNING: baseline {args.baseline} not found; nothing to compare")
+    print_report(result, baseline)
+
+    regressions = compare(result, baseline, args.threshold) if baseline else []
+    for line in regressions:
+        print(f"WARNING: regression {line}")
+
+    if args.save and regressions:
+        print(f"WARNING: Not saving to {args.save}; the baseline is kept until the regressions are fixed")
+    elif args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(result, indent=2) + "\n")
+        print(f"INFO: Saved results to {args.save}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,45 +5,63 @@ This CLI queries the Grants.gov search API using the ``keyword`` parameter and o
 then enriches each opportunity with details from the opportunity synopsis
 endpoint. Results can be written to CSV or TSV and a curated summary table is
 printed for quick review.
+
+Synopses are fetched ``--concurrency`` at a time (default 8), each with a
+``--timeout`` in seconds; the summary keeps the search result order.
+
+Replies are kept in an on-disk cache (``--cache``, default
+``out/.http_cache.sqlite``): searches stay fresh for an hour and synopses for
+a week, after which they are revalidated with ``ETag``/``Last-Modified``, so
+a repeat run makes no network calls. ``--offline`` answers only from the
+cache and ``--no-cache`` turns it off.
 """
 
 from __future__ import annotations
 
 import argparse
+import http.client
 import json
 import logging
 import sys
-import urllib.error
 import urllib.parse
-import urllib.request
-import ssl
-import certifi
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from http_cache import DEFAULT_MAX_BYTES, CachedClient, HTTPCache
+from http_client import default_client
+
 SEARCH_URL = "https://www.grants.gov/grantsws/rest/opportunities/search"
 DETAIL_URL = "https://www.grants.gov/grantsws/rest/opportunities/{id}/synopsis"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CACHE = "out/.http_cache.sqlite"
+# First matching URL prefix wins, so the search endpoint goes before the synopsis prefix.
+CACHE_TTLS = ((SEARCH_URL, 3600.0), (DETAIL_URL.split("{id}")[0], 7 * 86400.0))
 
+_cached: Optional[CachedClient] = None
 
-def _get_json(url: str, params: Dict[str, str] | None = None, debug: bool = False) -> Dict:
-    """Fetch JSON data from ``url`` using ``GET`` and optional query ``params``."""
-    if params:
-        url = f"{url}?{urllib.parse.urlencode(params)}"
-    headers: Dict[str, str] = {"Accept": "application/json"}
-    logging.debug("GET %s", url)
-    context = ssl.create_default_context(cafile=certifi.where())
-    req = urllib.request.Request(url, headers=headers, method="GET")
+
+def use_cache(path: Optional[str], offline: bool = False, max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[CachedClient]:
+    """Route requests through an on-disk cache at ``path`` (``None`` sends them straight out)."""
+    global _cached
+    _cached = CachedClient(HTTPCache(path, max_bytes, CACHE_TTLS), offline=offline) if path else None
+    return _cached
+
+
+def _request_json(method: str, url: str, debug: bool, timeout: Optional[float], **kwargs: Any) -> Dict:
+    """Send a request through the cache (if any) or the shared client and decode the JSON reply."""
     try:
-        with urllib.request.urlopen(req, context=context) as resp:  # noqa: S310 - network call intended
-            text = resp.read().decode("utf-8")
-            if resp.status != 200:
-                raise RuntimeError(f"Request to {url} failed with {resp.status}: {text[:200]}")
-    except urllib.error.HTTPError as err:  # pragma: no cover - network error handling
-        body = err.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Request to {url} failed with {err.code}: {body[:200]}") from err
-    except (urllib.error.URLError, ssl.SSLError) as err:  # pragma: no cover - network error handling
+        resp = (_cached or default_client()).request(
+            method, url, headers={"Accept": "application/json"}, timeout=timeout, **kwargs
+        )
+    except (OSError, http.client.HTTPException) as err:  # pragma: no cover - network error handling
         raise RuntimeError(f"Failed to fetch {url}: {err}") from err
+    text = resp.text()
+    if resp.status != 200:
+        raise RuntimeError(f"Request to {url} failed with {resp.status}: {text[:200]}")
     if debug:
         logging.debug("Response: %s", text[:1000])
     try:
@@ -52,41 +70,26 @@ def _get_json(url: str, params: Dict[str, str] | None = None, debug: bool = Fals
         raise RuntimeError(f"Invalid JSON from {url}: {err}") from err
 
 
-def _post_json(url: str, payload: Dict[str, Any], debug: bool = False) -> Dict:
+def _get_json(
+    url: str, params: Dict[str, str] | None = None, debug: bool = False, timeout: Optional[float] = DEFAULT_TIMEOUT
+) -> Dict:
+    """Fetch JSON data from ``url`` using ``GET`` and optional query ``params``."""
+    if params:
+        url = f"{url}?{urllib.parse.urlencode(params)}"
+    logging.debug("GET %s", url)
+    return _request_json("GET", url, debug, timeout)
+
+
+def _post_json(
+    url: str, payload: Dict[str, Any], debug: bool = False, timeout: Optional[float] = DEFAULT_TIMEOUT
+) -> Dict:
     """Send a JSON ``payload`` to ``url`` using ``POST`` and return the response."""
-    headers: Dict[str, str] = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-    data = json.dumps(payload).encode("utf-8")
     logging.debug("POST %s", url)
-    context = ssl.create_default_context(cafile=certifi.where())
-    req = urllib.request.Request(url, headers=headers, data=data, method="POST")
-    try:
-        with urllib.request.urlopen(req, context=context) as resp:  # noqa: S310 - network call intended
-            text = resp.read().decode("utf-8")
-            if resp.status != 200:
-                raise RuntimeError(
-                    f"Request to {url} failed with {resp.status}: {text[:200]}"
-                )
-    except urllib.error.HTTPError as err:  # pragma: no cover - network error handling
-        body = err.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Request to {url} failed with {err.code}: {body[:200]}") from err
-    except (urllib.error.URLError, ssl.SSLError) as err:  # pragma: no cover - network error handling
-        raise RuntimeError(f"Failed to fetch {url}: {err}") from err
-    if debug:
-        logging.debug("Response: %s", text[:1000])
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as err:  # pragma: no cover - defensive
-        raise RuntimeError(f"Invalid JSON from {url}: {err}") from err
+    return _request_json("POST", url, debug, timeout, json_body=payload)
 
 
 def search_grants(keyword: str, filters: Dict[str, str], debug: bool = False) -> List[Dict]:
     """Return a list of opportunities matching ``keyword`` and ``filters``."""
-    # The Grants.gov API expects the singular "keyword" parameter.
-    params = {"keyword": keyword, "limit": "20", **filters}
-    data = _get_json(SEARCH_URL, params, debug=debug)
     payload = {"keywords": keyword, "limit": "20", **filters}
     try:
         data = _post_json(SEARCH_URL, payload, debug=debug)
@@ -96,11 +99,11 @@ def search_grants(keyword: str, filters: Dict[str, str], debug: bool = False) ->
     return data.get("opportunities", [])
 
 
-def fetch_detail(opp_id: str, debug: bool = False) -> Dict:
+def fetch_detail(opp_id: str, debug: bool = False, timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict:
     """Fetch detail JSON for a single opportunity ``opp_id``."""
     url = DETAIL_URL.format(id=opp_id)
     try:
-        data = _get_json(url, debug=debug)
+        data = _get_json(url, debug=debug, timeout=timeout)
     except RuntimeError as err:
         logging.error("Detail request for %s failed: %s", opp_id, err)
         return {}
@@ -108,12 +111,39 @@ def fetch_detail(opp_id: str, debug: bool = False) -> Dict:
     return data.get("opportunity", data)
 
 
-def build_summary(opportunities: List[Dict], debug: bool = False) -> pd.DataFrame:
+def fetch_details(
+    opp_ids: List[str],
+    debug: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> List[Dict]:
+    """Fetch details for ``opp_ids`` with up to ``concurrency`` requests in flight.
+
+    Results are in ``opp_ids`` order; an id listed twice is fetched once, and
+    a failed or timed-out request gives ``{}`` like ``fetch_detail``.
+    """
+    unique = list(dict.fromkeys(opp_ids))
+    fetch = partial(fetch_detail, debug=debug, timeout=timeout)
+    if concurrency <= 1 or len(unique) <= 1:
+        details = [fetch(opp_id) for opp_id in unique]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(unique))) as pool:
+            details = list(pool.map(fetch, unique))
+    by_id = dict(zip(unique, details))
+    return [by_id[opp_id] for opp_id in opp_ids]
+
+
+def build_summary(
+    opportunities: List[Dict],
+    debug: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> pd.DataFrame:
     """Create a summary DataFrame with curated columns."""
+    opp_ids = [str(opp.get("id") or opp.get("opportunityId")) for opp in opportunities]
+    details = fetch_details(opp_ids, debug=debug, concurrency=concurrency, timeout=timeout)
     rows: List[Dict[str, str]] = []
-    for opp in opportunities:
-        opp_id = str(opp.get("id") or opp.get("opportunityId"))
-        detail = fetch_detail(opp_id, debug=debug)
+    for opp, detail in zip(opportunities, details):
         rows.append(
             {
                 "Grant name": opp.get("title"),
@@ -155,23 +185,63 @@ def main(argv: List[str] | None = None) -> None:
     parser.add_argument(
         "--debug", action="store_true", help="Enable debug logging of requests"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Opportunity details to fetch at once (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds to wait for each request (default: {DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE,
+        help=f"SQLite file for cached responses (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        help=f"Cache size limit in MB; least recently used replies are dropped (default: {DEFAULT_MAX_BYTES >> 20})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    parser.add_argument(
+        "--offline", action="store_true", help="Answer only from the cache; make no network calls"
+    )
     args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache; drop --no-cache")
 
     logging.basicConfig(
         level=logging.DEBUG if args.debug else logging.INFO,
         format="%(asctime)s %(levelname)s %(message)s",
     )
 
-    filters = parse_filters(args.filter)
-    opportunities = search_grants(args.keyword, filters, debug=args.debug)
-    if not opportunities:
-        logging.info("No opportunities found.")
-        return
-
-    summary = build_summary(opportunities, debug=args.debug)
-    sep = "," if args.format == "csv" else "\t"
-    summary.to_csv(args.output, index=False, sep=sep)
-    print(summary.to_string(index=False))
+    cached = use_cache(None if args.no_cache else args.cache, offline=args.offline, max_bytes=args.cache_size << 20)
+    try:
+        filters = parse_filters(args.filter)
+        opportunities = search_grants(args.keyword, filters, debug=args.debug)
+        if not opportunities:
+            logging.info("No opportunities found.")
+            return
+
+        summary = build_summary(opportunities, debug=args.debug, concurrency=args.concurrency, timeout=args.timeout)
+        sep = "," if args.format == "csv" else "\t"
+        summary.to_csv(args.output, index=False, sep=sep)
+        print(summary.to_string(index=False))
+    finally:
+        if cached is not None:
+            logging.info(
+                "HTTP cache: %d hits, %d revalidated, %d fetched", cached.hits, cached.revalidated, cached.fetched
+            )
+            cached.cache.close()
+            use_cache(None)
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry point
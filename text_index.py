@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+text_index.py — Persistent full-text search over grant exports, ranked with BM25.
+
+Usage:
+  python text_index.py build --input data/csvs --index out/.text_index
+  python text_index.py search "solar workforce training" --index out/.text_index --top 10
+
+``wrangle_grants.py --text-index DIR`` keeps the index up to date at merge
+time. The index has one segment per source file, keyed by the file's path,
+size and mtime, so a rebuild only reads and tokenizes files that changed. Each segment
+stores its postings and document lengths as ``.npy`` arrays that are
+memory-mapped on load, plus a small term dictionary and the stored fields
+shown in results. Grant name, sponsor, notes and summary columns are
+indexed; the grant name counts twice.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import shutil
+import sys
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from wrangle_grants import DEADLINE_COLUMNS, SourceTable, list_inputs, read_table
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+# Indexed columns (matched case-insensitively, ignoring padding) and weights.
+TEXT_FIELDS = {
+    "grant name": 2,
+    "sponsor": 1,
+    "sponsor org": 1,
+    "synopsis snippet": 1,
+    "timeline summary": 1,
+    "categories": 1,
+    "eligibility": 1,
+    "partners notes": 1,
+    "extra notes": 1,
+    "notes": 1,
+}
+STORED_FIELDS = {"grant name": "name", "sponsor": "sponsor", "sponsor org": "sponsor", "link": "link"}
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the this to with program programs grant grants".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ``text`` and split it into alphanumeric terms, dropping stop words."""
+    return [t for t in _TOKEN.findall(text.casefold()) if t not in STOP_WORDS and (len(t) > 1 or t.isdigit())]
+
+
+def _segment_key(path: str) -> str:
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _build_segment(folder: Path, path: str, table: SourceTable) -> Dict[str, Any]:
+    """Tokenize ``table`` into a segment under ``folder``; return its manifest entry."""
+    import numpy as np
+
+    names = [" ".join(h.split()).casefold() for h in table.headers]
+    weighted = [(i, TEXT_FIELDS[n]) for i, n in enumerate(names) if n in TEXT_FIELDS]
+    stored = [(i, STORED_FIELDS[n]) for i, n in enumerate(names) if n in STORED_FIELDS]
+    deadline_cols = [i for i, n in enumerate(names) if n in {c.casefold() for c in DEADLINE_COLUMNS}]
+
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths: List[int] = []
+    docs: List[Dict[str, Any]] = []
+    for doc, row in enumerate(table.rows):
+        counts: Dict[str, int] = {}
+        for i, weight in weighted:
+            if i < len(row) and row[i]:
+                for term in tokenize(row[i]):
+                    counts[term] = counts.get(term, 0) + weight
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc, tf))
+        lengths.append(sum(counts.values()))
+        fields: Dict[str, Any] = {"row": doc + 1}
+        for i, key in stored:
+            if i < len(row) and row[i] and key not in fields:
+                fields[key] = row[i]
+        deadline = next((row[i] for i in deadline_cols if i < len(row) and row[i]), "")
+        if deadline:
+            fields["deadline"] = deadline
+        docs.append(fields)
+
+    vocab: Dict[str, List[int]] = {}
+    flat: List[Tuple[int, int]] = []
+    for term in sorted(postings):
+        vocab[term] = [len(flat), len(postings[term])]
+        flat.extend(postings[term])
+
+    folder.mkdir(parents=True, exist_ok=True)
+    np.save(folder / "postings.npy", np.asarray(flat, dtype=np.int32).reshape(-1, 2))
+    np.save(folder / "lengths.npy", np.asarray(lengths, dtype=np.int32))
+    (folder / "vocab.json").write_text(json.dumps(vocab, separators=(",", ":")), encoding="utf-8")
+    with open(folder / "docs.jsonl", "w", encoding="utf-8") as f:
+        for fields in docs:
+            f.write(json.dumps(fields, ensure_ascii=False) + "\n")
+    return {"docs": len(docs), "tokens": int(sum(lengths))}
+
+
+class Segment:
+    """One source file's postings, memory-mapped from disk."""
+
+    def __init__(self, folder: Path, path: str) -> None:
+        import numpy as np
+
+        self.folder = folder
+        self.path = path
+        self.vocab: Dict[str, List[int]] = json.loads((folder / "vocab.json").read_text(encoding="utf-8"))
+        self.postings = np.load(folder / "postings.npy", mmap_mode="r")
+        self.lengths = np.load(folder / "lengths.npy", mmap_mode="r")
+        self._docs: Optional[List[Dict[str, Any]]] = None
+
+    def docs(self) -> List[Dict[str, Any]]:
+        if self._docs is None:
+            with open(self.folder / "docs.jsonl", encoding="utf-8") as f:
+                self._docs = [json.loads(line) for line in f]
+        return self._docs
+
+
+class TextIndex:
+    """A BM25 index over grant rows, stored as per-file segments in ``index_dir``."""
+
+    VERSION = 1
+
+    def __init__(self, index_dir: str | Path) -> None:
+        self.dir = Path(index_dir)
+        self.segments: List[Segment] = []
+        self.docs = 0
+        self.tokens = 0
+        self.df: Dict[str, int] = {}
+        manifest = self.dir / "manifest.json"
+        if manifest.exists():
+            data = json.loads(manifest.read_text(encoding="utf-8"))
+            if data.get("version") == self.VERSION:
+                self._load(data["segments"])
+
+    def _load(self, entries: Sequence[Dict[str, Any]]) -> None:
+        self.segments = [Segment(self.dir / e["segment"], e["path"]) for e in entries]
+        self.docs = sum(e["docs"] for e in entries)
+        self.tokens = sum(e["tokens"] for e in entries)
+        df: Dict[str, int] = {}
+        for seg in self.segments:
+            for term, (_, count) in seg.vocab.items():
+                df[term] = df.get(term, 0) + count
+        self.df = df
+
+    def update(self, sources: Iterable[Tuple[str, SourceTable]]) -> Tuple[int, int]:
+        """Make the index match ``sources`` (path, table) in order.
+
+        Segments of unchanged files are reused; changed or new files are
+        tokenized; segments of files no longer present are deleted. Returns
+        ``(reused, built)``.
+        """
+        return self._update((path, lambda table=table: table) for path, table in sources)
+
+    def update_files(
+        self, paths: Iterable[str], delimiter: str = ",", encoding: str = "utf-8", log: Callable[[str], None] = print
+    ) -> Tuple[int, int]:
+        """Like ``update``, but only files whose segment is missing or stale are read.
+
+        A file that cannot be read is reported through ``log`` and left out.
+        """
+
+        def load(path: str) -> Optional[SourceTable]:
+            try:
+                return read_table(path, delimiter=delimiter, encoding=encoding)
+            except Exception as e:
+                log(f"WARNING: Failed to read {path}: {e}")
+                return None
+
+        return self._update((path, partial(load, path)) for path in paths)
+
+    def _update(self, sources: Iterable[Tuple[str, Callable[[], Optional[SourceTable]]]]) -> Tuple[int, int]:
+        old = {}
+        manifest = self.dir / "manifest.json"
+        if manifest.exists():
+            data = json.loads(manifest.read_text(encoding="utf-8"))
+            if data.get("version") == self.VERSION:
+                old = {e["segment"]: e for e in data["segments"]}
+
+        entries: List[Dict[str, Any]] = []
+        reused = built = 0
+        for path, load in sources:
+            name = f"seg-{_segment_key(path)}"
+            if name in old and (self.dir / name / "docs.jsonl").exists():
+                entries.append(old[name])
+                reused += 1
+                continue
+            table = load()
+            if table is None:
+                continue
+            shutil.rmtree(self.dir / name, ignore_errors=True)
+            entry = _build_segment(self.dir / name, path, table)
+            entries.append({"segment": name, "path": path, **entry})
+            built += 1
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": self.VERSION, "segments": entries}, indent=2), encoding="utf-8")
+        os.replace(tmp, manifest)
+        keep = {e["segment"] for e in entries}
+        for child in self.dir.glob("seg-*"):
+            if child.name not in keep:
+                shutil.rmtree(child, ignore_errors=True)
+        self._load(entries)
+        return reused, built
+
+    def search(self, query: str, top: int = 10) -> List[Dict[str, Any]]:
+        """Return the ``top`` best BM25 matches for ``query``, best first.
+
+        Rows repeated across exports (same link, or same name and sponsor
+        without a link) are collapsed to their best-scoring copy.
+        """
+        import numpy as np
+
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.df]
+        if not terms or not self.docs:
+            return []
+        avgdl = self.tokens / self.docs
+        idf = {t: math.log(1 + (self.docs - self.df[t] + 0.5) / (self.df[t] + 0.5)) for t in terms}
+
+        ranked: List[Iterable[Tuple[float, int, int]]] = []
+        for s, seg in enumerate(self.segments):
+            scores: Optional[np.ndarray] = None
+            for term in terms:
+                found = seg.vocab.get(term)
+                if found is None:
+                    continue
+                offset, count = found
+                block = np.asarray(seg.postings[offset : offset + count])
+                docs, tf = block[:, 0], block[:, 1].astype(float)
+                norm = K1 * (1 - B + B * seg.lengths[docs] / avgdl)
+                if scores is None:
+                    scores = np.zeros(len(seg.lengths))
+                scores[docs] += idf[term] * tf * (K1 + 1) / (tf + norm)
+            if scores is None:
+                continue
+            matched = np.flatnonzero(scores)
+            best = matched[np.argsort(-scores[matched], kind="stable")]
+            ranked.append(zip((-scores[best]).tolist(), [s] * len(best), best.tolist()))
+
+        # Walk the segments' ranked lists best-first until ``top`` distinct rows are found,
+        # however many duplicates come first.
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for neg_score, s, d in heapq.merge(*ranked):
+            score = -neg_score
+            seg = self.segments[s]
+            fields = seg.docs()[d]
+            key = fields.get("link") or (fields.get("name", "").casefold(), fields.get("sponsor", "").casefold())
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append({"score": round(score, 4), "file": seg.path, **fields})
+            if len(results) == top:
+                break
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Build or search the grant full-text index")
+    sub = ap.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index the CSVs in a folder (only changed files are re-read)")
+    build.add_argument("--input", dest="in_dir", default="data/csvs", help="Folder containing CSVs to index")
+    build.add_argument("--pattern", default="*.csv", help='Glob pattern to match files (default: "*.csv")')
+    build.add_argument("--index", default="out/.text_index", help="Index folder (default: out/.text_index)")
+    search = sub.add_parser("search", help="Search the index")
+    search.add_argument("query", help="Words to search for")
+    search.add_argument("--index", default="out/.text_index", help="Index folder (default: out/.text_index)")
+    search.add_argument("--top", type=int, default=10, help="Number of results (default: 10)")
+    search.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        files = [fp for fp in list_inputs(args.in_dir, args.pattern) if Path(fp).is_file()]
+        if not files:
+            print(f"ERROR: No CSV files found in {args.in_dir} matching {args.pattern}")
+            sys.exit(2)
+        index = TextIndex(args.index)
+        reused, built = index.update_files(files)
+        print(f"OK: Indexed {index.docs} row(s) from {len(index.segments)} file(s) → {args.index} ({reused} reused, {built} built)")
+        sys.exit(0)
+
+    index = TextIndex(args.index)
+    if not index.segments:
+        print(f"ERROR: No index in {args.index}; run 'text_index.py build' first")
+        sys.exit(2)
+    results = index.search(args.query, top=args.top)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for r in results:
+            print(f"{r['score']:7.3f}  {r.get('name', '')}  [{r.get('sponsor', '')}]  {r.get('deadline', '')}  {r.get('link', '')}")
+        if not results:
+            print("No matches.")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
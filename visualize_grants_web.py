@@ -30,7 +30,17 @@ from flask import (
     session,
 )
 
+from metrics import REGISTRY, gauge_lines, instrument, stage
+from response_cache import ResponseCache
+from wrangle_grants import COLUMNAR_SUFFIXES, read_dataframe
+
 app = Flask(__name__)
+# Rendered pages, gzip-compressed and keyed by the data file's version.
+responses = ResponseCache()
+instrument(app)
+REGISTRY.collector(
+    lambda: gauge_lines("grants_page_cache", "Rendered page cache size and hit counts", responses.stats(), "field")
+)
 # Simple demo credentials; replace with a proper auth system in production.
 app.secret_key = "dev-secret"
 USERS = {"client": "demo"}
@@ -41,11 +51,32 @@ def require_login() -> bool:
     return "user" in session
 
 
+def data_version(path: Path) -> tuple:
+    """Return a cache key part that changes whenever ``path`` (or its columnar copy) does."""
+    version = []
+    for p in [path] + [path.with_suffix(sfx) for sfx in COLUMNAR_SUFFIXES.values()]:
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        version.append((p.suffix, st.st_size, st.st_mtime_ns))
+    return tuple(version)
+
+
 @app.route("/")
 def index():
     if not require_login():
         return redirect(url_for("login"))
     dataset = request.args.get("dataset", "master")
+    if dataset != "programs":
+        dataset = "master"
+    data_path = Path("data/programs.csv" if dataset == "programs" else "out/master.csv")
+    key = ("index", dataset, data_version(data_path), px is not None)
+    return responses.respond(key, lambda: render_index(dataset), mimetype="text/html")
+
+
+def render_index(dataset: str) -> str:
+    """Render the chart page for ``dataset`` ("master" or "programs")."""
     if dataset == "programs":
         data_path = Path("data/programs.csv")
         default_df = pd.DataFrame(
@@ -66,7 +97,8 @@ def index():
         x_col, y_col, title = "Grant name", "Total funding", "Total Funding by Grant"
 
     if data_path.exists():
-        df = pd.read_csv(data_path)
+        with stage("read_master"):
+            df = read_dataframe(data_path)
     else:
         df = default_df
 
@@ -114,24 +146,37 @@ def scored():
         return redirect(url_for("login"))
 
     data_path = Path("out/master.csv")
+    if request.method == "GET":
+        key = ("scored", data_version(data_path))
+        return responses.respond(key, lambda: render_scored(data_path), mimetype="text/html")
+
+    df = load_scored(data_path)
+
+    columns = list(df.columns)
+    for i in range(len(df)):
+        for j, col in enumerate(columns):
+            df.at[i, col] = request.form.get(f"cell_{i}_{j}", "")
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(data_path, index=False)
+    return redirect(url_for("scored"))
+
+
+def load_scored(data_path: Path) -> pd.DataFrame:
+    """Load the scored master, or sample rows if it does not exist yet."""
     if data_path.exists():
-        df = pd.read_csv(data_path)
-    else:
-        df = pd.DataFrame(
-            {
-                "Program": ["Sample Program A", "Sample Program B"],
-                "Weighted Score": [0.5, 0.75],
-            }
-        )
+        with stage("read_master"):
+            return read_dataframe(data_path)
+    return pd.DataFrame(
+        {
+            "Program": ["Sample Program A", "Sample Program B"],
+            "Weighted Score": [0.5, 0.75],
+        }
+    )
 
-    if request.method == "POST":
-        columns = list(df.columns)
-        for i in range(len(df)):
-            for j, col in enumerate(columns):
-                df.at[i, col] = request.form.get(f"cell_{i}_{j}", "")
-        data_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(data_path, index=False)
-        return redirect(url_for("scored"))
+
+def render_scored(data_path: Path) -> str:
+    """Render the editable table of scored opportunities."""
+    df = load_scored(data_path)
 
     table_html = "<table border='1'><tr>" + "".join(
         f"<th>{col}</th>" for col in df.columns
@@ -1,28 +1,481 @@
 #!/usr/bin/env python3
-"""Expose ``wrangle_grants.py`` as a simple HTTP API."""
+"""Expose ``wrangle_grants.py`` as a simple HTTP API.
 
-from flask import Flask, jsonify
-import pandas as pd
-from pathlib import Path
-from wrangle_grants import main as wrangle_main
+``/api/wrangle`` only re-runs the merge when the input folder changes. The
+merged rows are cached under a fingerprint of the file names, sizes and
+mtimes, which doubles as the response ``ETag``, so repeat polls with
+``If-None-Match`` get a ``304`` without any merge or serialization.
+
+Query parameters:
+
+``fields``
+    Comma-separated columns to return (default: all).
+``limit`` / ``cursor``
+    Page size and the opaque cursor from the previous page's
+    ``X-Next-Cursor`` header (also sent as a ``Link: rel="next"`` header).
+``format=ndjson``
+    Stream one JSON object per line (``application/x-ndjson``); also chosen
+    by ``Accept: application/x-ndjson``. Rows are serialized as they are
+    sent, so memory stays flat and the first bytes arrive immediately.
+
+``POST /api/wrangle/jobs`` starts a merge on the background worker and
+returns at once with a job id; poll ``GET /api/wrangle/jobs/<id>`` for its
+status and fetch ``/api/wrangle/jobs/<id>/result`` when it is done. Only the
+job of the current dataset keeps its rows; once a newer merge replaces it,
+the result answers ``410``. Merges run one at a time, and any trigger for
+inputs that are already being merged (or already merged) gets the existing
+job instead of starting another.
+
+The GET endpoints never wait for a merge either. When the inputs changed,
+they queue one and keep answering from the previous dataset, naming the job
+in an ``X-Wrangle-Job`` header; before the first merge has finished they
+reply ``202`` with the job's ``Location``.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlencode
+
+from flask import Flask, Response, jsonify, request
+from grant_index import GrantIndex, parse_query
+from metrics import REGISTRY, ROWS, gauge_lines, instrument, observe_stage, stage
+from response_cache import ResponseCache
+from text_index import TextIndex
+from wrangle_grants import WrangleError, input_fingerprint, wrangle
+
+INPUT_DIR = "data/csvs"
+MASTER_CSV = "out/master.csv"
+TEXT_INDEX_DIR = "out/.text_index"
+NDJSON = "application/x-ndjson"
+NDJSON_BATCH = 256  # rows per streamed chunk
 
 app = Flask(__name__)
 
+_cache: Dict[str, Any] = {"etag": None, "headers": [], "rows": [], "types": {}, "text": None}
+_cache_lock = threading.Lock()
+responses = ResponseCache()
+instrument(app)
+DATASET_CACHE = REGISTRY.counter("grants_dataset_cache_total", "Merged-dataset cache lookups", ["result"])
+
+# Merges run one at a time on a single background worker, so runs never race
+# on MASTER_CSV; requests for inputs already being merged share that run.
+MAX_JOBS = 100  # finished jobs kept for status lookups
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wrangle")
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_inflight: Dict[str, "Job"] = {}
+_failed: Dict[str, "Job"] = {}  # the last failed merge, by input fingerprint
+
+
+@REGISTRY.collector
+def _cache_metrics() -> List[str]:
+    jobs = list(_jobs.values())
+    counts = {status: sum(1 for j in jobs if j.status == status) for status in ("queued", "running", "done", "failed")}
+    lines = gauge_lines("grants_response_cache", "Response cache size and hit counts", responses.stats(), "field")
+    return lines + gauge_lines("grants_wrangle_jobs", "Wrangle jobs currently tracked, by status", counts, "status")
+
+
+@dataclass
+class Job:
+    """One background merge of the inputs with fingerprint ``etag``."""
+
+    etag: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued → running → done | failed
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    stats: Dict[str, Any] = field(default_factory=dict)
+    data: Optional[Dict[str, Any]] = None
+    future: Optional[Future] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "id": self.id,
+            "status": self.status,
+            "etag": self.etag,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.status == "done":
+            out["rows"] = self.stats.get("rows")
+            out["files"] = len(self.stats.get("files", []))
+            out["warnings"] = self.stats.get("warnings", [])
+            if self.data is not None:
+                out["result"] = f"/api/wrangle/jobs/{self.id}/result"
+            else:
+                out["superseded"] = True
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+_index: Dict[str, Any] = {"etag": None, "index": None}
+_index_lock = threading.Lock()
+
+
+class BadRequest(Exception):
+    """Raised for invalid query parameters; answered with a JSON error."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class MergePending(Exception):
+    """Raised when no merged dataset exists yet; answered with ``202`` and the job."""
+
+    def __init__(self, job: Job) -> None:
+        super().__init__(f"merge {job.id} is {job.status}")
+        self.job = job
+
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    with _cache_lock:
+        job.status, job.started = "running", time.time()
+    try:
+        with stage("wrangle"):
+            result = wrangle(INPUT_DIR)
+        for name, seconds in result.stats["timings"].items():
+            observe_stage(name, seconds)
+        for seconds in result.stats["file_seconds"].values():
+            observe_stage("read_file", seconds)
+        with stage("write"):
+            written = result.write_csv(MASTER_CSV)
+        with stage("project"):
+            rows = result.rows
+            types = column_types(result.headers, rows)
+        with stage("text_index"):
+            text = TextIndex(TEXT_INDEX_DIR)
+            text.update(result.sources())
+        ROWS.inc(result.stats["rows_read"], stage="read")
+        ROWS.inc(result.stats["rows_deduped"], stage="dedup")
+        ROWS.inc(written, stage="write")
+    except Exception as exc:
+        with _cache_lock:
+            job.error, job.status, job.finished = str(exc), "failed", time.time()
+            _inflight.pop(job.etag, None)
+            _failed.clear()
+            _failed[job.etag] = job
+        raise
+    data = {"etag": job.etag, "headers": result.headers, "rows": rows, "types": types, "text": text, "job": job}
+    with _cache_lock:
+        previous = _cache.get("job")
+        if previous is not None and previous is not job:
+            previous.data = None  # superseded; only its stats stay for status lookups
+        _cache.update(data)
+        _failed.pop(job.etag, None)
+        job.stats, job.data, job.status, job.finished = result.stats, data, "done", time.time()
+        _inflight.pop(job.etag, None)
+    return data
+
+
+def submit_wrangle(etag: str) -> Tuple[Job, bool]:
+    """Queue a merge of the inputs with fingerprint ``etag``; never blocks.
+
+    Returns ``(job, new)``. If a run for the same inputs is queued, running or
+    already finished, that job is returned with ``new`` False.
+    """
+    with _cache_lock:
+        job = _inflight.get(etag)
+        if job is None and _cache["etag"] == etag:
+            job = _cache.get("job")
+            if job is not None:
+                # Keep the job of the current dataset visible even after MAX_JOBS newer ones.
+                _jobs[job.id] = job
+                _jobs.move_to_end(job.id)
+        if job is not None:
+            return job, False
+        job = Job(etag)
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+        _inflight[etag] = job
+        job.future = _executor.submit(_run_job, job)
+        return job, True
+
+
+def _dataset(etag: str) -> Dict[str, Any]:
+    """Return the merge for inputs with fingerprint ``etag``, without waiting for one.
+
+    On a miss a background merge is queued and the previous dataset is
+    returned with ``pending`` set to that job. Raises ``MergePending`` if
+    there is no previous dataset, and ``WrangleError`` if the merge of these
+    inputs already failed.
+    """
+    with _cache_lock:
+        if _cache["etag"] == etag:
+            DATASET_CACHE.inc(result="hit")
+            return dict(_cache)
+        failed = _failed.get(etag)
+    if failed is not None:
+        raise WrangleError(failed.error or "merge failed")
+    DATASET_CACHE.inc(result="miss")
+    job, _ = submit_wrangle(etag)
+    with _cache_lock:
+        if job.data is not None:
+            return dict(job.data)
+        if _cache["etag"] is not None:
+            return {**_cache, "pending": job}
+    raise MergePending(job)
+
+
+def _job_response(job: Job, status: int) -> Tuple[Response, int]:
+    resp = jsonify(job.to_dict())
+    resp.headers["Location"] = f"/api/wrangle/jobs/{job.id}"
+    return resp, status
+
+
+def _mark_pending(resp: Response, data: Dict[str, Any]) -> Response:
+    """Name the merge that will replace ``data`` when it is a previous dataset."""
+    job = data.get("pending")
+    if job is not None:
+        resp.headers["X-Wrangle-Job"] = f"/api/wrangle/jobs/{job.id}"
+    return resp
+
+
+def column_types(headers: Sequence[str], rows: Sequence[Sequence[str]]) -> Dict[str, Callable[[str], Any]]:
+    """Return ``int`` or ``float`` for each column whose non-blank cells are all numbers.
+
+    Records keep the types ``pd.read_csv`` used to infer for clients of the
+    endpoint. Whole numbers without blank cells are ints. Any other numeric
+    column is floats, with blanks as ``None``. Every other column stays as
+    strings.
+    """
+    import pandas as pd
+
+    types: Dict[str, Callable[[str], Any]] = {}
+    for i, name in enumerate(headers):
+        cells = pd.Series([row[i] for row in rows], dtype="string").fillna("")
+        present = cells[cells != ""]
+        if present.empty or pd.to_numeric(present, errors="coerce").isna().any():
+            continue
+        whole = len(present) == len(cells) and present.str.fullmatch(r"[+-]?\d+").all()
+        types[name] = int if whole else float
+    return types
+
+
+def _json_records(columns: Sequence[str], rows: Iterable[Sequence[Any]], types: Dict[str, Callable]) -> str:
+    return app.json.dumps(list(_records(columns, rows, types)))
+
+
+def _records(
+    columns: Sequence[str], rows: Iterable[Sequence[Any]], types: Dict[str, Callable]
+) -> Iterator[Dict[str, Any]]:
+    """Yield rows as dicts, numbers converted with ``types`` and blank or missing cells as ``None``."""
+    convert = [types.get(c) for c in columns]
+    for row in rows:
+        yield {c: (None if v is None or v == "" else to(v) if to else v) for c, to, v in zip(columns, convert, row)}
+
+
+def _projection(headers: List[str], fields: Optional[str]) -> Tuple[List[str], Optional[Callable]]:
+    if not fields:
+        return headers, None
+    columns = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in columns if c not in headers]
+    if unknown:
+        raise BadRequest(f"unknown field(s): {', '.join(unknown)}")
+    positions = [headers.index(c) for c in columns]
+    if len(positions) == 1:
+        p = positions[0]
+        return columns, lambda row: (row[p],)
+    return columns, itemgetter(*positions)
+
+
+def _page(etag: str, total: int) -> Tuple[int, Optional[int]]:
+    """Return ``(start, stop)`` from ``cursor``/``limit``; ``stop`` is None for all rows."""
+    start = 0
+    cursor = request.args.get("cursor")
+    if cursor:
+        offset, _, tag = cursor.partition(".")
+        if not offset.isdigit() or not tag:
+            raise BadRequest("invalid cursor")
+        if tag != etag[:12]:
+            raise BadRequest("cursor belongs to an older dataset; restart from the first page", status=409)
+        start = int(offset)
+    limit = request.args.get("limit")
+    if limit is None:
+        return start, None
+    if not limit.isdigit() or int(limit) < 1:
+        raise BadRequest("limit must be a positive integer")
+    return start, min(start + int(limit), total)
+
+
+def _variant_etag(etag: str) -> str:
+    """Tag a specific page/projection/format of the dataset with fingerprint ``etag``."""
+    params = sorted(request.args.items(multi=True))
+    if not params and not _wants_ndjson():
+        return etag
+    key = f"{etag}\0{params}\0{_wants_ndjson()}".encode("utf-8")
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
+def _wants_ndjson() -> bool:
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+
+def _ndjson(columns: Sequence[str], rows: Iterable[Sequence[Any]], types: Dict[str, Callable]) -> Iterator[str]:
+    dumps = app.json.dumps
+    records = _records(columns, rows, types)
+    while True:
+        batch = [dumps(r) for r in islice(records, NDJSON_BATCH)]
+        if not batch:
+            return
+        yield "\n".join(batch) + "\n"
+
 
 @app.route("/api/wrangle", methods=["GET"])
-def api_wrangle() -> tuple:
+def api_wrangle() -> Union[Response, Tuple[Response, int]]:
     """Run the grant wrangler and return the master dataset as JSON."""
+    with stage("fingerprint"):
+        etag = input_fingerprint(INPUT_DIR)
+    try:
+        data = _dataset(etag)
+    except MergePending as pending:
+        return _job_response(pending.job, 202)
+    except WrangleError as exc:
+        return jsonify({"error": str(exc)}), 400
+    # Tag what is actually served: the previous dataset while a merge is pending.
+    etag = data["etag"]
+    variant = _variant_etag(etag)
+    if request.if_none_match.contains(variant):
+        resp = Response(status=304)
+        resp.set_etag(variant)
+        return _mark_pending(resp, data)
+    try:
+        columns, project = _projection(data["headers"], request.args.get("fields"))
+        start, stop = _page(etag, len(data["rows"]))
+    except BadRequest as exc:
+        return jsonify({"error": str(exc)}), exc.status
+
+    rows: Iterable[Sequence[Any]] = islice(data["rows"], start, stop)
+    if project is not None:
+        rows = map(project, rows)
+    if _wants_ndjson():
+        resp = Response(_ndjson(columns, rows, data["types"]), mimetype=NDJSON)
+        resp.set_etag(variant)
+    else:
+        resp = responses.respond(("wrangle", variant), lambda: _json_records(columns, rows, data["types"]), etag=variant)
+
+    if stop is not None and stop < len(data["rows"]):
+        cursor = f"{stop}.{etag[:12]}"
+        args = request.args.to_dict()
+        args["cursor"] = cursor
+        resp.headers["X-Next-Cursor"] = cursor
+        resp.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    resp.headers["Cache-Control"] = "no-cache"
+    return _mark_pending(resp, data)
+
+
+def _grant_index(data: Dict[str, Any]) -> GrantIndex:
+    """Return the ``GrantIndex`` for ``data``, building it once per dataset."""
+    with _index_lock:
+        if _index["etag"] != data["etag"]:
+            _index.update(etag=data["etag"], index=GrantIndex(data["headers"], data["rows"]))
+        return _index["index"]
+
+
+@app.route("/api/grants", methods=["GET"])
+def api_grants() -> Union[Response, Tuple[Response, int]]:
+    """Query the master through its indexes.
+
+    Filters: ``sponsor``, ``status`` and ``opp_id`` (exact, case-insensitive,
+    repeatable), ``open=1``, ``within_days``, ``deadline_after``/
+    ``deadline_before`` (YYYY-MM-DD) and ``award_min``/``award_max``. Sort
+    with ``sort=score|deadline|award`` and ``order=asc|desc``; ``limit``
+    (default 50) and ``fields`` shape the reply.
+    """
+    with stage("fingerprint"):
+        etag = input_fingerprint(INPUT_DIR)
     try:
-        wrangle_main(["--input", "data/csvs", "--out", "out/master.csv"])
-    except SystemExit as exc:  # ``wrangle_grants`` uses ``SystemExit`` on error
+        kwargs, limit, fields = parse_query(request.args)
+        data = _dataset(etag)
+        index = _grant_index(data)
+        if fields:
+            unknown = [f for f in fields if f not in index.headers]
+            if unknown:
+                raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+        ids = index.query(**kwargs)
+    except MergePending as pending:
+        return _job_response(pending.job, 202)
+    except WrangleError as exc:
         return jsonify({"error": str(exc)}), 400
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    # Relative filters (open, within_days) change with the date.
+    key = ("grants", data["etag"], date.today().isoformat(), tuple(sorted(request.args.items(multi=True))))
+    resp = responses.respond(key, lambda: app.json.dumps({"total": len(ids), "items": index.records(ids[:limit], fields)}))
+    return _mark_pending(resp, data)
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search() -> Union[Response, Tuple[Response, int]]:
+    """Full-text search over grant names, sponsors, notes and summaries (BM25)."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "missing q"}), 400
+    top = request.args.get("top", "10")
+    if not top.isdigit() or int(top) < 1:
+        return jsonify({"error": "top must be a positive integer"}), 400
+    try:
+        with stage("fingerprint"):
+            etag = input_fingerprint(INPUT_DIR)
+        data = _dataset(etag)
+    except MergePending as pending:
+        return _job_response(pending.job, 202)
+    except WrangleError as exc:
+        return jsonify({"error": str(exc)}), 400
+    key = ("search", data["etag"], query, int(top))
+    resp = responses.respond(key, lambda: app.json.dumps({"query": query, "results": data["text"].search(query, top=int(top))}))
+    return _mark_pending(resp, data)
+
+
+@app.route("/api/wrangle/jobs", methods=["POST"])
+def create_job() -> Tuple[Response, int]:
+    """Start a background merge of the inputs and return its job id."""
+    with stage("fingerprint"):
+        etag = input_fingerprint(INPUT_DIR)
+    job, new = submit_wrangle(etag)
+    resp = jsonify({**job.to_dict(), "coalesced": not new})
+    resp.headers["Location"] = f"/api/wrangle/jobs/{job.id}"
+    return resp, 200 if job.status == "done" else 202
+
+
+@app.route("/api/wrangle/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str) -> Union[Response, Tuple[Response, int]]:
+    """Return the status of a background merge."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"unknown job {job_id}"}), 404
+    return jsonify(job.to_dict())
 
-    csv_path = Path("out/master.csv")
-    if not csv_path.exists():
-        return jsonify({"error": "wrangle output not found"}), 500
 
-    df = pd.read_csv(csv_path)
-    return jsonify(df.to_dict(orient="records"))
+@app.route("/api/wrangle/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id: str) -> Union[Response, Tuple[Response, int]]:
+    """Return the records produced by a finished background merge."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"unknown job {job_id}"}), 404
+    if job.status != "done":
+        return jsonify(job.to_dict()), 409
+    data = job.data
+    if data is None:
+        return jsonify({**job.to_dict(), "error": "superseded by a newer merge; fetch /api/wrangle"}), 410
+    return responses.respond(
+        ("wrangle", data["etag"]), lambda: _json_records(data["headers"], data["rows"], data["types"]), etag=data["etag"]
+    )
 
 
 if __name__ == "__main__":
@@ -5,26 +5,134 @@ wrangle_grants.py — Merge all CSVs in a folder into one master CSV.
 Usage:
   python wrangle_grants.py --input data/csvs --out out/master.csv
   python wrangle_grants.py --input data/csvs --out out/master.csv --dedup-key Link
+  python wrangle_grants.py --input data/csvs --out out/master.csv --dedup-key "Link:url,Opp ID:digits"
   python wrangle_grants.py --input data/csvs --out out/master.csv --pattern "*.csv"
   python wrangle_grants.py --input data/csvs --out out/master.csv --strict
+  python wrangle_grants.py --input data/csvs --out out/master.csv --stream
+  python wrangle_grants.py --input data/csvs --out out/master.csv --cache-dir out/.wrangle_cache
+  python wrangle_grants.py --input data/csvs --out out/master.csv --jobs 4
+  python wrangle_grants.py --input data/csvs --out out/master.csv --skip-duplicates
+  python wrangle_grants.py --input data/csvs --out out/master.csv --columnar feather
+  python wrangle_grants.py --input data/csvs --out out/master.csv --text-index out/.text_index
+  python wrangle_grants.py --input data/csvs --out out/master.csv --xlsx out/master.xlsx \
+      --weights 0.4 0.4 0.2 --deadline-cutoff today --print-summary
+
+Library use:
+  from wrangle_grants import WrangleOptions, wrangle
+  result = wrangle("data/csvs", WrangleOptions(dedup_key="Link"))
+  result.write_csv("out/master.csv")
 """
 
 from __future__ import annotations
 import argparse
+from array import array
 import csv
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from operator import itemgetter
 import glob
+import hashlib
+import json
 import os
+import pickle
+import re
 import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from grant_parsing import parse_dates, parse_money
+
+if TYPE_CHECKING:  # pragma: no cover - pandas is only needed for the optional columnar output
+    import pandas as pd
 
 
 def read_csv(path: str, delimiter: str = ",", encoding: str = "utf-8") -> Tuple[List[str], List[Dict[str, Any]]]:
+    table = read_table(path, delimiter=delimiter, encoding=encoding)
+    return table.headers, list(table.dicts())
+
+
+class SourceTable:
+    """Parsed rows of one input file, stored sparsely.
+
+    Each row is a tuple in the file's own column order, so a file only holds
+    the fields it actually has instead of one entry per column of the much
+    wider union schema. Full-width rows are produced by ``project_rows`` only
+    when the master is written.
+    """
+
+    __slots__ = ("headers", "rows")
+
+    def __init__(self, headers: List[str], rows: List[Tuple[str, ...]]) -> None:
+        self.headers = headers
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def dicts(self) -> Iterator[Dict[Any, Any]]:
+        """Yield rows exactly as ``csv.DictReader`` would have returned them."""
+        headers = self.headers
+        n = len(headers)
+        for row in self.rows:
+            d: Dict[Any, Any] = dict(zip(headers, row))
+            if len(row) > n:
+                d[None] = list(row[n:])
+            elif len(row) < n:
+                for h in headers[len(row):]:
+                    d[h] = None
+            yield d
+
+
+def _parse_table(path: str, delimiter: str, encoding: str) -> Tuple[List[str], List[Tuple[str, ...]]]:
     with open(path, newline="", encoding=encoding) as f:
-        r = csv.DictReader(f, delimiter=delimiter)
-        fieldnames = list(r.fieldnames or [])
-        rows = list(r)
-        return fieldnames, rows
+        reader = csv.reader(f, delimiter=delimiter)
+        headers = next(reader, [])
+        # csv.DictReader skips blank lines; so do we.
+        return headers, [tuple(r) for r in reader if r]
+
+
+def read_table(path: str, delimiter: str = ",", encoding: str = "utf-8") -> SourceTable:
+    """Parse ``path`` into a ``SourceTable``."""
+    return SourceTable(*_parse_table(path, delimiter, encoding))
+
+
+def read_headers(path: str, delimiter: str = ",", encoding: str = "utf-8") -> List[str]:
+    """Return only the header row of ``path`` without parsing the data rows."""
+    with open(path, newline="", encoding=encoding) as f:
+        return next(csv.reader(f, delimiter=delimiter), [])
+
+
+def projector(headers: Sequence[str], columns: Sequence[str]) -> Callable[[Tuple[str, ...]], Tuple[Any, ...]]:
+    """Return a function that maps a row of a ``headers``-shaped file onto ``columns``.
+
+    Columns the file lacks become ``""`` and cells missing from short rows
+    become ``None``, matching ``csv.DictReader`` followed by ``normalize_rows``.
+    """
+    n = len(headers)
+    last = {h: i for i, h in enumerate(headers)}  # duplicate headers: last wins
+    positions = [last.get(c, n) for c in columns]
+    if len(positions) == 1:
+        only = positions[0]
+        get: Callable[[Tuple[Any, ...]], Tuple[Any, ...]] = lambda r: (r[only],)
+    else:
+        get = itemgetter(*positions)
+    pad = ("",)
+
+    def project(row: Tuple[str, ...]) -> Tuple[Any, ...]:
+        if len(row) != n:
+            row = row[:n] + (None,) * (n - len(row))
+        return get(row + pad)
+
+    return project
+
+
+def project_rows(tables: Iterable[SourceTable], columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+    """Yield every row of ``tables`` as a full-width tuple in ``columns`` order."""
+    for table in tables:
+        yield from map(projector(table.headers, columns), table.rows)
 
 
 def union_headers(headers_list: List[List[str]]) -> List[str]:
@@ -45,90 +153,1107 @@ def normalize_rows(rows: List[Dict[str, Any]], all_headers: List[str]) -> List[D
     return out
 
 
-def main() -> None:
+def canonical_url(value: str) -> str:
+    """Canonicalize a URL so trivially different spellings compare equal.
+
+    Lower-cases scheme and host, treats ``http`` as ``https``, drops default
+    ports, fragments and trailing slashes, and sorts query parameters.
+    """
+    value = value.strip()
+    if not value:
+        return ""
+    parts = urlsplit(value)
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+_NON_DIGITS = re.compile(r"\D+")
+
+DEDUP_NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "strip": str.strip,
+    "casefold": str.casefold,
+    "space": lambda v: " ".join(v.split()),
+    "url": canonical_url,
+    "digits": lambda v: _NON_DIGITS.sub("", v),
+}
+
+
+class DedupKey:
+    """A (possibly composite) de-duplication key with per-column normalizers.
+
+    ``spec`` is a comma-separated list of columns, each optionally followed by
+    ``:`` and ``+``-joined normalizer names from ``DEDUP_NORMALIZERS``, e.g.
+    ``"Link:url,Opp ID:strip+digits"``. Columns without their own normalizers
+    use ``default_normalizers``. Rows are compared through a 64-bit BLAKE2b
+    hash of the normalized values, so the seen-set holds small integers
+    instead of full key strings.
+    """
+
+    def __init__(self, spec: str, default_normalizers: Sequence[str] = ()) -> None:
+        self.spec = spec
+        self.columns: List[str] = []
+        self._normalizers: List[List[Callable[[str], str]]] = []
+        for defaults in default_normalizers:
+            if defaults not in DEDUP_NORMALIZERS:
+                raise ValueError(f"Unknown dedup normalizer '{defaults}'")
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            column, names = part, list(default_normalizers)
+            head, sep, tail = part.rpartition(":")
+            if sep and head and all(n in DEDUP_NORMALIZERS for n in tail.split("+")):
+                column, names = head.strip(), tail.split("+")
+            self.columns.append(column)
+            self._normalizers.append([DEDUP_NORMALIZERS[n] for n in names])
+
+    def missing(self, headers: Iterable[str]) -> List[str]:
+        """Return key columns that are not present in ``headers``."""
+        present = set(headers)
+        return [c for c in self.columns if c not in present]
+
+    def value(self, row: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+        """Return the normalized key values for ``row``.
+
+        Without normalizers a missing cell (``None`` for short rows) stays
+        distinct from an empty one, as it always has for raw keys.
+        """
+        return self._normalize(row.get(column, "") for column in self.columns)
+
+    def _normalize(self, values: Iterable[Optional[str]]) -> Tuple[Optional[str], ...]:
+        out = []
+        for v, normalizers in zip(values, self._normalizers):
+            if normalizers:
+                v = v or ""
+                for fn in normalizers:
+                    v = fn(v)
+            out.append(v)
+        return tuple(out)
+
+    @staticmethod
+    def _digest(values: Tuple[Optional[str], ...]) -> int:
+        joined = "\x1f".join("\x00" if v is None else v for v in values)
+        return int.from_bytes(hashlib.blake2b(joined.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def hash(self, row: Dict[str, Any]) -> int:
+        """Return a fixed-size hash of the normalized key for ``row``."""
+        return self._digest(self.value(row))
+
+    def bind(self, columns: Sequence[str]) -> Callable[[Sequence[Any]], int]:
+        """Return ``hash`` for rows given as sequences in ``columns`` order."""
+        positions = [list(columns).index(c) for c in self.columns]
+        return lambda row: self._digest(self._normalize(row[p] for p in positions))
+
+
+def iter_deduped(
+    rows: Iterable[Any],
+    key: Union[str, DedupKey],
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator[Any]:
+    """Yield rows whose ``key`` has not been seen yet (first wins).
+
+    Rows are dicts, or sequences in ``columns`` order when ``columns`` is given.
+    """
+    if not isinstance(key, DedupKey):
+        key = DedupKey(key)
+    key_hash = key.bind(columns) if columns is not None else key.hash
+    seen: Set[int] = set()
+    for r in rows:
+        h = key_hash(r)
+        if h not in seen:
+            seen.add(h)
+            yield r
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of the bytes in ``path``."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of parsed CSV files keyed by content hash.
+
+    ``manifest.json`` records the size, mtime and SHA-256 of every input seen
+    on the last run; each parsed ``SourceTable`` is pickled under its
+    content hash. Files whose size and mtime are unchanged are served from the
+    cache without being opened, touched-but-identical files are recognised by
+    their hash, and only genuinely new content is parsed again.
+    """
+
+    MANIFEST = "manifest.json"
+    VERSION = 2
+
+    def __init__(self, cache_dir: str, delimiter: str = ",", encoding: str = "utf-8") -> None:
+        self.dir = Path(cache_dir)
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._used: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._current: Dict[str, Dict[str, Any]] = {}
+        manifest = self.dir / self.MANIFEST
+        if manifest.is_file():
+            try:
+                data = json.loads(manifest.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == self.VERSION and data.get("delimiter") == delimiter and data.get("encoding") == encoding:
+                self._entries = data.get("files", {})
+
+    def _blob(self, digest: str) -> Path:
+        return self.dir / f"{digest}.pickle"
+
+    def entry(self, path: str) -> Dict[str, Any]:
+        """Return the manifest entry for ``path``, hashing it only if it changed."""
+        key = os.path.abspath(path)
+        current = self._current.get(key)
+        if current is not None:
+            return current
+        st = os.stat(path)
+        old = self._entries.get(key)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            digest = old["sha256"]
+        else:
+            digest = file_digest(path)
+        current = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        if old and old["sha256"] == digest and "rowset" in old:
+            current["rowset"] = old["rowset"]
+        self._current[key] = current
+        return current
+
+    def annotate(self, path: str, **fields: Any) -> None:
+        """Record extra per-file facts (e.g. a row-set hash) in the manifest."""
+        self.entry(path).update(fields)
+
+    def fingerprints(self, path: str) -> Optional[Set[int]]:
+        """Return the stored row fingerprints of ``path``'s content, or ``None``."""
+        stored = array("Q")
+        try:
+            with open(self._blob(self.entry(path)["sha256"]).with_suffix(".rows"), "rb") as f:
+                stored.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        return set(stored)
+
+    def store_fingerprints(self, path: str, fingerprints: Set[int]) -> None:
+        """Store the row fingerprints of ``path`` and record their row-set hash."""
+        blob = self._blob(self.entry(path)["sha256"]).with_suffix(".rows")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_suffix(".rows.tmp")
+        tmp.write_bytes(array("Q", sorted(fingerprints)).tobytes())
+        os.replace(tmp, blob)
+        self.annotate(path, rowset=rowset_digest(fingerprints))
+
+    def lookup(self, path: str) -> Optional[SourceTable]:
+        """Return the cached parse of ``path``, or ``None`` if it must be parsed."""
+        key = os.path.abspath(path)
+        entry = self.entry(path)
+        digest = entry["sha256"]
+        try:
+            with open(self._blob(digest), "rb") as f:
+                headers, rows = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            self._pending[key] = entry
+            return None
+        self.hits += 1
+        self._used[key] = entry
+        return SourceTable(headers, rows)
+
+    def keep(self, path: str) -> None:
+        """Keep the entry (and blob) of ``path`` in the saved manifest without loading it."""
+        self._used[os.path.abspath(path)] = self.entry(path)
+
+    def store(self, path: str, table: SourceTable) -> None:
+        """Cache a fresh parse of ``path`` after a ``lookup`` miss."""
+        key = os.path.abspath(path)
+        entry = self._pending.pop(key)
+        blob = self._blob(entry["sha256"])
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((table.headers, table.rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, blob)
+        self.misses += 1
+        self._used[key] = entry
+
+    def load(self, path: str) -> SourceTable:
+        """Return ``read_table(path)``, reusing the cached parse when possible."""
+        cached = self.lookup(path)
+        if cached is not None:
+            return cached
+        table = read_table(path, delimiter=self.delimiter, encoding=self.encoding)
+        self.store(path, table)
+        return table
+
+    def save(self) -> None:
+        """Write the manifest for this run and drop blobs no input refers to."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "delimiter": self.delimiter,
+            "encoding": self.encoding,
+            "files": self._used,
+        }
+        tmp = self.dir / (self.MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.dir / self.MANIFEST)
+        live = {e["sha256"] for e in self._used.values()}
+        for pattern in ("*.pickle", "*.rows"):
+            for blob in self.dir.glob(pattern):
+                if blob.stem not in live:
+                    blob.unlink()
+
+
+ParseResult = Tuple[str, Optional[SourceTable], Optional[Exception]]
+
+
+def iter_parsed(
+    files: Iterable[str],
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Iterator[ParseResult]:
+    """Yield ``(path, table, error)`` for each file, in input order.
+
+    With ``jobs > 1`` files are parsed in a process pool while results are
+    still handed back strictly in ``files`` order, so the merge is identical to
+    the serial path. At most ``2 * jobs`` parsed files are held at once.
+    Exactly one of ``table`` and ``error`` is set for every path.
+    """
+    if jobs <= 1:
+        for fp in files:
+            try:
+                if cache is not None:
+                    parsed = cache.load(fp)
+                else:
+                    parsed = read_table(fp, delimiter=delimiter, encoding=encoding)
+            except Exception as e:
+                yield fp, None, e
+                continue
+            yield fp, parsed, None
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: deque = deque()
+        remaining = iter(files)
+
+        def fill() -> None:
+            while len(pending) < 2 * jobs:
+                fp = next(remaining, None)
+                if fp is None:
+                    return
+                try:
+                    cached = cache.lookup(fp) if cache is not None else None
+                except Exception as e:
+                    pending.append((fp, e))
+                    continue
+                if cached is not None:
+                    pending.append((fp, cached))
+                else:
+                    pending.append((fp, pool.submit(_parse_table, fp, delimiter, encoding)))
+
+        fill()
+        while pending:
+            fp, item = pending.popleft()
+            fill()
+            if isinstance(item, Exception):
+                yield fp, None, item
+                continue
+            if isinstance(item, Future):
+                try:
+                    item = SourceTable(*item.result())
+                    if cache is not None:
+                        cache.store(fp, item)
+                except Exception as e:
+                    yield fp, None, e
+                    continue
+            yield fp, item, None
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+def row_fingerprints(rows: Iterable[Dict[str, Any]]) -> Set[int]:
+    """Return a 64-bit hash per row that ignores column order, header case,
+    whitespace and empty cells, so the same record exported with a different
+    delimiter or column layout fingerprints identically."""
+    out: Set[int] = set()
+    for r in rows:
+        pairs = sorted(
+            (_squash(k).casefold(), _squash(v))
+            for k, v in r.items()
+            if isinstance(k, str) and isinstance(v, str) and v.strip()
+        )
+        canon = "\x1f".join(f"{k}\x1e{v}" for k, v in pairs)
+        out.add(int.from_bytes(hashlib.blake2b(canon.encode("utf-8"), digest_size=8).digest(), "big"))
+    return out
+
+
+def rowset_digest(fingerprints: Set[int]) -> str:
+    """Hash a set of row fingerprints into a single order-independent digest."""
+    h = hashlib.sha256()
+    for fp in sorted(fingerprints):
+        h.update(fp.to_bytes(8, "big"))
+    return h.hexdigest()
+
+
+class DuplicateFilter:
+    """Skip input files that add nothing new to the merge.
+
+    Byte-identical files are caught by content hash before they are parsed.
+    Files whose normalized rows are all already present in earlier inputs
+    (re-exports with another delimiter or column order, ``master_*`` copies)
+    are caught by row fingerprint. With a ``ParseCache`` each file's
+    fingerprints are stored next to its parse, so unchanged files are not
+    fingerprinted again, and identical twins are skipped before parsing.
+    """
+
+    def __init__(self, cache: Optional[ParseCache] = None, log: Callable[[str], None] = print) -> None:
+        self.cache = cache
+        self.log = log
+        self.skipped: List[Tuple[str, str]] = []
+        self._by_digest: Dict[str, str] = {}
+        self._by_rowset: Dict[str, str] = {}
+        self._seen_rows: Set[int] = set()
+
+    def _skip(self, fp: str, reason: str) -> None:
+        if self.cache is not None:
+            # Skipped files are never looked up; keep their row-set hash for the next run.
+            self.cache.keep(fp)
+        self.skipped.append((fp, reason))
+        self.log(f"INFO: Skipping {fp}: {reason}")
+
+    def unique_files(self, files: Iterable[str]) -> List[str]:
+        """Drop exact (and known derived) duplicates without parsing them."""
+        kept: List[str] = []
+        for fp in files:
+            try:
+                entry = self.cache.entry(fp) if self.cache is not None else {"sha256": file_digest(fp)}
+            except OSError:
+                kept.append(fp)  # let the parse step report the error
+                continue
+            original = self._by_digest.get(entry["sha256"])
+            if original is not None:
+                self._skip(fp, f"identical bytes to {original}")
+                continue
+            rowset = entry.get("rowset")
+            if rowset is not None and rowset in self._by_rowset:
+                self._skip(fp, f"same rows as {self._by_rowset[rowset]}")
+                continue
+            self._by_digest[entry["sha256"]] = fp
+            if rowset is not None:
+                self._by_rowset[rowset] = fp
+            kept.append(fp)
+        return kept
+
+    def is_derived(self, fp: str, table: SourceTable) -> bool:
+        """Return True (and record the skip) if every row of ``fp`` was already loaded."""
+        fingerprints = self.cache.fingerprints(fp) if self.cache is not None else None
+        if fingerprints is None:
+            fingerprints = row_fingerprints(table.dicts())
+            if self.cache is not None:
+                self.cache.store_fingerprints(fp, fingerprints)
+        if fingerprints and fingerprints <= self._seen_rows:
+            self._skip(fp, f"all {len(table)} rows already present in earlier files")
+            return True
+        self._seen_rows |= fingerprints
+        return False
+
+
+COLUMNAR_SUFFIXES = {"feather": ".feather", "parquet": ".parquet"}
+
+
+def write_columnar(csv_path: str, fmt: str = "feather", delimiter: str = ",", encoding: str = "utf-8") -> Path:
+    """Write a typed Feather/Parquet copy of ``csv_path`` next to it.
+
+    The CSV is parsed once here with the same ``pd.read_csv`` type inference
+    every consumer used to repeat, so readers of the columnar file see the
+    same columns and dtypes. Requires ``pyarrow``.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, sep=delimiter, encoding=encoding)
+    out = Path(csv_path).with_suffix(COLUMNAR_SUFFIXES[fmt])
+    tmp = out.with_name(out.name + ".tmp")
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_feather(tmp)
+    os.replace(tmp, out)
+    return out
+
+
+def read_dataframe(csv_path: str | Path) -> pd.DataFrame:
+    """Load ``csv_path`` into a DataFrame, preferring a fresher columnar copy.
+
+    A ``.feather`` (memory-mapped) or ``.parquet`` sibling written by
+    ``--columnar`` is used when it is at least as new as the CSV, so edits made
+    to the CSV directly are never masked by a stale binary copy. Falls back to
+    ``pd.read_csv`` when no such file exists or ``pyarrow`` is unavailable.
+    """
+    import pandas as pd
+
+    csv_path = Path(csv_path)
+    csv_mtime = csv_path.stat().st_mtime_ns if csv_path.exists() else -1
+    for fmt, suffix in COLUMNAR_SUFFIXES.items():
+        candidate = csv_path.with_suffix(suffix)
+        if not candidate.is_file() or candidate.stat().st_mtime_ns < csv_mtime:
+            continue
+        try:
+            if fmt == "feather":
+                from pyarrow import feather
+
+                return feather.read_table(candidate, memory_map=True).to_pandas()
+            return pd.read_parquet(candidate)
+        except Exception:  # pyarrow missing or unreadable file: use the CSV
+            break
+    return pd.read_csv(csv_path)
+
+
+# Columns used by the scoring stage. Money columns get a numeric ``_<name>_num``
+# companion; deadline columns are rewritten as ISO dates where they parse.
+MONEY_COLUMNS = ("Award max", "Award min", "Total funding")
+DEADLINE_COLUMNS = ("Deadline", "App deadline")
+SCORE_INPUTS = ("Relevance", "EQORE Fit", "Ease of Use")
+DEFAULT_WEIGHTS = (0.4, 0.4, 0.2)
+
+
+def score_frame(
+    df: pd.DataFrame,
+    weights: Sequence[float] = DEFAULT_WEIGHTS,
+    cutoff: Optional[pd.Timestamp] = None,
+    today: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """Normalize money/deadlines and add ``Weighted Score`` using column operations.
+
+    * ``MONEY_COLUMNS`` gain numeric ``_<column>_num`` companions.
+    * ``DEADLINE_COLUMNS`` are rewritten as ``YYYY-MM-DD`` where they parse;
+      the effective deadline is ``Deadline``, falling back to ``App deadline``.
+    * Rows whose deadline is before ``cutoff`` are dropped (rows without a
+      deadline are kept); ``Days to Deadline`` and ``Expired`` are relative to
+      ``today``.
+    * ``Weighted Score`` is the dot product of ``SCORE_INPUTS`` with
+      ``weights`` (missing scores count as 0).
+
+    The result is sorted by ``Weighted Score`` (desc), then deadline (asc).
+    """
+    import numpy as np
+    import pandas as pd
+
+    today = (today or pd.Timestamp.today()).normalize()
+    df = df.copy()
+
+    for col in MONEY_COLUMNS:
+        if col in df.columns:
+            df["_" + col.lower().replace(" ", "_") + "_num"] = parse_money(df[col])
+
+    deadline = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    for col in DEADLINE_COLUMNS:
+        if col in df.columns:
+            parsed = parse_dates(df[col])
+            df[col] = df[col].where(parsed.isna(), parsed.dt.strftime("%Y-%m-%d"))
+            deadline = deadline.fillna(parsed)
+
+    if cutoff is not None:
+        keep = deadline.isna() | (deadline >= cutoff.normalize())
+        df, deadline = df[keep], deadline[keep]
+
+    df["Days to Deadline"] = (deadline - today).dt.days.astype("Int64")
+    df["Expired"] = (deadline < today).where(deadline.notna())
+
+    features = np.column_stack(
+        [
+            pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            if col in df.columns
+            else np.zeros(len(df))
+            for col in SCORE_INPUTS
+        ]
+    ) if len(df) else np.zeros((0, len(SCORE_INPUTS)))
+    df["Weighted Score"] = np.round(features @ np.asarray(weights, dtype=float), 3)
+
+    order = np.lexsort((deadline.to_numpy(dtype="datetime64[ns]"), -df["Weighted Score"].to_numpy()))
+    return df.iloc[order].reset_index(drop=True)
+
+
+def _frame_rows(df: pd.DataFrame) -> Iterator[Tuple[Any, ...]]:
+    """Yield DataFrame rows as tuples with missing values written as blanks."""
+    return df.astype(object).where(df.notna(), "").itertuples(index=False, name=None)
+
+
+def print_summary(df: pd.DataFrame, top: int = 10) -> None:
+    """Print a short overview of a scored master table."""
+    import pandas as pd
+
+    print(f"SUMMARY: {len(df)} grant(s)")
+    if "Expired" in df.columns:
+        expired = int(df["Expired"].fillna(False).astype(bool).sum())
+        undated = int(df["Expired"].isna().sum())
+        print(f"SUMMARY: {expired} expired, {undated} without a parseable deadline")
+    if not len(df):
+        return
+    head = df.head(top)
+    table = {}
+    # Sources disagree on header spelling; show the first non-blank variant.
+    for label, variants in (("Grant name", ("Grant name", "Grant Name")), ("Sponsor", ("Sponsor org", "Sponsor"))):
+        present = [c for c in variants if c in head.columns]
+        if present:
+            table[label] = head[present].replace("", None).bfill(axis=1).iloc[:, 0]
+    for col in ("Deadline", "Weighted Score"):
+        if col in head.columns:
+            table[col] = head[col]
+    if table:
+        print(pd.DataFrame(table).fillna("").to_string(index=False))
+
+
+def write_master(
+    out_file: str | Path,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+) -> int:
+    """Write ``columns`` and ``rows`` to ``out_file``; return the row count.
+
+    Output goes to a sibling temp file first so a failed run never truncates
+    the last good master.
+    """
+    out_path = Path(out_file)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    written = 0
+    try:
+        with open(tmp_path, "w", newline="", encoding=encoding) as f:
+            w = csv.writer(f, delimiter=delimiter)
+            w.writerow(columns)
+            for row in rows:
+                w.writerow(row)
+                written += 1
+        os.replace(tmp_path, out_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return written
+
+
+class WrangleError(Exception):
+    """Raised by ``wrangle`` when the inputs cannot be merged.
+
+    ``exit_code`` is the status the command-line tool exits with.
+    """
+
+    def __init__(self, message: str, exit_code: int = 1) -> None:
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+@dataclass
+class WrangleOptions:
+    """Settings for ``wrangle``; mirrors the command-line flags of the same names."""
+
+    pattern: str = "*.csv"
+    dedup_key: str = ""
+    dedup_normalize: Sequence[str] = ()
+    delimiter: str = ","
+    encoding: str = "utf-8"
+    strict: bool = False
+    cache_dir: str = ""
+    jobs: int = 1
+    skip_duplicates: bool = False
+    weights: Optional[Sequence[float]] = None
+    deadline_cutoff: Optional[str] = None
+
+    @property
+    def scoring(self) -> bool:
+        return self.weights is not None or bool(self.deadline_cutoff)
+
+
+class MergeResult:
+    """The merged table returned by ``wrangle``.
+
+    Unscored results keep the parsed per-source tables and a keep-mask per
+    table from de-duplication; full-width rows are only projected when they
+    are iterated, so writing a large master does not need a second copy of
+    the data. Scored results are backed by the scored DataFrame.
+    """
+
+    def __init__(
+        self,
+        headers: List[str],
+        stats: Dict[str, Any],
+        tables: Sequence[SourceTable] = (),
+        masks: Sequence[Optional[bytearray]] = (),
+        frame: Optional[pd.DataFrame] = None,
+    ) -> None:
+        self.headers = headers
+        self.stats = stats
+        self._tables = list(tables)
+        self._masks = list(masks) or [None] * len(self._tables)
+        self._frame = frame
+
+    def __len__(self) -> int:
+        return self.stats["rows"]
+
+    def sources(self) -> List[Tuple[str, SourceTable]]:
+        """Return ``(path, table)`` for each loaded input, before de-duplication."""
+        return list(zip(self.stats.get("files", []), self._tables))
+
+    def iter_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Yield each merged row as a tuple in ``headers`` order."""
+        if self._frame is not None:
+            yield from _frame_rows(self._frame)
+            return
+        for table, mask in zip(self._tables, self._masks):
+            project = projector(table.headers, self.headers)
+            if mask is None:
+                yield from map(project, table.rows)
+            else:
+                yield from (project(row) for row, keep in zip(table.rows, mask) if keep)
+
+    @property
+    def rows(self) -> List[Tuple[Any, ...]]:
+        return list(self.iter_rows())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return rows as dicts, with blank cells as ``None``."""
+        headers = self.headers
+        return [{h: (v if v != "" else None) for h, v in zip(headers, row)} for row in self.iter_rows()]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the merged table as a DataFrame."""
+        if self._frame is None:
+            import pandas as pd
+
+            self._frame = pd.DataFrame.from_records(self.rows, columns=self.headers)
+        return self._frame
+
+    def write_csv(self, out_file: str | Path, delimiter: str = ",", encoding: str = "utf-8") -> int:
+        """Write the merged table to ``out_file``; return the number of rows."""
+        return write_master(out_file, self.headers, self.iter_rows(), delimiter=delimiter, encoding=encoding)
+
+
+def _dedup_key(options: WrangleOptions, union: List[str], log: Callable[[str], None]) -> Optional[DedupKey]:
+    """Build the ``DedupKey`` for ``options``; ``None`` if de-dup is off or unusable."""
+    if not options.dedup_key:
+        return None
+    key = DedupKey(options.dedup_key, options.dedup_normalize)
+    missing = key.missing(union)
+    if missing:
+        log(f"WARNING: dedup-key '{missing[0]}' not found in columns; skipping de-dup.")
+        return None
+    return key
+
+
+def _dedup_masks(tables: Sequence[SourceTable], key: DedupKey) -> List[bytearray]:
+    """Mark the first row of every key across ``tables`` (first wins).
+
+    Only the key columns are projected, so no full-width row is built.
+    """
+    key_hash = key.bind(key.columns)
+    seen: Set[int] = set()
+    masks: List[bytearray] = []
+    for table in tables:
+        project = projector(table.headers, key.columns)
+        mask = bytearray(len(table))
+        for i, row in enumerate(table.rows):
+            h = key_hash(project(row))
+            if h not in seen:
+                seen.add(h)
+                mask[i] = 1
+        masks.append(mask)
+    return masks
+
+
+def _resolve_cutoff(value: Optional[str]) -> Optional[pd.Timestamp]:
+    if not value:
+        return None
+    import pandas as pd
+
+    cutoff = pd.Timestamp.today() if value == "today" else pd.to_datetime(value, errors="coerce")
+    if pd.isna(cutoff):
+        raise WrangleError(f"Invalid deadline cutoff: {value}")
+    return cutoff
+
+
+def list_inputs(inputs: str | Path | Sequence[str | Path], pattern: str = "*.csv") -> List[str]:
+    """Return the sorted files matching ``pattern`` in a folder, or the given file list."""
+    if isinstance(inputs, (str, Path)):
+        return sorted(glob.glob(os.path.join(str(inputs), pattern)))
+    return [str(p) for p in inputs]
+
+
+def input_fingerprint(inputs: str | Path | Sequence[str | Path], pattern: str = "*.csv") -> str:
+    """Return a cheap fingerprint of ``inputs`` from file names, sizes and mtimes.
+
+    No file contents are read, so this costs one ``stat`` per file; it changes
+    whenever a file is added, removed, renamed or rewritten.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for fp in list_inputs(inputs, pattern):
+        try:
+            st = os.stat(fp)
+        except OSError:
+            h.update(f"{fp}\0missing\n".encode("utf-8"))
+            continue
+        h.update(f"{fp}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _problem(msg: str, strict: bool, stats: Dict[str, Any], log: Callable[[str], None]) -> None:
+    """Report a per-file problem; in strict mode it aborts the merge."""
+    if strict:
+        raise WrangleError(msg)
+    stats["warnings"].append(msg)
+    log(f"WARNING: {msg}")
+
+
+def wrangle(
+    inputs: str | Path | Sequence[str | Path],
+    options: Optional[WrangleOptions] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> MergeResult:
+    """Merge the CSVs in ``inputs`` (a folder or a list of files) in memory.
+
+    Nothing is written to disk except the optional parse cache; call
+    ``MergeResult.write_csv`` to produce the master file. Progress messages
+    go to ``log`` (silent by default). Raises ``WrangleError`` when there is
+    nothing to merge or, with ``strict``, when any input cannot be read.
+
+    ``stats["timings"]`` holds the seconds spent in each stage (glob, read,
+    union, dedup, score) and ``stats["file_seconds"]`` the time to load each
+    input, for callers that report where the time goes.
+    """
+    options = options or WrangleOptions()
+    log = log or (lambda msg: None)
+    cutoff = _resolve_cutoff(options.deadline_cutoff)
+    timings: Dict[str, float] = {}
+    stats: Dict[str, Any] = {"warnings": [], "timings": timings, "file_seconds": {}}
+
+    started = time.perf_counter()
+    files = list_inputs(inputs, options.pattern)
+    timings["glob"] = time.perf_counter() - started
+    if not files:
+        raise WrangleError(f"No CSV files found in {inputs} matching {options.pattern}", exit_code=2)
+    stats["files_found"] = len(files)
+    log(f"INFO: Found {len(files)} CSV file(s) in {inputs} matching {options.pattern}")
+
+    cache = ParseCache(options.cache_dir, delimiter=options.delimiter, encoding=options.encoding) if options.cache_dir else None
+    tables: List[SourceTable] = []
+    readable: List[str] = []
+    for fp in files:
+        if not Path(fp).is_file():
+            # Shouldn't happen with glob, but be safe.
+            _problem(f"Skipping non-file path: {fp}", options.strict, stats, log)
+            continue
+        readable.append(fp)
+
+    dup = DuplicateFilter(cache, log=log) if options.skip_duplicates else None
+    if dup is not None:
+        readable = dup.unique_files(readable)
+
+    loaded: List[str] = []
+    mark = time.perf_counter()
+    for fp, table, err in iter_parsed(readable, options.delimiter, options.encoding, jobs=options.jobs, cache=cache):
+        now = time.perf_counter()
+        stats["file_seconds"][fp], mark = now - mark, now
+        if err is not None:
+            _problem(f"Could not read file: {fp} ({err})", options.strict, stats, log)
+            continue
+        if not table.headers:
+            log(f"WARNING: {fp} has no header row; skipping")
+            if options.strict:
+                raise WrangleError("Strict mode enabled; aborting due to headerless CSV.")
+            stats["warnings"].append(f"{fp} has no header row; skipping")
+            continue
+        if dup is not None and dup.is_derived(fp, table):
+            continue
+        log(f"INFO: Loaded {fp} ({len(table)} rows)")
+        tables.append(table)
+        loaded.append(fp)
+
+    if dup is not None:
+        stats["files_skipped"] = [fp for fp, _ in dup.skipped]
+        log(f"INFO: Skipped {len(dup.skipped)} duplicate file(s)")
+    if cache is not None:
+        cache.save()
+        stats["cache"] = {"reused": cache.hits, "parsed": cache.misses}
+        log(f"INFO: Parse cache {options.cache_dir}: {cache.hits} reused, {cache.misses} parsed")
+
+    timings["read"] = time.perf_counter() - started - timings["glob"]
+    if not tables:
+        raise WrangleError("No readable CSVs; nothing to merge.", exit_code=2)
+    stats["files"] = loaded
+
+    mark = time.perf_counter()
+    union = union_headers([t.headers for t in tables])
+    total = sum(len(t) for t in tables)
+    stats["rows_read"] = total
+    timings["union"] = time.perf_counter() - mark
+
+    # Optional de-duplication by one or more (normalized) columns
+    masks: List[Optional[bytearray]] = [None] * len(tables)
+    kept = total
+    dedup_key = _dedup_key(options, union, log)
+    if dedup_key is not None:
+        mark = time.perf_counter()
+        masks = list(_dedup_masks(tables, dedup_key))
+        kept = sum(sum(m) for m in masks)
+        timings["dedup"] = time.perf_counter() - mark
+        log(f"INFO: De-duplicated on '{dedup_key.spec}': {total} → {kept} rows")
+    stats["rows_deduped"] = kept
+    stats["rows"] = kept
+
+    result = MergeResult(union, stats, tables=tables, masks=masks)
+    if options.scoring:
+        mark = time.perf_counter()
+        frame = score_frame(result.to_frame(), options.weights or DEFAULT_WEIGHTS, cutoff=cutoff)
+        timings["score"] = time.perf_counter() - mark
+        if cutoff is not None:
+            log(f"INFO: Deadline cutoff {cutoff.date()}: {kept} → {len(frame)} rows")
+        stats["rows"] = len(frame)
+        result = MergeResult(list(frame.columns), stats, tables=tables, frame=frame)
+    return result
+
+
+def _stream_merge(files: List[str], out_file: str, options: WrangleOptions, log: Callable[[str], None]) -> Tuple[int, int]:
+    """Merge ``files`` into ``out_file`` in two passes without holding rows in memory.
+
+    The first pass reads only header rows to build the union schema; the
+    second streams each file's rows through de-duplication straight into the
+    writer, so memory stays flat regardless of the total row count. Returns
+    ``(files merged, rows written)``.
+    """
+    stats: Dict[str, Any] = {"warnings": []}
+    if options.skip_duplicates:
+        # Derived copies need their rows fingerprinted up front, which would
+        # defeat streaming, so only byte-identical files are skipped here.
+        files = DuplicateFilter(log=log).unique_files(files)
+    readable: List[str] = []
+    headers_list: List[List[str]] = []
+    for fp in files:
+        if not Path(fp).is_file():
+            _problem(f"Skipping non-file path: {fp}", options.strict, stats, log)
+            continue
+        try:
+            headers = read_headers(fp, delimiter=options.delimiter, encoding=options.encoding)
+        except Exception as e:
+            _problem(f"Could not read file: {fp} ({e})", options.strict, stats, log)
+            continue
+        if not headers:
+            log(f"WARNING: {fp} has no header row; skipping")
+            if options.strict:
+                raise WrangleError("Strict mode enabled; aborting due to headerless CSV.")
+            continue
+        readable.append(fp)
+        headers_list.append(headers)
+
+    if not readable:
+        raise WrangleError("No readable CSVs; nothing to merge.", exit_code=2)
+
+    union = union_headers(headers_list)
+    counts = {"read": 0}
+
+    def rows() -> Iterator[Tuple[Any, ...]]:
+        if options.jobs > 1:
+            # Parallel parse; memory is bounded by the pool's look-ahead window.
+            for fp, table, err in iter_parsed(readable, options.delimiter, options.encoding, jobs=options.jobs):
+                if err is not None:
+                    _problem(f"Could not read file: {fp} ({err})", options.strict, stats, log)
+                    continue
+                counts["read"] += len(table)
+                log(f"INFO: Streamed {fp} ({len(table)} rows)")
+                yield from project_rows([table], union)
+            return
+        for fp in readable:
+            n = 0
+            try:
+                with open(fp, newline="", encoding=options.encoding) as f:
+                    reader = csv.reader(f, delimiter=options.delimiter)
+                    project = projector(next(reader, []), union)
+                    for row in reader:
+                        if row:
+                            n += 1
+                            yield project(tuple(row))
+            except Exception as e:
+                # Rows already streamed from this file stay in the output.
+                _problem(f"Could not read file: {fp} after {n} rows ({e})", options.strict, stats, log)
+                continue
+            finally:
+                counts["read"] += n
+            log(f"INFO: Streamed {fp} ({n} rows)")
+
+    stream: Iterable[Tuple[Any, ...]] = rows()
+    dedup_key = _dedup_key(options, union, log)
+    if dedup_key is not None:
+        stream = iter_deduped(stream, dedup_key, union)
+
+    written = write_master(out_file, union, stream, delimiter=options.delimiter, encoding=options.encoding)
+    if dedup_key is not None:
+        log(f"INFO: De-duplicated on '{dedup_key.spec}': {counts['read']} → {written} rows")
+    return len(readable), written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     ap = argparse.ArgumentParser(description="Merge CSVs in a folder into one master CSV")
     ap.add_argument("--input", dest="in_dir", default="data/csvs", help="Folder containing CSVs to merge")
     ap.add_argument("--out", dest="out_file", default="out/master.csv", help="Output CSV file path")
     ap.add_argument("--pattern", dest="pattern", default="*.csv", help='Glob pattern to match files (default: "*.csv")')
-    ap.add_argument("--dedup-key", dest="dedup_key", default="", help="Optional column name to de-duplicate on (first wins)")
+    ap.add_argument(
+        "--dedup-key",
+        dest="dedup_key",
+        default="",
+        help='Optional column(s) to de-duplicate on (first wins), e.g. "Opp ID,Opportunity Number" '
+        'or "Link:url,Opp ID:strip+digits"',
+    )
+    ap.add_argument(
+        "--dedup-normalize",
+        dest="dedup_normalize",
+        type=lambda v: [n for n in v.split(",") if n],
+        default=[],
+        help=f"Normalizers applied to dedup-key columns without their own ({', '.join(DEDUP_NORMALIZERS)})",
+    )
     ap.add_argument("--delimiter", dest="delimiter", default=",", help='CSV delimiter (default: ",")')
     ap.add_argument("--encoding", dest="encoding", default="utf-8", help='File encoding (default: "utf-8")')
     ap.add_argument("--strict", action="store_true", help="Fail if any file cannot be read")
-    args = ap.parse_args()
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream rows file by file to the output in constant memory (two passes over the inputs)",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        default="",
+        help="Folder for a manifest and parsed-row cache so re-runs only re-read changed files",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Parse up to N files in parallel worker processes (default: 1); output is unchanged",
+    )
+    ap.add_argument(
+        "--skip-duplicates",
+        dest="skip_duplicates",
+        action="store_true",
+        help="Skip input files that are byte-identical to, or whose rows all repeat, earlier inputs",
+    )
+    ap.add_argument(
+        "--columnar",
+        choices=sorted(COLUMNAR_SUFFIXES),
+        default="",
+        help="Also write a typed Feather or Parquet copy next to the output CSV (requires pyarrow)",
+    )
+    ap.add_argument(
+        "--weights",
+        type=float,
+        nargs=3,
+        metavar=("RELEVANCE", "FIT", "EASE"),
+        help="Add a Weighted Score from Relevance, EQORE Fit and Ease of Use "
+        f"(default when scoring: {' '.join(map(str, DEFAULT_WEIGHTS))})",
+    )
+    ap.add_argument(
+        "--deadline-cutoff",
+        dest="deadline_cutoff",
+        default="",
+        help='Drop grants whose deadline is before this date ("today" or YYYY-MM-DD); enables scoring',
+    )
+    ap.add_argument(
+        "--text-index",
+        dest="text_index",
+        default="",
+        help="Also update a full-text search index in this folder (see text_index.py)",
+    )
+    ap.add_argument("--xlsx", dest="xlsx_file", default="", help="Also write the master to this Excel file")
+    ap.add_argument("--print-summary", dest="print_summary", action="store_true", help="Print a short summary of the master")
+    args = ap.parse_args(argv)
+    if args.jobs < 1:
+        ap.error("--jobs must be at least 1")
+    unknown = [n for n in args.dedup_normalize if n not in DEDUP_NORMALIZERS]
+    if unknown:
+        ap.error(f"unknown --dedup-normalize value(s): {', '.join(unknown)}")
+    if args.stream and args.cache_dir:
+        ap.error("--cache-dir cannot be combined with --stream")
+    if args.stream and args.columnar:
+        ap.error("--columnar loads the whole table and cannot be combined with --stream")
+    if args.stream and args.text_index:
+        ap.error("--text-index cannot be combined with --stream")
+    options = WrangleOptions(
+        pattern=args.pattern,
+        dedup_key=args.dedup_key,
+        dedup_normalize=args.dedup_normalize,
+        delimiter=args.delimiter,
+        encoding=args.encoding,
+        strict=args.strict,
+        cache_dir=args.cache_dir,
+        jobs=args.jobs,
+        skip_duplicates=args.skip_duplicates,
+        weights=args.weights,
+        deadline_cutoff=args.deadline_cutoff or None,
+    )
+    if args.stream and (options.scoring or args.xlsx_file or args.print_summary):
+        ap.error("--weights, --deadline-cutoff, --xlsx and --print-summary cannot be combined with --stream")
+    try:
+        _resolve_cutoff(options.deadline_cutoff)
+    except WrangleError:
+        ap.error(f"invalid --deadline-cutoff: {args.deadline_cutoff}")
 
     in_dir = args.in_dir
     out_file = args.out_file
-    pattern = args.pattern
 
-    files = sorted(glob.glob(os.path.join(in_dir, pattern)))
-    if not files:
-        print(f"ERROR: No CSV files found in {in_dir} matching {pattern}")
-        sys.exit(2)
+    try:
+        if args.stream:
+            files = list_inputs(in_dir, options.pattern)
+            if not files:
+                raise WrangleError(f"No CSV files found in {in_dir} matching {options.pattern}", exit_code=2)
+            print(f"INFO: Found {len(files)} CSV file(s) in {in_dir} matching {options.pattern}")
+            merged, written = _stream_merge(files, out_file, options, log=print)
+            print(f"OK: Merged {merged} file(s) → {out_file} ({written} rows)")
+            sys.exit(0)
+        result = wrangle(in_dir, options, log=print)
+    except WrangleError as e:
+        print(f"ERROR: {e}")
+        sys.exit(e.exit_code)
 
-    print(f"INFO: Found {len(files)} CSV file(s) in {in_dir} matching {pattern}")
+    written = result.write_csv(out_file, delimiter=args.delimiter, encoding=args.encoding)
 
-    headers_list: List[List[str]] = []
-    all_rows: List[Dict[str, Any]] = []
-    loaded = 0
-    for fp in files:
-        p = Path(fp)
-        if not p.is_file():
-            # Shouldn't happen with glob, but be safe.
-            msg = f"WARNING: Skipping non-file path: {fp}"
-            if args.strict:
-                print(msg.replace("WARNING", "ERROR"))
-                sys.exit(1)
-            print(msg)
-            continue
+    if args.xlsx_file:
+        Path(args.xlsx_file).parent.mkdir(parents=True, exist_ok=True)
+        result.to_frame().to_excel(args.xlsx_file, index=False)
+        print(f"INFO: Wrote {args.xlsx_file}")
+    if args.print_summary:
+        print_summary(result.to_frame())
+
+    if args.columnar:
         try:
-            headers, rows = read_csv(fp, delimiter=args.delimiter, encoding=args.encoding)
-            if not headers:
-                print(f"WARNING: {fp} has no header row; skipping")
-                if args.strict:
-                    print("ERROR: Strict mode enabled; aborting due to headerless CSV.")
-                    sys.exit(1)
-                continue
-            print(f"INFO: Loaded {fp} ({len(rows)} rows)")
-            headers_list.append(headers)
-            all_rows.extend(rows)
-            loaded += 1
-        except Exception as e:
-            msg = f"WARNING: Could not read file: {fp} ({e})"
-            if args.strict:
-                print(msg.replace("WARNING", "ERROR"))
-                sys.exit(1)
-            print(msg)
+            columnar = write_columnar(out_file, args.columnar, delimiter=args.delimiter, encoding=args.encoding)
+        except ImportError as e:
+            print(f"ERROR: --columnar {args.columnar} requires pyarrow ({e})")
+            sys.exit(1)
+        print(f"INFO: Wrote columnar copy {columnar}")
 
-    if loaded == 0:
-        print("ERROR: No readable CSVs; nothing to merge.")
-        sys.exit(2)
+    if args.text_index:
+        from text_index import TextIndex
 
-    union = union_headers(headers_list)
-    normalized = normalize_rows(all_rows, union)
+        index = TextIndex(args.text_index)
+        reused, built = index.update(result.sources())
+        print(f"INFO: Text index {args.text_index}: {reused} reused, {built} built ({index.docs} rows)")
 
-    # Optional de-duplication by a given column
-    if args.dedup_key:
-        if args.dedup_key not in union:
-            print(f"WARNING: dedup-key '{args.dedup_key}' not found in columns; skipping de-dup.")
-        else:
-            seen = set()
-            deduped: List[Dict[str, Any]] = []
-            for r in normalized:
-                key = r.get(args.dedup_key, "")
-                if key not in seen:
-                    seen.add(key)
-                    deduped.append(r)
-            print(f"INFO: De-duplicated on '{args.dedup_key}': {len(normalized)} → {len(deduped)} rows")
-            normalized = deduped
-
-    # Write output
-    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
-    with open(out_file, "w", newline="", encoding=args.encoding) as f:
-        w = csv.DictWriter(f, fieldnames=union, delimiter=args.delimiter)
-        w.writeheader()
-        w.writerows(normalized)
-
-    print(f"OK: Merged {loaded} file(s) → {out_file} ({len(normalized)} rows)")
+    print(f"OK: Merged {len(result.stats['files'])} file(s) → {out_file} ({written} rows)")
     sys.exit(0)
 
 
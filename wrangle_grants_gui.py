@@ -16,6 +16,7 @@ and **should not** be used in production settings.
 
 import threading
 import tkinter as tk
+from pathlib import Path
 from tkinter import filedialog, messagebox
 
 import wrangle_grants
@@ -56,19 +57,21 @@ def run_wrangler():
     w3 = w3_var.get().strip() or "0.2"
     cutoff = cutoff_var.get().strip()
 
-    argv = ["--input", input_dir, "--out", csv_out, "--weights", w1, w2, w3]
-    if xlsx_out:
-        argv.extend(["--xlsx", xlsx_out])
-    if cutoff:
-        argv.extend(["--deadline-cutoff", cutoff])
-    if summary_var.get():
-        argv.append("--print-summary")
-
     def task():
         try:
-            wrangle_grants.main(argv)
-            messagebox.showinfo("Grant Wrangler", "Wrangling complete.")
-        except SystemExit as e:  # pragma: no cover - surfaced from wrangler
+            options = wrangle_grants.WrangleOptions(
+                weights=(float(w1), float(w2), float(w3)),
+                deadline_cutoff=cutoff or None,
+            )
+            result = wrangle_grants.wrangle(input_dir, options, log=print)
+            result.write_csv(csv_out)
+            if xlsx_out:
+                Path(xlsx_out).parent.mkdir(parents=True, exist_ok=True)
+                result.to_frame().to_excel(xlsx_out, index=False)
+            if summary_var.get():
+                wrangle_grants.print_summary(result.to_frame())
+            messagebox.showinfo("Grant Wrangler", f"Wrangling complete ({len(result)} rows).")
+        except wrangle_grants.WrangleError as e:  # pragma: no cover - surfaced from wrangler
             messagebox.showerror("Grant Wrangler", str(e))
         except Exception as e:  # pragma: no cover - unexpected errors
             messagebox.showerror("Grant Wrangler", str(e))